@@ -8,6 +8,7 @@ use App\Entity\Country;
 use App\Service\CountryService;
 use App\Service\UsStateService;
 use Symfony\Bundle\FrameworkBundle\Controller\AbstractController;
+use Symfony\Component\HttpFoundation\AcceptHeader;
 use Symfony\Component\HttpFoundation\JsonResponse;
 use Symfony\Component\HttpFoundation\Request;
 use Symfony\Component\HttpFoundation\Response;
@@ -121,6 +122,28 @@ class CountryController extends AbstractController
         ]);
     }
 
+    #[Route('/search/content', name: 'search_content', methods: ['GET'])]
+    public function searchContent(Request $request): JsonResponse
+    {
+        $query = trim((string) $request->query->get('q', ''));
+        $lang = $request->query->get('lang', 'en');
+        $limit = (int) $request->query->get('limit', 10);
+
+        if ($query === '') {
+            return new JsonResponse(['error' => 'Query parameter "q" is required'], Response::HTTP_BAD_REQUEST);
+        }
+
+        // Volltextsuche in PostgreSQL (auch wenn der Suchdienst nicht erreichbar ist)
+        $results = $this->countryService->searchCountryContentNew($query, $lang, $limit);
+
+        return new JsonResponse([
+            'query' => $query,
+            'language' => $lang,
+            'results' => $results,
+            'total' => count($results)
+        ]);
+    }
+
     #[Route('/autocomplete', name: 'autocomplete', methods: ['GET'])]
     public function autocomplete(Request $request): JsonResponse
     {
@@ -181,12 +204,51 @@ class CountryController extends AbstractController
         ]);
     }
 
+    #[Route('/filter', name: 'filter', methods: ['GET'])]
+    public function filter(Request $request): JsonResponse
+    {
+        $key = $request->query->get('key');
+        $lang = $request->query->get('lang', 'en');
+        $limit = (int) $request->query->get('limit', 50);
+        $min = $request->query->get('min');
+        $max = $request->query->get('max');
+
+        if (!$key || ($min !== null && !is_numeric($min)) || ($max !== null && !is_numeric($max))) {
+            return new JsonResponse(['error' => 'Parameter "key" and numeric "min"/"max" are required'], Response::HTTP_BAD_REQUEST);
+        }
+
+        $countries = $this->countryService->filterCountriesByFactNew(
+            $key,
+            $min !== null ? (float) $min : null,
+            $max !== null ? (float) $max : null,
+            $lang,
+            $limit
+        );
+
+        return new JsonResponse([
+            'key' => $key,
+            'countries' => $countries,
+            'total' => count($countries)
+        ]);
+    }
+
     #[Route('/{slug}', name: 'show', methods: ['GET'])]
     public function show(string $slug, Request $request): JsonResponse
     {
         $lang = $request->query->get('lang', 'en');
         
         try {
+            // Veraltete Slugs (Weiterleitungen aus country_slugs) auf den aktuellen umlenken
+            $resolved = $this->countryService->resolveCountrySlug($slug, $lang);
+            if ($resolved && !$resolved['is_canonical'] && $resolved['canonical_slug'] && $resolved['canonical_slug'] !== $slug) {
+                $location = $this->generateUrl('api_countries_show', ['slug' => $resolved['canonical_slug'], 'lang' => $lang]);
+                return new JsonResponse(
+                    ['redirect' => $resolved['canonical_slug']],
+                    Response::HTTP_MOVED_PERMANENTLY,
+                    ['Location' => $location]
+                );
+            }
+
             // Try new database structure first
             $country = $this->countryService->getCountryBySlugNew($slug, $lang);
             
@@ -361,15 +423,59 @@ class CountryController extends AbstractController
         return new JsonResponse($data, Response::HTTP_OK, [], true);
     }
 
+    #[Route('/{slug}/page', name: 'page', methods: ['GET'])]
+    public function page(string $slug, Request $request): Response
+    {
+        $lang = $request->query->get('lang', 'en');
+        $response = $this->versionedResponse($slug, $lang, $request);
+        if ($response->getStatusCode() === Response::HTTP_NOT_MODIFIED) {
+            return $response;
+        }
+
+        // Precompressed by the importer: stream the bytes as they are
+        $encoding = $this->preferredEncoding($request);
+        if ($encoding !== null) {
+            $body = $this->countryService->getCountryPageEncodedNew($slug, $lang, $encoding);
+            if ($body !== null) {
+                return $this->encodedResponse($response, $body, $encoding, 'application/json');
+            }
+        }
+
+        // Vom Importer vorberechnetes Dokument (ein Lookup)
+        $page = $this->countryService->getCountryPageNew($slug, $lang);
+        if ($page !== null) {
+            return $response->setData($page);
+        }
+
+        // Fallback, solange der Importer die Seite noch nicht gebaut hat
+        $country = $this->countryService->getCountryBySlugNew($slug, $lang);
+        if (!$country) {
+            return new JsonResponse(['error' => 'Country not found'], Response::HTTP_NOT_FOUND);
+        }
+
+        return new JsonResponse([
+            'country' => $country,
+            'language_code' => $lang,
+            'sections' => $this->countryService->getCountryContentNew($slug, $lang),
+            'facts' => $this->countryService->getCountryFactsNew($slug, $lang),
+            'media' => $this->countryService->getCountryMediaNew($slug, $lang),
+            'version' => null
+        ]);
+    }
+
     #[Route('/{slug}/content', name: 'content', methods: ['GET'])]
     public function content(string $slug, Request $request): JsonResponse
     {
         $lang = $request->query->get('lang', 'en');
+        $response = $this->versionedResponse($slug, $lang, $request);
+        if ($response->getStatusCode() === Response::HTTP_NOT_MODIFIED) {
+            return $response;
+        }
         
         try {
             $contents = $this->countryService->getCountryContentNew($slug, $lang);
             
-            return new JsonResponse([
+            return $response->setData([
                 'contents' => $contents
             ]);
         } catch (\Exception $e) {
@@ -377,15 +483,68 @@ class CountryController extends AbstractController
         }
     }
 
+    #[Route('/{slug}/content/{section}', name: 'content_section', methods: ['GET'])]
+    public function contentSection(string $slug, string $section, Request $request): JsonResponse
+    {
+        $lang = $request->query->get('lang', 'en');
+
+        $html = $this->countryService->getCountryColdContentNew($slug, $section, $lang);
+        if ($html === null) {
+            return new JsonResponse(['error' => 'Content not found'], Response::HTTP_NOT_FOUND);
+        }
+
+        return new JsonResponse([
+            'section' => $section,
+            'language_code' => $lang,
+            'content' => $html
+        ]);
+    }
+
+    #[Route('/{slug}/content/{section}/html', name: 'content_section_html', methods: ['GET'])]
+    public function contentSectionHtml(string $slug, string $section, Request $request): Response
+    {
+        $lang = $request->query->get('lang', 'en');
+        $response = $this->versionedResponse($slug, $lang, $request);
+        if ($response->getStatusCode() === Response::HTTP_NOT_MODIFIED) {
+            return $response;
+        }
+
+        $html = $this->countryService->getCountrySectionHtmlNew($slug, $section, $lang, $this->preferredEncoding($request));
+        if ($html === null) {
+            return new JsonResponse(['error' => 'Content not found'], Response::HTTP_NOT_FOUND);
+        }
+
+        return $this->encodedResponse($response, $html['body'], $html['encoding'], 'text/html; charset=UTF-8');
+    }
+
+    #[Route('/{slug}/tables/{section}/{index}', name: 'table', methods: ['GET'], requirements: ['index' => '\d+'])]
+    public function table(string $slug, string $section, int $index, Request $request): JsonResponse
+    {
+        $lang = $request->query->get('lang', 'en');
+        $offset = (int) $request->query->get('offset', 0);
+        $limit = (int) $request->query->get('limit', 50);
+
+        $table = $this->countryService->getCountryTableNew($slug, $section, $index, $lang, $offset, $limit);
+        if ($table === null) {
+            return new JsonResponse(['error' => 'Table not found'], Response::HTTP_NOT_FOUND);
+        }
+
+        return new JsonResponse($table);
+    }
+
     #[Route('/{slug}/facts', name: 'facts', methods: ['GET'])]
     public function facts(string $slug, Request $request): JsonResponse
     {
         $lang = $request->query->get('lang', 'en');
+        $response = $this->versionedResponse($slug, $lang, $request);
+        if ($response->getStatusCode() === Response::HTTP_NOT_MODIFIED) {
+            return $response;
+        }
         
         try {
             $facts = $this->countryService->getCountryFactsNew($slug, $lang);
             
-            return new JsonResponse([
+            return $response->setData([
                 'facts' => $facts
             ]);
         } catch (\Exception $e) {
@@ -398,11 +557,15 @@ class CountryController extends AbstractController
     {
         $lang = $request->query->get('lang', 'en');
         $type = $request->query->get('type'); // 'thumbnail' or 'image'
+        $response = $this->versionedResponse($slug, $lang, $request);
+        if ($response->getStatusCode() === Response::HTTP_NOT_MODIFIED) {
+            return $response;
+        }
         
         try {
             $media = $this->countryService->getCountryMediaNew($slug, $lang, $type);
             
-            return new JsonResponse([
+            return $response->setData([
                 'media' => $media,
                 'country' => $slug,
                 'language' => $lang,
@@ -421,6 +584,62 @@ class CountryController extends AbstractController
         return new JsonResponse(['message' => 'Country views refreshed successfully']);
     }
 
+    /**
+     * Empty response with ETag/Last-Modified from page_versions (per country and language);
+     * already a 304 if If-None-Match/If-Modified-Since match, no validators if the page
+     * has not been built yet
+     */
+    private function versionedResponse(string $slug, string $lang, Request $request): JsonResponse
+    {
+        $response = new JsonResponse();
+        $version = $this->countryService->getPageVersionNew($slug, $lang);
+        if ($version === null) {
+            return $response;
+        }
+
+        // Weak: same content, but the bytes differ per Content-Encoding
+        $response->setEtag($version['version'], true);
+        $response->setLastModified(new \DateTimeImmutable($version['changed_at']));
+        // CDN may store, but has to revalidate
+        $response->setPublic();
+        $response->headers->addCacheControlDirective('no-cache');
+        $response->setVary('Accept-Encoding', false);
+        $response->isNotModified($request);
+
+        return $response;
+    }
+
+    /**
+     * Best precompressed encoding the client accepts (br before gzip), null for identity
+     */
+    private function preferredEncoding(Request $request): ?string
+    {
+        $accept = AcceptHeader::fromString($request->headers->get('Accept-Encoding', ''));
+        foreach (array_keys(CountryService::ENCODINGS) as $encoding) {
+            $item = $accept->get($encoding) ?? $accept->get('*');
+            if ($item !== null && $item->getQuality() > 0) {
+                return $encoding;
+            }
+        }
+
+        return null;
+    }
+
+    /**
+     * Raw body with the validators of $versioned; $encoding null = uncompressed
+     */
+    private function encodedResponse(Response $versioned, string $body, ?string $encoding, string $contentType): Response
+    {
+        $response = new Response($body, Response::HTTP_OK, $versioned->headers->all());
+        $response->headers->set('Content-Type', $contentType);
+        $response->setVary('Accept-Encoding', false);
+        if ($encoding !== null) {
+            $response->headers->set('Content-Encoding', $encoding);
+        }
+
+        return $response;
+    }
+
     /**
      * Extract language code from Accept-Language header
      */
@@ -12,10 +12,36 @@ use App\Repository\CountryRepository;
 use App\Repository\CountryTextRepository;
 use App\Repository\CountryMetricRepository;
 use App\Repository\SourceRepository;
+use Doctrine\DBAL\ParameterType;
 use Doctrine\ORM\EntityManagerInterface;
 
 class CountryService
 {
+    /**
+     * Slug lookup via country_slugs (unique index probe instead of slug_en OR slug_de);
+     * the requested language wins, canonical slugs before redirects
+     */
+    private const SLUG_MATCH = 'c.id = (SELECT cs.country_id FROM country_slugs cs
+                       WHERE cs.slug = :slug
+                       ORDER BY cs.language_code = :lang DESC, cs.is_canonical DESC
+                       LIMIT 1)';
+
+    /**
+     * Page document of the country-language behind a slug (any row of it in country_pages,
+     * the exact slug first; all rows of a country-language carry the same document)
+     */
+    private const PAGE_MATCH = '
+                FROM countries c
+                JOIN country_pages p ON p.country_id = c.id AND p.language_code = :lang
+                WHERE ' . self::SLUG_MATCH . '
+                ORDER BY p.slug = :slug DESC
+                LIMIT 1';
+
+    /**
+     * Precompressed variants written by the importer (Content-Encoding → column suffix)
+     */
+    public const ENCODINGS = ['br' => 'br', 'gzip' => 'gzip'];
+
     public function __construct(
         private EntityManagerInterface $entityManager,
         private CountryRepository $countryRepository,
@@ -286,6 +312,135 @@ class CountryService
         return $result->fetchAllAssociative();
     }
 
+    /**
+     * Full-text search over section texts (search_vector, GIN index); works
+     * without the external search service
+     */
+    public function searchCountryContentNew(string $query, string $lang = 'en', int $limit = 10): array
+    {
+        $sql = 'SELECT c.id AS country_id, c.iso_code, c.name_en, COALESCE(cs.slug, c.slug_en) AS slug,
+                       ct.key AS section, lc.excerpt, ts_rank(lc.search_vector, q) AS rank
+                FROM localized_contents lc
+                JOIN countries c ON lc.country_id = c.id
+                JOIN content_types ct ON lc.content_type_id = ct.id
+                LEFT JOIN country_slugs cs
+                       ON cs.country_id = c.id AND cs.language_code = lc.language_code AND cs.is_canonical
+                CROSS JOIN websearch_to_tsquery(xntop_ts_config(:lang), :query) AS q
+                WHERE lc.language_code = :lang
+                AND lc.search_vector @@ q
+                ORDER BY rank DESC
+                LIMIT :limit';
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'query' => $query,
+            'lang' => $lang,
+            'limit' => $limit
+        ]);
+
+        return array_map(function($row) {
+            $row['rank'] = (float) $row['rank'];
+            return $row;
+        }, $result->fetchAllAssociative());
+    }
+
+    /**
+     * Get the page version (md5 over sections, facts and media) and its change time
+     * for ETag / Last-Modified; null if the importer has not built the page yet
+     */
+    public function getPageVersionNew(string $slug, string $lang = 'en'): ?array
+    {
+        $sql = 'SELECT pv.version, pv.changed_at
+                FROM countries c
+                JOIN page_versions pv ON pv.country_id = c.id AND pv.language_code = :lang
+                WHERE ' . self::SLUG_MATCH;
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery(['slug' => $slug, 'lang' => $lang]);
+
+        $version = $result->fetchAssociative();
+        return $version === false ? null : $version;
+    }
+
+    /**
+     * Get the denormalized page document (country, section metadata, facts, media)
+     * built by the importer; the slug resolves like getPageVersionNew (country_slugs,
+     * including redirects), so document and ETag always belong to the same page
+     */
+    public function getCountryPageNew(string $slug, string $lang = 'en'): ?array
+    {
+        $sql = 'SELECT p.document' . self::PAGE_MATCH;
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'slug' => $slug,
+            'lang' => $lang
+        ]);
+
+        $document = $result->fetchOne();
+        if ($document === false || $document === null) {
+            return null;
+        }
+
+        return json_decode($document, true);
+    }
+
+    /**
+     * Get the page document precompressed by the importer (document::TEXT as gzip/br);
+     * null if the variant is missing (caller falls back to the uncompressed document)
+     */
+    public function getCountryPageEncodedNew(string $slug, string $lang, string $encoding): ?string
+    {
+        if (!isset(self::ENCODINGS[$encoding])) {
+            return null;
+        }
+
+        $sql = 'SELECT p.document_' . self::ENCODINGS[$encoding] . self::PAGE_MATCH;
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'slug' => $slug,
+            'lang' => $lang
+        ]);
+
+        return $this->fetchBytes($result->fetchOne());
+    }
+
+    /**
+     * Resolve a slug in any language; for outdated slugs (redirects) canonical_slug
+     * is the current slug of the country in the requested language
+     */
+    public function resolveCountrySlug(string $slug, string $lang = 'en'): ?array
+    {
+        $sql = 'SELECT s.country_id, s.language_code, s.is_canonical,
+                       (SELECT t.slug FROM country_slugs t
+                        WHERE t.country_id = s.country_id AND t.is_canonical
+                        ORDER BY t.language_code = :lang DESC, t.language_code = s.language_code DESC
+                        LIMIT 1) AS canonical_slug
+                FROM country_slugs s
+                WHERE s.slug = :slug
+                ORDER BY s.language_code = :lang DESC, s.is_canonical DESC
+                LIMIT 1';
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'slug' => $slug,
+            'lang' => $lang
+        ]);
+
+        $row = $result->fetchAssociative();
+        if (!$row) {
+            return null;
+        }
+
+        return [
+            'country_id' => (int) $row['country_id'],
+            'language_code' => $row['language_code'],
+            'is_canonical' => (bool) $row['is_canonical'],
+            'canonical_slug' => $row['canonical_slug']
+        ];
+    }
+
     /**
      * Get country by slug from new database structure
      */
@@ -293,10 +448,10 @@ class CountryService
     {
         $sql = 'SELECT c.id, c.iso_code, c.name_en, c.continent, c.has_subregions, c.slug_en, c.slug_de, c.updated_at
                 FROM countries c 
-                WHERE c.slug_en = :slug OR c.slug_de = :slug';
+                WHERE ' . self::SLUG_MATCH;
         
         $stmt = $this->entityManager->getConnection()->prepare($sql);
-        $result = $stmt->executeQuery(['slug' => $slug]);
+        $result = $stmt->executeQuery(['slug' => $slug, 'lang' => $lang]);
         
         $country = $result->fetchAssociative();
         
@@ -332,12 +487,15 @@ class CountryService
      */
     public function getCountryContentNew(string $slug, string $lang = 'en'): array
     {
-        $sql = 'SELECT lc.id, lc.country_id, lc.language_code, lc.content, lc.source_url, lc.updated_at,
+        // Hot-HTML liegt content-adressiert in content_blobs (lc.content nur noch bei Altbeständen)
+        $sql = 'SELECT lc.id, lc.country_id, lc.language_code, COALESCE(lc.content, b.content) AS content,
+                       lc.source_url, lc.updated_at, lc.storage_tier, lc.content_bytes,
                        ct.id as content_type_id, ct.key as content_type_key, ct.name_en as content_type_name
                 FROM localized_contents lc
                 JOIN countries c ON lc.country_id = c.id
                 JOIN content_types ct ON lc.content_type_id = ct.id
-                WHERE (c.slug_en = :slug OR c.slug_de = :slug)
+                LEFT JOIN content_blobs b ON b.hash = lc.blob_hash
+                WHERE ' . self::SLUG_MATCH . '
                 AND lc.language_code = :lang
                 ORDER BY ct.id';
         
@@ -362,20 +520,167 @@ class CountryService
                 ],
                 'content' => $content['content'],
                 'source_url' => $content['source_url'],
-                'updated_at' => $content['updated_at']
+                'updated_at' => $content['updated_at'],
+                // Cold-Abschnitte (Einzelnachweise etc.) kommen ohne content; Laden via getCountryColdContentNew()
+                'storage_tier' => $content['storage_tier'],
+                'content_bytes' => $content['content_bytes'] !== null ? (int) $content['content_bytes'] : null
             ];
         }, $contents);
     }
 
+    /**
+     * Load a cold-stored section (references, notes, ...) on explicit request
+     */
+    public function getCountryColdContentNew(string $slug, string $section, string $lang = 'en'): ?string
+    {
+        $sql = 'SELECT cold.content_compressed
+                FROM localized_content_cold cold
+                JOIN localized_contents lc ON cold.localized_content_id = lc.id
+                JOIN countries c ON lc.country_id = c.id
+                JOIN content_types ct ON lc.content_type_id = ct.id
+                WHERE ' . self::SLUG_MATCH . '
+                AND lc.language_code = :lang
+                AND ct.key = :section';
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'slug' => $slug,
+            'lang' => $lang,
+            'section' => $section
+        ]);
+
+        $compressed = $result->fetchOne();
+        if ($compressed === false || $compressed === null) {
+            return null;
+        }
+        if (is_resource($compressed)) {
+            $compressed = stream_get_contents($compressed);
+        }
+
+        $html = gzuncompress($compressed);
+
+        return $html === false ? null : $html;
+    }
+
+    /**
+     * Get the HTML of one section as stored: the precompressed blob variant for $encoding
+     * if present (encoding is set), otherwise plain HTML (hot blob or decompressed cold copy)
+     */
+    public function getCountrySectionHtmlNew(string $slug, string $section, string $lang = 'en', ?string $encoding = null): ?array
+    {
+        $variant = $encoding !== null && isset(self::ENCODINGS[$encoding])
+            ? 'b.content_' . self::ENCODINGS[$encoding]
+            : 'NULL::BYTEA';
+
+        $sql = 'SELECT ' . $variant . ' AS encoded, COALESCE(lc.content, b.content) AS content,
+                       cold.content_compressed
+                FROM localized_contents lc
+                JOIN countries c ON lc.country_id = c.id
+                JOIN content_types ct ON lc.content_type_id = ct.id
+                LEFT JOIN content_blobs b ON b.hash = lc.blob_hash
+                LEFT JOIN localized_content_cold cold ON cold.localized_content_id = lc.id
+                WHERE ' . self::SLUG_MATCH . '
+                AND lc.language_code = :lang
+                AND lc.subregion_id IS NULL
+                AND ct.key = :section';
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery([
+            'slug' => $slug,
+            'lang' => $lang,
+            'section' => $section
+        ]);
+
+        $row = $result->fetchAssociative();
+        if (!$row) {
+            return null;
+        }
+
+        $encoded = $this->fetchBytes($row['encoded']);
+        if ($encoded !== null) {
+            return ['body' => $encoded, 'encoding' => $encoding];
+        }
+        if ($row['content'] !== null) {
+            return ['body' => $row['content'], 'encoding' => null];
+        }
+
+        $compressed = $this->fetchBytes($row['content_compressed']);
+        $html = $compressed !== null ? gzuncompress($compressed) : false;
+
+        return $html === false ? null : ['body' => $html, 'encoding' => null];
+    }
+
+    /**
+     * BYTEA comes back as a stream resource from pdo_pgsql
+     */
+    private function fetchBytes(mixed $value): ?string
+    {
+        if (is_resource($value)) {
+            $value = stream_get_contents($value);
+        }
+
+        return $value === false || $value === null ? null : $value;
+    }
+
+    /**
+     * Get one extracted section table with a page of its rows
+     */
+    public function getCountryTableNew(string $slug, string $section, int $index, string $lang = 'en', int $offset = 0, int $limit = 50): ?array
+    {
+        $sql = 'SELECT st.table_index, st.caption, st.columns, st.row_count, st.table_hash,
+                       COALESCE((
+                           SELECT jsonb_agg(r.row ORDER BY r.n)
+                           FROM jsonb_array_elements(st.rows) WITH ORDINALITY AS r(row, n)
+                           WHERE r.n > :offset AND r.n <= :upper
+                       ), \'[]\'::jsonb) AS rows
+                FROM section_tables st
+                JOIN countries c ON st.country_id = c.id
+                JOIN content_types ct ON st.content_type_id = ct.id
+                WHERE ' . self::SLUG_MATCH . '
+                AND st.language_code = :lang
+                AND ct.key = :section
+                AND st.table_index = :table_index';
+
+        // Upper bound computed here: ":offset + :limit" with untyped parameters
+        // is ambiguous for PostgreSQL (operator is not unique)
+        $offset = max(0, $offset);
+        $limit = max(1, min($limit, 500));
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $stmt->bindValue('slug', $slug);
+        $stmt->bindValue('lang', $lang);
+        $stmt->bindValue('section', $section);
+        $stmt->bindValue('table_index', $index, ParameterType::INTEGER);
+        $stmt->bindValue('offset', $offset, ParameterType::INTEGER);
+        $stmt->bindValue('upper', $offset + $limit, ParameterType::INTEGER);
+        $result = $stmt->executeQuery();
+
+        $table = $result->fetchAssociative();
+        if (!$table) {
+            return null;
+        }
+
+        return [
+            'table_index' => (int) $table['table_index'],
+            'caption' => $table['caption'],
+            'columns' => json_decode($table['columns'], true),
+            'row_count' => (int) $table['row_count'],
+            'table_hash' => $table['table_hash'],
+            'offset' => $offset,
+            'rows' => json_decode($table['rows'], true)
+        ];
+    }
+
     /**
      * Get country facts from new database structure
      */
     public function getCountryFactsNew(string $slug, string $lang = 'en'): array
     {
-        $sql = 'SELECT cf.id, cf.country_id, cf.language_code, cf.key, cf.value, cf.unit, cf.last_updated
+        $sql = 'SELECT cf.id, cf.country_id, cf.language_code, cf.key, cf.value, cf.unit, cf.last_updated,
+                       cf.value_numeric, cf.value_date, cf.value_entity
                 FROM country_facts cf
                 JOIN countries c ON cf.country_id = c.id
-                WHERE (c.slug_en = :slug OR c.slug_de = :slug)
+                WHERE ' . self::SLUG_MATCH . '
                 AND cf.language_code = :lang
                 ORDER BY cf.key';
         
@@ -388,6 +693,43 @@ class CountryService
         return $result->fetchAllAssociative();
     }
 
+    /**
+     * Filter countries by a numeric fact in its canonical unit (e.g. population >= 10000000);
+     * range scan on idx_facts_key_numeric instead of casting every value
+     */
+    public function filterCountriesByFactNew(string $key, ?float $min, ?float $max, string $lang = 'en', int $limit = 50): array
+    {
+        $sql = 'SELECT c.id, c.iso_code, c.name_en, c.slug_en, c.continent,
+                       cf.value, cf.unit, cf.value_numeric
+                FROM country_facts cf
+                JOIN countries c ON cf.country_id = c.id
+                WHERE cf.key = :key
+                AND cf.language_code = :lang
+                AND cf.value_numeric IS NOT NULL';
+
+        $params = [
+            'key' => $key,
+            'lang' => $lang,
+            'limit' => $limit
+        ];
+
+        if ($min !== null) {
+            $sql .= ' AND cf.value_numeric >= :min';
+            $params['min'] = $min;
+        }
+        if ($max !== null) {
+            $sql .= ' AND cf.value_numeric <= :max';
+            $params['max'] = $max;
+        }
+
+        $sql .= ' ORDER BY cf.value_numeric DESC LIMIT :limit';
+
+        $stmt = $this->entityManager->getConnection()->prepare($sql);
+        $result = $stmt->executeQuery($params);
+
+        return $result->fetchAllAssociative();
+    }
+
     /**
      * Get country media from new database structure
      */
@@ -397,7 +739,7 @@ class CountryService
                        ma.attribution, ma.source_url, ma.uploaded_at
                 FROM media_assets ma
                 JOIN countries c ON ma.country_id = c.id
-                WHERE (c.slug_en = :slug OR c.slug_de = :slug)
+                WHERE ' . self::SLUG_MATCH . '
                 AND ma.language_code = :lang';
         
         $params = [
@@ -415,32 +757,7 @@ class CountryService
         $stmt = $this->entityManager->getConnection()->prepare($sql);
         $result = $stmt->executeQuery($params);
         
-        $media = $result->fetchAllAssociative();
-        
-        // Fix URLs that don't have protocol and optimize image sizes
-        return array_map(function($item) {
-            if ($item['url'] && !str_starts_with($item['url'], 'http')) {
-                $item['url'] = 'https:' . $item['url'];
-            }
-            
-            // Optimize Wikipedia image URLs for better performance
-            if ($item['type'] === 'thumbnail' && str_contains($item['url'], 'upload.wikimedia.org')) {
-                // For thumbnails, ensure reasonable size (max 400px width)
-                if (!str_contains($item['url'], 'px-')) {
-                    $item['url'] = str_replace(
-                        '/commons/thumb/',
-                        '/commons/thumb/',
-                        $item['url']
-                    );
-                    // Add size parameter if not present
-                    $parts = explode('/', $item['url']);
-                    $filename = end($parts);
-                    $parts[count($parts) - 1] = '400px-' . $filename;
-                    $item['url'] = implode('/', $parts);
-                }
-            }
-            
-            return $item;
-        }, $media);
+        // URLs are stored normalized (https) by the importer, no rewriting here
+        return $result->fetchAllAssociative();
     }
 }
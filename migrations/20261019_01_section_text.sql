@@ -0,0 +1,17 @@
+-- XNTOP: Klartext, Excerpt, Wortzahl & Lesezeit je Abschnitt
+-- Datum: 2026-10-19
+-- Wird vom Importer (Parse-Stage) befüllt und nur bei geändertem content_hash erneuert.
+
+BEGIN;
+
+-- content_hash wird vom Importer bereits für das Change-Detection-UPSERT genutzt
+ALTER TABLE localized_contents
+  ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32);
+
+ALTER TABLE localized_contents
+  ADD COLUMN IF NOT EXISTS plain_text TEXT,
+  ADD COLUMN IF NOT EXISTS excerpt TEXT,
+  ADD COLUMN IF NOT EXISTS word_count INTEGER,
+  ADD COLUMN IF NOT EXISTS reading_time_minutes SMALLINT;
+
+COMMIT;
@@ -0,0 +1,27 @@
+-- XNTOP: Cold Storage für Einzelnachweise, Anmerkungen, Literatur & Weblinks
+-- Datum: 2026-10-19
+-- Die Hot-Zeile in localized_contents behält Hash, Größe und storage_tier;
+-- das HTML liegt zlib-komprimiert in localized_content_cold und wird nur
+-- auf expliziten Wunsch geladen.
+
+BEGIN;
+
+ALTER TABLE localized_contents
+  ADD COLUMN IF NOT EXISTS storage_tier VARCHAR(8) NOT NULL DEFAULT 'hot',
+  ADD COLUMN IF NOT EXISTS content_bytes INTEGER;
+
+CREATE TABLE IF NOT EXISTS localized_content_cold (
+  localized_content_id INTEGER PRIMARY KEY REFERENCES localized_contents(id) ON DELETE CASCADE,
+  content_compressed BYTEA NOT NULL,
+  compression VARCHAR(10) NOT NULL DEFAULT 'zlib',
+  raw_bytes INTEGER NOT NULL,
+  compressed_bytes INTEGER NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bestehende Zeilen: Größe nachtragen (Auslagerung übernimmt der nächste Importlauf)
+UPDATE localized_contents
+SET content_bytes = octet_length(content)
+WHERE content_bytes IS NULL AND content IS NOT NULL;
+
+COMMIT;
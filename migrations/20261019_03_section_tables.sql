@@ -0,0 +1,23 @@
+-- XNTOP: Große wikitables als Spalten-JSON (seitenweises Rendering)
+-- Datum: 2026-10-19
+-- Im Abschnitts-HTML steht statt der Tabelle ein Platzhalter
+-- <div class="xntop-table" data-table-index="…" data-rows="…" data-table-hash="…">.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS section_tables (
+  id SERIAL PRIMARY KEY,
+  country_id INTEGER REFERENCES countries(id) ON DELETE CASCADE,
+  language_code VARCHAR(10) REFERENCES languages(code),
+  content_type_id INTEGER REFERENCES content_types(id),
+  table_index SMALLINT NOT NULL,
+  caption TEXT,
+  columns JSONB NOT NULL,
+  rows JSONB NOT NULL,
+  row_count INTEGER NOT NULL,
+  table_hash VARCHAR(32),
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT uq_section_table UNIQUE (country_id, language_code, content_type_id, table_index)
+);
+
+COMMIT;
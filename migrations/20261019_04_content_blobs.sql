@@ -0,0 +1,116 @@
+-- XNTOP: Content-adressierter Blob-Speicher für Abschnitts-HTML
+-- Datum: 2026-10-19
+-- Identische Abschnitte (gleicher SHA-256 über UTF-8) liegen nur einmal in
+-- content_blobs (TOAST-komprimiert, lz4 ab PostgreSQL 14). Hot-Zeilen in
+-- localized_contents verweisen über blob_hash darauf, content bleibt NULL.
+-- refcount pflegen Statement-Trigger, gc_content_blobs() räumt verwaiste Blobs ab.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS content_blobs (
+  hash CHAR(64) PRIMARY KEY,              -- sha256 hex
+  content TEXT NOT NULL,
+  raw_bytes INTEGER NOT NULL,
+  refcount INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  last_referenced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- lz4 ist schneller als pglz; ohne lz4-Unterstützung bleibt der Default
+DO $$
+BEGIN
+  IF current_setting('server_version_num')::INT >= 140000 THEN
+    EXECUTE 'ALTER TABLE content_blobs ALTER COLUMN content SET COMPRESSION lz4';
+  END IF;
+EXCEPTION WHEN OTHERS THEN
+  RAISE NOTICE 'lz4 nicht verfügbar, content_blobs nutzt pglz: %', SQLERRM;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_content_blobs_gc
+  ON content_blobs (last_referenced_at) WHERE refcount <= 0;
+
+ALTER TABLE localized_contents
+  ADD COLUMN IF NOT EXISTS blob_hash CHAR(64) REFERENCES content_blobs(hash);
+
+CREATE INDEX IF NOT EXISTS idx_localized_contents_blob ON localized_contents (blob_hash);
+
+-- Referenzzähler mengenbasiert je Statement (Transition-Tabellen statt Trigger je Zeile)
+CREATE OR REPLACE FUNCTION content_blobs_refcount() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE content_blobs b SET refcount = b.refcount - d.n
+    FROM (SELECT blob_hash, COUNT(*) AS n FROM old_rows
+          WHERE blob_hash IS NOT NULL GROUP BY blob_hash) d
+    WHERE b.hash = d.blob_hash;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE content_blobs b SET refcount = b.refcount + d.n, last_referenced_at = NOW()
+    FROM (SELECT blob_hash, COUNT(*) AS n FROM new_rows
+          WHERE blob_hash IS NOT NULL GROUP BY blob_hash) d
+    WHERE b.hash = d.blob_hash;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_content_blobs_ins ON localized_contents;
+DROP TRIGGER IF EXISTS trg_content_blobs_upd ON localized_contents;
+DROP TRIGGER IF EXISTS trg_content_blobs_del ON localized_contents;
+
+CREATE TRIGGER trg_content_blobs_ins AFTER INSERT ON localized_contents
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+CREATE TRIGGER trg_content_blobs_upd AFTER UPDATE ON localized_contents
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+CREATE TRIGGER trg_content_blobs_del AFTER DELETE ON localized_contents
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+
+-- Verwaiste Blobs erst nach einer Karenzzeit löschen (laufende Importe verweisen
+-- ggf. gleich wieder darauf); NOT EXISTS schützt vor Zählerfehlern
+CREATE OR REPLACE FUNCTION gc_content_blobs(grace INTERVAL DEFAULT INTERVAL '1 day') RETURNS INTEGER AS $$
+DECLARE
+  removed INTEGER;
+BEGIN
+  DELETE FROM content_blobs b
+  WHERE b.refcount <= 0
+    AND b.last_referenced_at < NOW() - grace
+    AND NOT EXISTS (SELECT 1 FROM localized_contents lc WHERE lc.blob_hash = b.hash);
+  GET DIAGNOSTICS removed = ROW_COUNT;
+  RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bestehende Hot-Zeilen überführen (der Trigger zählt die Referenzen)
+INSERT INTO content_blobs (hash, content, raw_bytes)
+SELECT DISTINCT ON (h) h, content, octet_length(content)
+FROM (
+  SELECT encode(sha256(convert_to(content, 'UTF8')), 'hex') AS h, content
+  FROM localized_contents
+  WHERE content IS NOT NULL AND blob_hash IS NULL AND storage_tier = 'hot'
+) s
+ORDER BY h
+ON CONFLICT (hash) DO NOTHING;
+
+UPDATE localized_contents
+SET blob_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex'),
+    content = NULL
+WHERE content IS NOT NULL AND blob_hash IS NULL AND storage_tier = 'hot';
+
+CREATE OR REPLACE VIEW vw_country_content_overview AS
+SELECT
+    c.id AS country_id,
+    c.name_en AS country_name,
+    l.code AS language,
+    ct.key AS content_key,
+    ct.name_en AS content_type,
+    COALESCE(lc.content, b.content) AS content,
+    lc.updated_at
+FROM countries c
+JOIN localized_contents lc ON lc.country_id = c.id
+JOIN languages l ON l.code = lc.language_code
+JOIN content_types ct ON ct.id = lc.content_type_id
+LEFT JOIN content_blobs b ON b.hash = lc.blob_hash;
+
+COMMIT;
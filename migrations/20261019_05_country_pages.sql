@@ -0,0 +1,22 @@
+-- XNTOP: Denormalisiertes Read-Model je Länderseite
+-- Datum: 2026-10-19
+-- Der Importer schreibt nach jeder erfolgreichen Länder-Sprache ein JSONB-Dokument
+-- (Land, Abschnitts-Metadaten, Fakten, Medien, Versions-Hash) je Slug und Sprache.
+-- Die API lädt eine Seite mit einem Primärschlüssel-Lookup statt fünf Joins.
+-- Befüllung übernimmt der nächste Importlauf; bis dahin baut die API die Seite wie bisher.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS country_pages (
+  slug VARCHAR(255) NOT NULL,
+  language_code VARCHAR(10) NOT NULL,
+  country_id INTEGER NOT NULL REFERENCES countries(id) ON DELETE CASCADE,
+  document JSONB NOT NULL,
+  version_hash CHAR(32) NOT NULL,
+  built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (slug, language_code)
+);
+
+CREATE INDEX IF NOT EXISTS idx_country_pages_country ON country_pages (country_id, language_code);
+
+COMMIT;
@@ -0,0 +1,33 @@
+-- XNTOP: Mehrsprachige Slugs mit Weiterleitungen
+-- Datum: 2026-10-19
+-- Statt "slug_en = :slug OR slug_de = :slug" löst die API Slugs über einen
+-- eindeutigen Index auf. Der Importer trägt je Sprache den Slug des lokalisierten
+-- Titels ein; alte Slugs bleiben als Weiterleitung (is_canonical = FALSE) erhalten.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS country_slugs (
+  slug VARCHAR(255) NOT NULL,
+  language_code VARCHAR(10) NOT NULL,
+  country_id INTEGER NOT NULL REFERENCES countries(id) ON DELETE CASCADE,
+  is_canonical BOOLEAN NOT NULL DEFAULT TRUE,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (slug, language_code)
+);
+
+-- Genau ein kanonischer Slug je Land und Sprache (Ziel der Weiterleitungen)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_country_slugs_canonical
+  ON country_slugs (country_id, language_code) WHERE is_canonical;
+
+-- Bestehende URLs: slug_en kanonisch für en, slug_de als Weiterleitung für de
+-- (bisher identisch mit slug_en; den deutschen Slug setzt der nächste Importlauf)
+INSERT INTO country_slugs (slug, language_code, country_id, is_canonical)
+SELECT slug_en, 'en', id, TRUE FROM countries WHERE slug_en IS NOT NULL AND slug_en <> ''
+ON CONFLICT DO NOTHING;
+
+INSERT INTO country_slugs (slug, language_code, country_id, is_canonical)
+SELECT slug_de, 'de', id, FALSE FROM countries WHERE slug_de IS NOT NULL AND slug_de <> ''
+ON CONFLICT DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,39 @@
+-- XNTOP: Volltextsuche über Abschnittstexte
+-- Datum: 2026-10-19
+-- search_vector wird vom Importer zusammen mit plain_text geschrieben (nur bei
+-- geändertem content_hash). Textsuche-Konfiguration je Sprachcode; Sprachen ohne
+-- Stemmer in PostgreSQL (zh, hi, …) nutzen 'simple'.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION xntop_ts_config(lang TEXT) RETURNS REGCONFIG
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT (CASE lower(split_part(COALESCE(lang, ''), '-', 1))
+    WHEN 'en' THEN 'english'
+    WHEN 'de' THEN 'german'
+    WHEN 'es' THEN 'spanish'
+    WHEN 'fr' THEN 'french'
+    WHEN 'it' THEN 'italian'
+    WHEN 'pt' THEN 'portuguese'
+    WHEN 'nl' THEN 'dutch'
+    WHEN 'sv' THEN 'swedish'
+    WHEN 'da' THEN 'danish'
+    WHEN 'no' THEN 'norwegian'
+    WHEN 'fi' THEN 'finnish'
+    WHEN 'ru' THEN 'russian'
+    WHEN 'tr' THEN 'turkish'
+    ELSE 'simple'
+  END)::REGCONFIG
+$$;
+
+ALTER TABLE localized_contents
+  ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+UPDATE localized_contents
+SET search_vector = to_tsvector(xntop_ts_config(language_code), COALESCE(plain_text, ''))
+WHERE search_vector IS NULL AND plain_text IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_localized_contents_search
+  ON localized_contents USING GIN (search_vector);
+
+COMMIT;
@@ -0,0 +1,30 @@
+-- XNTOP: Typisierte Fakten (Zahl, Datum, Entität) mit btree-Indexen
+-- Datum: 2026-10-19
+-- value bleibt der Anzeige-String. Der Importer schreibt zusätzlich value_numeric
+-- (kanonische Einheit laut unit, z. B. km², USD), value_date und value_entity
+-- (Wikidata-QID). Filter wie "population > 10 Mio." laufen als Index-Range-Scan.
+
+BEGIN;
+
+ALTER TABLE country_facts
+  ADD COLUMN IF NOT EXISTS value_numeric NUMERIC,
+  ADD COLUMN IF NOT EXISTS value_date DATE,
+  ADD COLUMN IF NOT EXISTS value_entity VARCHAR(32);
+
+-- key vorne: jeder Fakten-Key (je Sprache) ist ein eigener, zusammenhängender Indexbereich
+CREATE INDEX IF NOT EXISTS idx_facts_key_numeric
+  ON country_facts (key, language_code, value_numeric) WHERE value_numeric IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_facts_key_date
+  ON country_facts (key, language_code, value_date) WHERE value_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_facts_key_entity
+  ON country_facts (key, language_code, value_entity) WHERE value_entity IS NOT NULL;
+
+-- Bestehende reine Zahlen (Wikidata: "83149300") direkt übernehmen;
+-- formatierte Infobox-Werte parst der nächste Importlauf
+UPDATE country_facts
+SET value_numeric = value::NUMERIC
+WHERE value_numeric IS NULL
+  AND key IN ('population', 'area_km2', 'population_density', 'gdp_nominal', 'gdp_ppp', 'hdi', 'gini')
+  AND value ~ '^\s*[0-9]+(\.[0-9]+)?\s*$';
+
+COMMIT;
@@ -0,0 +1,158 @@
+-- XNTOP: Kompakter Sync-Status, monatlich partitionierte sync_logs mit Rollup/Retention
+-- Datum: 2026-10-19
+-- sync_state hält je (country_id, language_code) den letzten Stand und wird vom Importer
+-- per UPSERT in derselben Transaktion wie die Rohlogs gepflegt; Dashboards und die
+-- Importplanung lesen nur noch diese Tabelle. sync_logs wird nach synced_at monatlich
+-- partitioniert. sync_logs_rollup_and_prune() verdichtet abgelaufene Monate in
+-- sync_logs_daily und entfernt die Partition per DROP statt DELETE.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+  country_id INTEGER NOT NULL REFERENCES countries(id) ON DELETE CASCADE,
+  language_code VARCHAR(10) NOT NULL,
+  source TEXT,
+  status VARCHAR(50) NOT NULL,
+  last_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  last_success_at TIMESTAMP,
+  revision BIGINT NOT NULL DEFAULT 1,
+  duration_ms INTEGER,
+  error TEXT,
+  consecutive_failures INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (country_id, language_code)
+);
+
+-- "Was ist fehlgeschlagen / überfällig?" ohne Scan über alle Länder-Sprachen
+CREATE INDEX IF NOT EXISTS idx_sync_state_status ON sync_state (status, last_attempt_at);
+
+CREATE TABLE IF NOT EXISTS sync_logs_daily (
+  day DATE NOT NULL,
+  country_id INTEGER NOT NULL,
+  language_code VARCHAR(10) NOT NULL,
+  source TEXT NOT NULL DEFAULT '',
+  status VARCHAR(50) NOT NULL,
+  runs INTEGER NOT NULL,
+  duration_ms_sum BIGINT,
+  duration_ms_max INTEGER,
+  PRIMARY KEY (day, country_id, language_code, source, status)
+);
+
+-- Monatspartitionen sync_logs_YYYYMM von from_month bis months_ahead Monate nach heute.
+-- Zeilen, die bis dahin in der Default-Partition gelandet sind, ziehen in die neue Partition um.
+CREATE OR REPLACE FUNCTION sync_logs_ensure_partitions(from_month DATE, months_ahead INTEGER DEFAULT 2)
+RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+  m DATE := date_trunc('month', from_month)::DATE;
+  last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::DATE;
+  part TEXT;
+  created INTEGER := 0;
+BEGIN
+  WHILE m <= last_month LOOP
+    part := 'sync_logs_' || to_char(m, 'YYYYMM');
+    IF to_regclass(part) IS NULL THEN
+      EXECUTE format('CREATE TABLE %I (LIKE sync_logs INCLUDING DEFAULTS)', part);
+      EXECUTE format(
+        'WITH moved AS (DELETE FROM sync_logs_default WHERE synced_at >= %L AND synced_at < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM moved',
+        m, (m + INTERVAL '1 month')::DATE, part);
+      EXECUTE format('ALTER TABLE sync_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                     part, m, (m + INTERVAL '1 month')::DATE);
+      created := created + 1;
+    END IF;
+    m := (m + INTERVAL '1 month')::DATE;
+  END LOOP;
+  RETURN created;
+END $$;
+
+-- Verdichtet alle Monate, die vollständig älter als retention sind, nach sync_logs_daily und
+-- löscht ihre Partitionen (Reste in der Default-Partition per DELETE). Liefert gelöschte Partitionen.
+CREATE OR REPLACE FUNCTION sync_logs_rollup_and_prune(retention INTERVAL)
+RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+  cutoff DATE := date_trunc('month', NOW() - retention)::DATE;
+  rollup CONSTANT TEXT := $sql$
+    INSERT INTO sync_logs_daily AS d
+      (day, country_id, language_code, source, status, runs, duration_ms_sum, duration_ms_max)
+    SELECT synced_at::DATE, country_id, language_code, COALESCE(source, ''), COALESCE(status, ''),
+           count(*), sum(duration_ms), max(duration_ms)
+    FROM %I
+    WHERE country_id IS NOT NULL AND language_code IS NOT NULL AND synced_at < %L
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (day, country_id, language_code, source, status) DO UPDATE SET
+      runs            = d.runs + EXCLUDED.runs,
+      duration_ms_sum = COALESCE(d.duration_ms_sum, 0) + COALESCE(EXCLUDED.duration_ms_sum, 0),
+      duration_ms_max = GREATEST(d.duration_ms_max, EXCLUDED.duration_ms_max)
+  $sql$;
+  part RECORD;
+  dropped INTEGER := 0;
+BEGIN
+  FOR part IN
+    SELECT c.relname, to_date(right(c.relname, 6), 'YYYYMM') AS month
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'sync_logs'::REGCLASS AND c.relname ~ '^sync_logs_[0-9]{6}$'
+    ORDER BY 2
+  LOOP
+    EXIT WHEN (part.month + INTERVAL '1 month')::DATE > cutoff;
+    EXECUTE format(rollup, part.relname, cutoff);
+    EXECUTE format('ALTER TABLE sync_logs DETACH PARTITION %I', part.relname);
+    EXECUTE format('DROP TABLE %I', part.relname);
+    dropped := dropped + 1;
+  END LOOP;
+
+  EXECUTE format(rollup, 'sync_logs_default', cutoff);
+  DELETE FROM sync_logs_default WHERE synced_at < cutoff;
+  RETURN dropped;
+END $$;
+
+-- Umstellung der bestehenden sync_logs (nur einmal: danach ist die Tabelle partitioniert)
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'sync_logs'::REGCLASS) THEN
+    RETURN;
+  END IF;
+
+  ALTER TABLE sync_logs RENAME TO sync_logs_legacy;
+  ALTER INDEX sync_logs_pkey RENAME TO sync_logs_legacy_pkey;
+
+  CREATE TABLE sync_logs (
+    id BIGINT NOT NULL DEFAULT nextval('sync_logs_id_seq'),
+    country_id INTEGER REFERENCES countries(id) ON DELETE CASCADE,
+    language_code VARCHAR(10) REFERENCES languages(code),
+    synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    source TEXT,
+    status VARCHAR(50),
+    duration_ms INTEGER,
+    error TEXT,
+    PRIMARY KEY (id, synced_at)
+  ) PARTITION BY RANGE (synced_at);
+  ALTER SEQUENCE sync_logs_id_seq OWNED BY sync_logs.id;
+
+  CREATE TABLE sync_logs_default PARTITION OF sync_logs DEFAULT;
+  CREATE INDEX idx_sync_logs_country_lang ON sync_logs (country_id, language_code, synced_at);
+
+  PERFORM sync_logs_ensure_partitions(
+    COALESCE((SELECT min(synced_at) FROM sync_logs_legacy), CURRENT_TIMESTAMP)::DATE, 2);
+
+  INSERT INTO sync_logs (id, country_id, language_code, synced_at, source, status)
+  SELECT id, country_id, language_code, COALESCE(synced_at, CURRENT_TIMESTAMP), source, status
+  FROM sync_logs_legacy;
+
+  DROP TABLE sync_logs_legacy;
+END $$;
+
+-- sync_state aus den vorhandenen Logs vorbelegen (letzter Eintrag je Länder-Sprache)
+INSERT INTO sync_state (
+  country_id, language_code, source, status, last_attempt_at, last_success_at, revision
+)
+SELECT DISTINCT ON (country_id, language_code)
+       country_id, language_code, source, COALESCE(status, 'unknown'), synced_at,
+       max(synced_at) FILTER (WHERE status = 'success') OVER w,
+       count(*) OVER w
+FROM sync_logs
+WHERE country_id IS NOT NULL AND language_code IS NOT NULL
+WINDOW w AS (PARTITION BY country_id, language_code)
+ORDER BY country_id, language_code, synced_at DESC, id DESC
+ON CONFLICT (country_id, language_code) DO NOTHING;
+
+COMMIT;
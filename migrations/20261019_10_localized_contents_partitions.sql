@@ -0,0 +1,201 @@
+-- XNTOP: localized_contents nach language_code listenpartitioniert
+-- Datum: 2026-10-19
+-- Jede Sprache liegt in einer eigenen Partition mit eigenen Indexen (localized_contents_<code>),
+-- unbekannte Sprachen landen in localized_contents_default. Eine Sprache kann in eine
+-- abgetrennte Ladetabelle importiert und atomar angehängt werden
+-- (localized_contents_prepare_load / localized_contents_attach_load); ein Neuladen
+-- ersetzt nur die Partition dieser Sprache, die anderen Sprachen bleiben unberührt.
+-- Der Primärschlüssel wird (id, language_code); id bleibt über die Sequenz eindeutig.
+-- localized_content_cold verliert daher den Fremdschlüssel auf id und wird über einen
+-- Zeilentrigger bzw. beim Ersetzen einer Partition mitgelöscht.
+-- Zeilen ohne language_code werden nicht übernommen (die API filtert immer nach Sprache).
+
+BEGIN;
+
+-- Gemeinsamer Suffix für Partitions- und Ladetabellen ("zh-Hans" → "zh_hans")
+CREATE OR REPLACE FUNCTION localized_contents_suffix(lang TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT lower(regexp_replace(lang, '[^A-Za-z0-9]', '_', 'g'))
+$$;
+
+-- Cold-Kopie folgt dem Löschen der Abschnittszeile (ersetzt ON DELETE CASCADE)
+CREATE OR REPLACE FUNCTION localized_contents_delete_cold() RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM localized_content_cold WHERE localized_content_id = OLD.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  fk TEXT;
+  lang TEXT;
+  cols TEXT;
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'localized_contents'::REGCLASS) THEN
+    RETURN;
+  END IF;
+
+  FOR fk IN
+    SELECT conname FROM pg_constraint
+    WHERE conrelid = 'localized_content_cold'::REGCLASS AND confrelid = 'localized_contents'::REGCLASS
+  LOOP
+    EXECUTE format('ALTER TABLE localized_content_cold DROP CONSTRAINT %I', fk);
+  END LOOP;
+
+  DROP VIEW IF EXISTS vw_country_content_overview;
+  ALTER TABLE localized_contents RENAME TO localized_contents_legacy;
+
+  CREATE TABLE localized_contents (
+    LIKE localized_contents_legacy INCLUDING DEFAULTS INCLUDING GENERATED
+  ) PARTITION BY LIST (language_code);
+  ALTER SEQUENCE localized_contents_id_seq OWNED BY localized_contents.id;
+
+  FOR lang IN SELECT code FROM languages ORDER BY code LOOP
+    EXECUTE format('CREATE TABLE %I PARTITION OF localized_contents FOR VALUES IN (%L)',
+                   'localized_contents_' || localized_contents_suffix(lang), lang);
+  END LOOP;
+  CREATE TABLE localized_contents_default PARTITION OF localized_contents DEFAULT;
+
+  -- Vor den Triggern kopieren: die Blob-Referenzen sind bereits gezählt
+  -- (ohne generierte Spalten wie subregion_key)
+  SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO cols
+  FROM pg_attribute
+  WHERE attrelid = 'localized_contents_legacy'::REGCLASS
+    AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+  EXECUTE format('INSERT INTO localized_contents (%s) SELECT %s FROM localized_contents_legacy '
+                 'WHERE language_code IS NOT NULL', cols, cols);
+
+  DROP TABLE localized_contents_legacy;
+
+  ALTER TABLE localized_contents
+    ADD CONSTRAINT localized_contents_pkey PRIMARY KEY (id, language_code),
+    ADD CONSTRAINT uq_localized_content UNIQUE (country_id, subregion_key, language_code, content_type_id),
+    ADD FOREIGN KEY (country_id) REFERENCES countries(id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (subregion_id) REFERENCES country_subregions(id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (language_code) REFERENCES languages(code),
+    ADD FOREIGN KEY (content_type_id) REFERENCES content_types(id),
+    ADD FOREIGN KEY (blob_hash) REFERENCES content_blobs(hash);
+
+  CREATE INDEX idx_localized_contents_blob ON localized_contents (blob_hash);
+  CREATE INDEX idx_localized_contents_search ON localized_contents USING GIN (search_vector);
+
+  CREATE TRIGGER trg_content_blobs_ins AFTER INSERT ON localized_contents
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+  CREATE TRIGGER trg_content_blobs_upd AFTER UPDATE ON localized_contents
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+  CREATE TRIGGER trg_content_blobs_del AFTER DELETE ON localized_contents
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount();
+  CREATE TRIGGER trg_localized_contents_cold AFTER DELETE ON localized_contents
+    FOR EACH ROW EXECUTE FUNCTION localized_contents_delete_cold();
+END $$;
+
+CREATE OR REPLACE VIEW vw_country_content_overview AS
+SELECT
+    c.id AS country_id,
+    c.name_en AS country_name,
+    l.code AS language,
+    ct.key AS content_key,
+    ct.name_en AS content_type,
+    COALESCE(lc.content, b.content) AS content,
+    lc.updated_at
+FROM countries c
+JOIN localized_contents lc ON lc.country_id = c.id
+JOIN languages l ON l.code = lc.language_code
+JOIN content_types ct ON ct.id = lc.content_type_id
+LEFT JOIN content_blobs b ON b.hash = lc.blob_hash;
+
+-- Abgetrennte Ladetabelle für eine Sprache (gleiche Spalten und Indexe wie localized_contents,
+-- Blob-Trigger für korrekte Referenzzähler, CHECK auf die Sprache → ATTACH ohne Prüfscan;
+-- den Cold-Zeilentrigger erhält sie beim ATTACH von der Elterntabelle). Eine vorhandene
+-- Ladetabelle wird weiterverwendet (abgebrochener Lauf), außer reset = TRUE.
+CREATE OR REPLACE FUNCTION localized_contents_prepare_load(lang TEXT, reset BOOLEAN DEFAULT FALSE)
+RETURNS TEXT LANGUAGE plpgsql AS $$
+DECLARE
+  load TEXT := 'localized_contents_load_' || localized_contents_suffix(lang);
+BEGIN
+  IF to_regclass(load) IS NOT NULL THEN
+    IF NOT reset THEN
+      RETURN load;
+    END IF;
+    PERFORM localized_contents_abort_load(lang);
+  END IF;
+
+  EXECUTE format('CREATE TABLE %I (LIKE localized_contents INCLUDING ALL)', load);
+  EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (language_code IS NOT NULL AND language_code = %L)',
+                 load, load || '_lang', lang);
+  EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (blob_hash) REFERENCES content_blobs(hash)', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_ins AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                 'FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_upd AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows '
+                 'NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_del AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                 'FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  RETURN load;
+END $$;
+
+-- Verwirft eine Ladetabelle samt Cold-Kopien und Blob-Referenzen
+CREATE OR REPLACE FUNCTION localized_contents_abort_load(lang TEXT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+  load TEXT := 'localized_contents_load_' || localized_contents_suffix(lang);
+BEGIN
+  IF to_regclass(load) IS NULL THEN
+    RETURN;
+  END IF;
+  EXECUTE format('DELETE FROM localized_content_cold c USING %I l WHERE c.localized_content_id = l.id', load);
+  EXECUTE format('DELETE FROM %I', load);
+  EXECUTE format('DROP TABLE %I', load);
+END $$;
+
+-- Hängt die Ladetabelle als Partition der Sprache an. Eine bisherige Partition wird
+-- abgetrennt und gelöscht (Blob-Referenzen und Cold-Kopien werden mengenbasiert
+-- bereinigt, DROP feuert keine Trigger). Alles in der Transaktion des Aufrufers;
+-- liefert die Zahl der Abschnitte in der neuen Partition.
+CREATE OR REPLACE FUNCTION localized_contents_attach_load(lang TEXT)
+RETURNS BIGINT LANGUAGE plpgsql AS $$
+DECLARE
+  suffix TEXT := localized_contents_suffix(lang);
+  load TEXT := 'localized_contents_load_' || suffix;
+  part TEXT := 'localized_contents_' || suffix;
+  old_part TEXT;
+  loaded BIGINT;
+BEGIN
+  IF to_regclass(load) IS NULL THEN
+    RAISE EXCEPTION 'Keine Ladetabelle % für Sprache %', load, lang;
+  END IF;
+  EXECUTE format('SELECT count(*) FROM %I', load) INTO loaded;
+  IF loaded = 0 THEN
+    RAISE EXCEPTION 'Ladetabelle % ist leer – Partition % bleibt unverändert', load, lang;
+  END IF;
+
+  SELECT c.relname INTO old_part
+  FROM pg_inherits i
+  JOIN pg_class c ON c.oid = i.inhrelid
+  WHERE i.inhparent = 'localized_contents'::REGCLASS
+    AND pg_get_expr(c.relpartbound, c.oid) = format('FOR VALUES IN (%L)', lang);
+
+  IF old_part IS NOT NULL THEN
+    EXECUTE format('ALTER TABLE localized_contents DETACH PARTITION %I', old_part);
+    EXECUTE format($sql$
+      UPDATE content_blobs b
+      SET refcount = b.refcount - d.n, last_referenced_at = NOW()
+      FROM (SELECT blob_hash, count(*) AS n FROM %I WHERE blob_hash IS NOT NULL GROUP BY blob_hash) d
+      WHERE b.hash = d.blob_hash
+    $sql$, old_part);
+    EXECUTE format('DELETE FROM localized_content_cold c USING %I o WHERE c.localized_content_id = o.id', old_part);
+    EXECUTE format('DROP TABLE %I', old_part);
+  ELSE
+    -- bisher in der Default-Partition (Trigger bereinigen Blobs und Cold-Kopien)
+    DELETE FROM localized_contents WHERE language_code = lang;
+  END IF;
+
+  EXECUTE format('ALTER TABLE %I RENAME TO %I', load, part);
+  EXECUTE format('ALTER TABLE localized_contents ATTACH PARTITION %I FOR VALUES IN (%L)', part, lang);
+  RETURN loaded;
+END $$;
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- XNTOP: Versions-Hash je Länderseite (country_id, language_code)
+-- Datum: 2026-10-19
+-- version ist md5 über das Seiten-Dokument (Abschnitts-Hashes, Fakten, Medien) und
+-- wird im selben Statement wie country_pages geschrieben, also in der Transaktion der
+-- Inhalte. changed_at ändert sich nur mit der Version. Die API beantwortet damit
+-- If-None-Match/If-Modified-Since, ohne Inhalte zu lesen; fehlt die Zeile, gibt es keinen ETag.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS page_versions (
+  country_id INTEGER NOT NULL REFERENCES countries(id) ON DELETE CASCADE,
+  language_code VARCHAR(10) NOT NULL,
+  version CHAR(32) NOT NULL,
+  changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (country_id, language_code)
+);
+
+-- Vorhandene Seiten übernehmen (alle Slugs einer Länder-Sprache tragen dasselbe Dokument)
+INSERT INTO page_versions (country_id, language_code, version, changed_at)
+SELECT DISTINCT ON (country_id, language_code) country_id, language_code, version_hash, built_at
+FROM country_pages
+ORDER BY country_id, language_code, built_at DESC
+ON CONFLICT (country_id, language_code) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- XNTOP: Vorkomprimierte Varianten (gzip, brotli) für Abschnitts-HTML und Seiten-Dokumente
+-- Datum: 2026-10-19
+-- Der Importer legt die Varianten einmal beim Schreiben an (Blobs sind content-adressiert,
+-- Seiten nur bei geänderter Version); die API streamt sie mit Content-Encoding durch und
+-- komprimiert nicht mehr pro Request. NULL = Variante fehlt (API liefert unkomprimiert).
+-- Die Bytes sind bereits komprimiert: STORAGE EXTERNAL verhindert eine zweite
+-- TOAST-Kompression.
+
+BEGIN;
+
+ALTER TABLE content_blobs
+  ADD COLUMN IF NOT EXISTS content_gzip BYTEA,
+  ADD COLUMN IF NOT EXISTS content_br BYTEA;
+
+ALTER TABLE content_blobs
+  ALTER COLUMN content_gzip SET STORAGE EXTERNAL,
+  ALTER COLUMN content_br SET STORAGE EXTERNAL;
+
+-- country_pages: gilt für document::TEXT; BUILD_PAGES_SQL setzt beide bei Änderung auf NULL
+ALTER TABLE country_pages
+  ADD COLUMN IF NOT EXISTS document_gzip BYTEA,
+  ADD COLUMN IF NOT EXISTS document_br BYTEA;
+
+ALTER TABLE country_pages
+  ALTER COLUMN document_gzip SET STORAGE EXTERNAL,
+  ALTER COLUMN document_br SET STORAGE EXTERNAL;
+
+COMMIT;
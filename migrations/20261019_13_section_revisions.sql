@@ -0,0 +1,55 @@
+-- XNTOP: Append-only Versionshistorie der Abschnitte mit Delta-Kompression
+-- Datum: 2026-10-19
+-- Jeder Importlauf bekommt eine Zeile in import_runs. section_revisions hält je Abschnitt
+-- (country_id, language_code, content_type_id) fortlaufende Versionen mit content_hash,
+-- Wikipedia-Revision und Lauf. payload ist zlib-komprimiert: "full" = HTML, "delta" =
+-- Zeilen-Delta gegen die vorherige Version, "delete" = Abschnitt entfernt (payload NULL).
+-- Spätestens alle 20 Versionen schreibt der Importer einen Vollstand (kurze Ketten).
+-- Rekonstruktion und Rollback eines Laufs: revision_storage.py (ROLLBACK_RUN_ID).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS import_runs (
+  id BIGSERIAL PRIMARY KEY,
+  source TEXT NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'running',   -- running / finished / failed / rolled_back
+  started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  finished_at TIMESTAMP,
+  rollback_of BIGINT REFERENCES import_runs(id),
+  rolled_back_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS section_revisions (
+  country_id INTEGER NOT NULL REFERENCES countries(id) ON DELETE CASCADE,
+  language_code VARCHAR(10) NOT NULL,
+  content_type_id INTEGER NOT NULL REFERENCES content_types(id),
+  seq INTEGER NOT NULL,
+  kind VARCHAR(8) NOT NULL CHECK (kind IN ('full', 'delta', 'delete')),
+  content_hash VARCHAR(32),
+  wiki_revision BIGINT,
+  run_id BIGINT REFERENCES import_runs(id),
+  payload BYTEA,
+  raw_bytes INTEGER NOT NULL DEFAULT 0,
+  stored_bytes INTEGER NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (country_id, language_code, content_type_id, seq),
+  CHECK ((kind = 'delete') = (payload IS NULL))
+);
+
+-- payload ist bereits zlib-komprimiert
+ALTER TABLE section_revisions ALTER COLUMN payload SET STORAGE EXTERNAL;
+
+-- Letzter Vollstand je Abschnitt (Start der Rekonstruktionskette)
+CREATE INDEX IF NOT EXISTS idx_section_revisions_keyframes
+  ON section_revisions (country_id, language_code, content_type_id, seq) WHERE kind <> 'delta';
+
+-- Version zu einem Hash bzw. einer Wikipedia-Revision
+CREATE INDEX IF NOT EXISTS idx_section_revisions_hash
+  ON section_revisions (country_id, language_code, content_type_id, content_hash);
+CREATE INDEX IF NOT EXISTS idx_section_revisions_wiki
+  ON section_revisions (country_id, language_code, wiki_revision) WHERE wiki_revision IS NOT NULL;
+
+-- Rollback: alle Abschnitte eines Laufs
+CREATE INDEX IF NOT EXISTS idx_section_revisions_run ON section_revisions (run_id) WHERE run_id IS NOT NULL;
+
+COMMIT;
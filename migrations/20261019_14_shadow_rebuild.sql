@@ -0,0 +1,210 @@
+-- XNTOP: Vollständiger Neuaufbau über Schattentabellen mit atomarem Tausch
+-- Datum: 2026-10-19
+-- FULL_REBUILD lädt alle Sprachen in UNLOGGED-Ladetabellen von localized_contents und die
+-- Medien in media_assets_shadow. Während des Ladens existiert nur der Unique-Index, den das
+-- UPSERT (ON CONFLICT) braucht; alle übrigen Indexe und Fremdschlüssel entstehen erst beim
+-- Abschluss (*_finalize: SET LOGGED, Indexe der Live-Tabelle nachbauen, ANALYZE). Danach
+-- tauscht eine kurze Transaktion alle Partitionen und media_assets auf einmal
+-- (shadow_table_swap); Abschnitte und Medien sieht die API nie in einem Teilstand.
+-- Die Seiten-Dokumente (country_pages) baut der Importer erst nach dem Tausch blockweise
+-- neu; bis dahin liefert die API je Länder-Sprache das alte Dokument ohne ETag, weil der
+-- Tausch die page_versions der betroffenen Länder-Sprachen entfernt.
+
+BEGIN;
+
+-- Baut alle Indexe von source auf target nach, die dort noch fehlen (Vergleich über die
+-- Definition ohne Namen); Indexe hinter PRIMARY KEY/UNIQUE werden wieder zu Constraints,
+-- damit ATTACH PARTITION sie übernimmt statt neu zu bauen. Name = Originalname || suffix.
+CREATE OR REPLACE FUNCTION xntop_copy_indexes(source REGCLASS, target REGCLASS, suffix TEXT)
+RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+  idx RECORD;
+  shape CONSTANT TEXT := '^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ';
+  idx_name TEXT;
+  created INTEGER := 0;
+BEGIN
+  FOR idx IN
+    SELECT c.relname, pg_get_indexdef(i.indexrelid) AS def, con.contype
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.conrelid = i.indrelid
+    WHERE i.indrelid = source
+  LOOP
+    CONTINUE WHEN EXISTS (
+      SELECT 1 FROM pg_index t
+      WHERE t.indrelid = target
+        AND regexp_replace(pg_get_indexdef(t.indexrelid), shape, 'CREATE \1INDEX ON ')
+          = regexp_replace(idx.def, shape, 'CREATE \1INDEX ON ')
+    );
+    idx_name := left(idx.relname, 63 - length(suffix)) || suffix;
+    EXECUTE regexp_replace(idx.def, shape,
+                           'CREATE \1INDEX ' || quote_ident(idx_name) || ' ON ' || target::TEXT || ' ');
+    IF idx.contype = 'p' THEN
+      EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I PRIMARY KEY USING INDEX %I', target, idx_name, idx_name);
+    ELSIF idx.contype = 'u' THEN
+      EXECUTE format('ALTER TABLE %s ADD CONSTRAINT %I UNIQUE USING INDEX %I', target, idx_name, idx_name);
+    END IF;
+    created := created + 1;
+  END LOOP;
+  RETURN created;
+END $$;
+
+-- Ladetabelle wie bisher; bulk = TRUE: UNLOGGED und nur mit dem Unique-Constraint für das
+-- UPSERT (weitere Indexe baut localized_contents_finalize_load)
+DROP FUNCTION IF EXISTS localized_contents_prepare_load(TEXT, BOOLEAN);
+CREATE OR REPLACE FUNCTION localized_contents_prepare_load(lang TEXT, reset BOOLEAN DEFAULT FALSE,
+                                                           bulk BOOLEAN DEFAULT FALSE)
+RETURNS TEXT LANGUAGE plpgsql AS $$
+DECLARE
+  load TEXT := 'localized_contents_load_' || localized_contents_suffix(lang);
+BEGIN
+  IF to_regclass(load) IS NOT NULL THEN
+    IF NOT reset THEN
+      RETURN load;
+    END IF;
+    PERFORM localized_contents_abort_load(lang);
+  END IF;
+
+  IF bulk THEN
+    EXECUTE format('CREATE UNLOGGED TABLE %I (LIKE localized_contents INCLUDING DEFAULTS INCLUDING GENERATED)', load);
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (country_id, subregion_key, language_code, content_type_id)',
+                   load, load || '_uq');
+  ELSE
+    EXECUTE format('CREATE TABLE %I (LIKE localized_contents INCLUDING ALL)', load);
+  END IF;
+  EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (language_code IS NOT NULL AND language_code = %L)',
+                 load, load || '_lang', lang);
+  EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (blob_hash) REFERENCES content_blobs(hash)', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_ins AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                 'FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_upd AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows '
+                 'NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  EXECUTE format('CREATE TRIGGER trg_content_blobs_del AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                 'FOR EACH STATEMENT EXECUTE FUNCTION content_blobs_refcount()', load);
+  RETURN load;
+END $$;
+
+-- Abschluss einer Ladetabelle vor dem ATTACH (außerhalb der Tausch-Transaktion):
+-- WAL-sicher machen, fehlende Indexe der Elterntabelle nachbauen, Statistiken; liefert Zeilen
+CREATE OR REPLACE FUNCTION localized_contents_finalize_load(lang TEXT)
+RETURNS BIGINT LANGUAGE plpgsql AS $$
+DECLARE
+  suffix TEXT := localized_contents_suffix(lang);
+  load TEXT := 'localized_contents_load_' || suffix;
+  loaded BIGINT;
+BEGIN
+  IF to_regclass(load) IS NULL THEN
+    RAISE EXCEPTION 'Keine Ladetabelle % für Sprache %', load, lang;
+  END IF;
+  EXECUTE format('ALTER TABLE %I SET LOGGED', load);
+  PERFORM xntop_copy_indexes('localized_contents'::REGCLASS, load::REGCLASS, '_' || suffix || '_load');
+  EXECUTE format('ANALYZE %I', load);
+  EXECUTE format('SELECT count(*) FROM %I', load) INTO loaded;
+  RETURN loaded;
+END $$;
+
+-- Schattentabelle <live>_shadow: UNLOGGED, Spalten/Defaults/CHECKs wie live (Sequenzen werden
+-- geteilt), nur die Unique-Indexe (für ON CONFLICT). Vorhandene wird weiterverwendet, außer reset.
+CREATE OR REPLACE FUNCTION shadow_table_prepare(live TEXT, reset BOOLEAN DEFAULT FALSE)
+RETURNS TEXT LANGUAGE plpgsql AS $$
+DECLARE
+  shadow TEXT := live || '_shadow';
+  idx RECORD;
+BEGIN
+  IF to_regclass(shadow) IS NOT NULL THEN
+    IF NOT reset THEN
+      RETURN shadow;
+    END IF;
+    EXECUTE format('DROP TABLE %I', shadow);
+  END IF;
+
+  EXECUTE format('CREATE UNLOGGED TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)',
+                 shadow, live);
+  FOR idx IN
+    SELECT c.relname, pg_get_indexdef(i.indexrelid) AS def
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = live::REGCLASS AND i.indisunique AND NOT i.indisprimary
+  LOOP
+    EXECUTE regexp_replace(idx.def, '^CREATE UNIQUE INDEX \S+ ON \S+ ',
+                           'CREATE UNIQUE INDEX ' || quote_ident(left(idx.relname, 56) || '_shadow')
+                           || ' ON ' || quote_ident(shadow) || ' ');
+  END LOOP;
+  RETURN shadow;
+END $$;
+
+-- Abschluss: SET LOGGED, restliche Indexe (inkl. PRIMARY KEY) und Fremdschlüssel der Live-Tabelle,
+-- ANALYZE; liefert die Zeilen der Schattentabelle
+CREATE OR REPLACE FUNCTION shadow_table_finalize(live TEXT)
+RETURNS BIGINT LANGUAGE plpgsql AS $$
+DECLARE
+  shadow TEXT := live || '_shadow';
+  fk RECORD;
+  loaded BIGINT;
+BEGIN
+  IF to_regclass(shadow) IS NULL THEN
+    RAISE EXCEPTION 'Keine Schattentabelle % für %', shadow, live;
+  END IF;
+  EXECUTE format('ALTER TABLE %I SET LOGGED', shadow);
+  PERFORM xntop_copy_indexes(live::REGCLASS, shadow::REGCLASS, '_shadow');
+  FOR fk IN
+    SELECT c.conname, pg_get_constraintdef(c.oid) AS def
+    FROM pg_constraint c
+    WHERE c.conrelid = live::REGCLASS AND c.contype = 'f'
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint s
+                      WHERE s.conrelid = shadow::REGCLASS AND s.conname = left(c.conname, 56) || '_shadow')
+  LOOP
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', shadow, left(fk.conname, 56) || '_shadow', fk.def);
+  END LOOP;
+  EXECUTE format('ANALYZE %I', shadow);
+  EXECUTE format('SELECT count(*) FROM %I', shadow) INTO loaded;
+  RETURN loaded;
+END $$;
+
+-- Tausch in der Transaktion des Aufrufers: Sequenzen an die Schattentabelle hängen, live
+-- löschen, Schattentabelle samt Index-/Constraint-Namen umbenennen. Abhängige Views lassen
+-- DROP scheitern – dann bleibt alles beim Alten.
+CREATE OR REPLACE FUNCTION shadow_table_swap(live TEXT)
+RETURNS VOID LANGUAGE plpgsql AS $$
+DECLARE
+  shadow TEXT := live || '_shadow';
+  dep RECORD;
+  obj RECORD;
+BEGIN
+  IF to_regclass(shadow) IS NULL THEN
+    RAISE EXCEPTION 'Keine Schattentabelle % für %', shadow, live;
+  END IF;
+  IF (SELECT relpersistence FROM pg_class WHERE oid = shadow::REGCLASS) <> 'p' THEN
+    RAISE EXCEPTION 'Schattentabelle % ist nicht abgeschlossen (shadow_table_finalize)', shadow;
+  END IF;
+  EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', live);
+
+  FOR dep IN
+    SELECT s.oid::REGCLASS AS seq, a.attname
+    FROM pg_depend d
+    JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+    JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+    WHERE d.refobjid = live::REGCLASS AND d.deptype IN ('a', 'i')
+  LOOP
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', dep.seq, shadow, dep.attname);
+  END LOOP;
+
+  EXECUTE format('DROP TABLE %I', live);
+  EXECUTE format('ALTER TABLE %I RENAME TO %I', shadow, live);
+
+  FOR obj IN
+    SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = live::REGCLASS AND c.relname LIKE '%\_shadow'
+  LOOP
+    EXECUTE format('ALTER INDEX %I RENAME TO %I', obj.relname, left(obj.relname, length(obj.relname) - 7));
+  END LOOP;
+  FOR obj IN
+    SELECT conname AS relname FROM pg_constraint
+    WHERE conrelid = live::REGCLASS AND contype = 'f' AND conname LIKE '%\_shadow'
+  LOOP
+    EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', live, obj.relname,
+                   left(obj.relname, length(obj.relname) - 7));
+  END LOOP;
+END $$;
+
+COMMIT;
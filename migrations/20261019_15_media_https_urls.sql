@@ -0,0 +1,36 @@
+-- XNTOP: Medien-URLs einmalig auf https normalisieren
+-- Datum: 2026-10-19
+-- Der Importer speichert Bild-URLs bereits normalisiert (html_processing.normalize_image_url,
+-- auch im Abschnitts-HTML); die API reicht URLs deshalb unverändert durch. Ältere Zeilen
+-- mit protokoll-relativer oder http-URL werden hier nachgezogen. Gibt es die normalisierte
+-- URL für dieselbe Länder-Sprache bereits, fällt die ältere Schreibweise weg
+-- (Schlüssel von ux_media_unique).
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION xntop_https_url(url TEXT)
+RETURNS TEXT LANGUAGE sql IMMUTABLE AS $$
+  SELECT CASE
+    WHEN btrim(url) LIKE '//%' THEN 'https:' || btrim(url)
+    WHEN btrim(url) LIKE 'http://%' THEN 'https://' || substr(btrim(url), 8)
+    ELSE url
+  END
+$$;
+
+DELETE FROM media_assets m
+USING (
+  SELECT id, row_number() OVER (
+           PARTITION BY country_id, language_code, xntop_https_url(url)
+           ORDER BY (url = xntop_https_url(url)) DESC, id
+         ) AS rn
+  FROM media_assets
+  WHERE url IS NOT NULL
+) d
+WHERE m.id = d.id AND d.rn > 1;
+
+UPDATE media_assets SET url = xntop_https_url(url)
+WHERE url IS DISTINCT FROM xntop_https_url(url);
+
+DROP FUNCTION xntop_https_url(TEXT);
+
+COMMIT;
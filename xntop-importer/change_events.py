@@ -0,0 +1,211 @@
+"""
+Änderungs-Events per LISTEN/NOTIFY (Importer → API, Suchindex, statische Exporte)
+- Der Importer sendet je geänderter Länder-Sprache ein pg_notify in der Schreib-
+  transaktion; PostgreSQL stellt es erst nach dem Commit zu (nie für zurückgerollte Daten)
+- Payload (JSON, weit unter der 8000-Byte-Grenze):
+  {"country_id": 1, "lang": "de", "keys": ["overview", "page"], "version": "<md5>", "revision": 7}
+  keys: geänderte Abschnitte (content_types.key) und "page", wenn sich die Seiten-Version
+  (page_versions) geändert hat
+- ChangeListener: kleine Client-Bibliothek; NOTIFY wird nur an verbundene Clients
+  zugestellt, daher gleicht sie nach jedem (Re-)Connect über sync_state/page_versions ab
+  und meldet verpasste Änderungen (andere Seiten-Version) als Events mit keys=None
+  ("alles neu laden")
+"""
+
+import json
+import time
+import select
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = "xntop_changes"
+
+# version/revision werden in derselben Transaktion gelesen → Stand des Commits
+NOTIFY_SQL = """
+SELECT pg_notify(%s, json_build_object(
+  'country_id', e.country_id, 'lang', e.lang, 'keys', e.keys,
+  'version', pv.version, 'revision', s.revision
+)::TEXT)
+FROM jsonb_to_recordset(%s::JSONB) AS e (country_id INTEGER, lang TEXT, keys JSONB)
+LEFT JOIN page_versions pv ON pv.country_id = e.country_id AND pv.language_code = e.lang
+LEFT JOIN sync_state s ON s.country_id = e.country_id AND s.language_code = e.lang
+"""
+
+RECONCILE_SQL = """
+SELECT s.country_id, s.language_code, s.revision, pv.version,
+       GREATEST(s.last_attempt_at, pv.changed_at) AS touched_at
+FROM sync_state s
+LEFT JOIN page_versions pv ON pv.country_id = s.country_id AND pv.language_code = s.language_code
+WHERE s.last_attempt_at >= %(since)s OR pv.changed_at >= %(since)s
+ORDER BY touched_at
+"""
+
+# Zeitstempel in sync_state sind Transaktionsbeginn (NOW()); lange Transaktionen
+# committen später, daher beim Abgleich großzügig zurückgreifen
+RECONCILE_OVERLAP = timedelta(minutes=10)
+
+
+@dataclass
+class ChangeEvent:
+    country_id: int
+    language_code: str
+    keys: Optional[List[str]]  # None: unbekannt (Abgleich) → alles der Länder-Sprache neu laden
+    version: Optional[str] = None
+    revision: Optional[int] = None
+    reconciled: bool = False
+
+
+def event_payloads(changes: Dict[Tuple[int, str], List[str]]) -> List[Dict[str, object]]:
+    """{(country_id, lang): [keys]} → Zeilen für NOTIFY_SQL (ohne leere Änderungen)"""
+    return [
+        {"country_id": cid, "lang": lang, "keys": sorted(set(keys))}
+        for (cid, lang), keys in sorted(changes.items()) if keys
+    ]
+
+
+def notify_changes(cur, changes: Dict[Tuple[int, str], List[str]], channel: str = DEFAULT_CHANNEL) -> int:
+    """Sendet je geänderter Länder-Sprache ein Event (im Transaktionskontext des Aufrufers)"""
+    payloads = event_payloads(changes)
+    if not payloads:
+        return 0
+    cur.execute(NOTIFY_SQL, (channel, json.dumps(payloads)))
+    return len(payloads)
+
+
+def parse_payload(payload: str) -> Optional[ChangeEvent]:
+    try:
+        data = json.loads(payload)
+        return ChangeEvent(int(data["country_id"]), data["lang"], data.get("keys"),
+                           data.get("version"), data.get("revision"))
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Ungültiges Änderungs-Event: {payload[:200]}")
+        return None
+
+
+class ChangeListener:
+    """
+    Konsumiert Änderungs-Events und ruft handler(event) für jede Länder-Sprache auf.
+    since: Zeitpunkt des letzten verarbeiteten Stands (z. B. persistiert vom Aufrufer);
+    ohne since wird beim ersten Connect nur der aktuelle Stand als Basis übernommen.
+    Doppelte Zustellung (Event + Abgleich) wird über revision/version unterdrückt.
+    """
+
+    def __init__(self, dsn: Union[str, Dict[str, object]], handler: Callable[[ChangeEvent], None],
+                 channel: str = DEFAULT_CHANNEL, since: Optional[datetime] = None,
+                 poll_timeout: float = 5.0, reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0):
+        self.dsn = dsn
+        self.handler = handler
+        self.channel = channel
+        self.since = since
+        self.poll_timeout = poll_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.conn = None
+        self._running = False
+        # (country_id, lang) → (revision, version) des zuletzt gemeldeten Stands
+        self._seen: Dict[Tuple[int, str], Tuple[Optional[int], Optional[str]]] = {}
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn) if isinstance(self.dsn, str) else psycopg2.connect(**self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            # erst LISTEN, dann abgleichen → keine Lücke zwischen Abgleich und Events
+            cur.execute(f"LISTEN {psycopg2.extensions.quote_ident(self.channel, conn)}")
+        self.conn = conn
+
+    def _close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
+
+    def _is_new(self, event: ChangeEvent) -> bool:
+        """Events: neu, wenn (revision, version) abweicht; Abgleich: nur bei anderer version"""
+        key = (event.country_id, event.language_code)
+        seen = self._seen.get(key)
+        self._seen[key] = (event.revision, event.version)
+        if seen is None:
+            return True
+        if event.reconciled:
+            return event.version != seen[1]
+        return (event.revision, event.version) != seen
+
+    def _dispatch(self, event: ChangeEvent):
+        if not self._is_new(event):
+            return
+        try:
+            self.handler(event)
+        except Exception as e:
+            logger.error(f"Handler-Fehler für {event.country_id}/{event.language_code}: {e}")
+
+    def reconcile(self) -> int:
+        """Meldet Länder-Sprachen, die sich seit since geändert haben (verpasste Events)"""
+        baseline = self.since is None
+        since = datetime.min if baseline else self.since - RECONCILE_OVERLAP
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT LOCALTIMESTAMP")
+            now = cur.fetchone()[0]
+            cur.execute(RECONCILE_SQL, {"since": since})
+            rows = cur.fetchall()
+        missed = 0
+        for country_id, lang, revision, version, touched_at in rows:
+            event = ChangeEvent(country_id, lang, None, version, revision, reconciled=True)
+            if baseline:
+                self._seen[(country_id, lang)] = (revision, version)
+            elif self._is_new(event):
+                missed += 1
+                try:
+                    self.handler(event)
+                except Exception as e:
+                    logger.error(f"Handler-Fehler für {country_id}/{lang}: {e}")
+            self.since = max(self.since or touched_at, touched_at)
+        if self.since is None:
+            self.since = now
+        if missed:
+            logger.info(f"Abgleich über sync_state: {missed} verpasste Änderungen")
+        return missed
+
+    def poll(self) -> int:
+        """Wartet bis poll_timeout auf Events und verarbeitet sie; liefert die Anzahl"""
+        if select.select([self.conn], [], [], self.poll_timeout) == ([], [], []):
+            return 0
+        self.conn.poll()
+        handled = 0
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            event = parse_payload(notify.payload)
+            if event is not None:
+                self._dispatch(event)
+                handled += 1
+        return handled
+
+    def run(self):
+        """Blockierende Schleife mit Reconnect (exponentielles Backoff) und Abgleich"""
+        self._running = True
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                if self.conn is None:
+                    self._connect()
+                    self.reconcile()
+                    delay = self.reconnect_delay
+                self.poll()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError, OSError) as e:
+                logger.warning(f"Verbindung für Änderungs-Events verloren: {e} – neuer Versuch in {delay:.0f}s")
+                self._close()
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        self._close()
+
+    def stop(self):
+        """Beendet run() nach dem laufenden poll()"""
+        self._running = False
@@ -0,0 +1,136 @@
+"""
+Vorkomprimierte Varianten für Abschnitts-HTML und Seiten-Dokumente (API streamt sie durch)
+- content_blobs.content_gzip/content_br: einmal je Blob; Blobs sind content-adressiert,
+  unveränderte Abschnitte kosten also keine Kompression
+- country_pages.document_gzip/document_br: nach dem Neuaufbau geänderter Seiten, über
+  document::TEXT (BUILD_PAGES_SQL setzt sie bei Änderung auf NULL)
+- Nur fehlende Varianten werden erzeugt (ältere Blobs/Seiten werden so nachgezogen)
+- brotli ist optional (pip install brotli); ohne Modul wird nur gzip erzeugt
+"""
+
+import gzip
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Reihenfolge = Präferenz der API bei gleichwertigem Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+GZIP_LEVEL = 9
+# Höchste Stufe: einmal beim Import statt bei jedem Request
+BROTLI_QUALITY = 11
+
+MISSING_BLOBS_SQL = """
+SELECT hash FROM content_blobs
+WHERE hash = ANY(%s) AND ({missing})
+"""
+
+UPDATE_BLOBS_SQL = """
+UPDATE content_blobs b SET
+  content_gzip = COALESCE(v.gzip, b.content_gzip),
+  content_br   = COALESCE(v.br, b.content_br)
+FROM (VALUES %s) AS v (hash, gzip, br)
+WHERE b.hash = v.hash
+"""
+
+MISSING_PAGES_SQL = """
+SELECT p.slug, p.language_code, p.document::TEXT
+FROM country_pages p
+WHERE (p.country_id, p.language_code) IN (SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[]))
+  AND ({missing})
+"""
+
+UPDATE_PAGES_SQL = """
+UPDATE country_pages p SET
+  document_gzip = COALESCE(v.gzip, p.document_gzip),
+  document_br   = COALESCE(v.br, p.document_br)
+FROM (VALUES %s) AS v (slug, language_code, gzip, br)
+WHERE p.slug = v.slug AND p.language_code = v.language_code
+"""
+
+
+def parse_encodings(value: Optional[str]) -> List[str]:
+    """'gzip, br' → ['br', 'gzip'] (bekannte, verfügbare Encodings in ENCODINGS-Reihenfolge)"""
+    requested = {e.strip().lower() for e in (value or "").split(",") if e.strip()}
+    unknown = requested - set(ENCODINGS)
+    if unknown:
+        logger.warning(f"Unbekannte Encodings ignoriert: {', '.join(sorted(unknown))}")
+    if "br" in requested and brotli is None:
+        logger.warning("brotli nicht installiert – nur gzip-Varianten (pip install brotli)")
+        requested.discard("br")
+    return [e for e in ENCODINGS if e in requested]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0: gleiche Eingabe → gleiche Bytes
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unbekanntes Encoding: {encoding}")
+
+
+def variants(text: str, encodings: Iterable[str]) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """(gzip, br) für text; nicht angeforderte Encodings bleiben None"""
+    data = (text or "").encode("utf-8")
+    wanted = set(encodings)
+    return (compress(data, "gzip") if "gzip" in wanted else None,
+            compress(data, "br") if "br" in wanted else None)
+
+
+def _missing(prefix: str, encodings: Iterable[str]) -> str:
+    """WHERE-Bedingung "mindestens eine angeforderte Variante fehlt" (nur feste Spaltennamen)"""
+    return " OR ".join(f"{prefix}_{e} IS NULL" for e in ENCODINGS if e in set(encodings))
+
+
+def _binary(value: Optional[bytes]):
+    return psycopg2.Binary(value) if value is not None else None
+
+
+def compress_blobs(cur, contents: Dict[str, str], encodings: Iterable[str]) -> int:
+    """
+    contents: {blob_hash: html}. Erzeugt die fehlenden Varianten der Blobs
+    (im Transaktionskontext des Aufrufers); liefert die Zahl komprimierter Blobs.
+    """
+    encodings = list(encodings)
+    if not contents or not encodings:
+        return 0
+    cur.execute(MISSING_BLOBS_SQL.format(missing=_missing("content", encodings)), (list(contents),))
+    rows = []
+    for (blob_hash,) in cur.fetchall():
+        gz, br = variants(contents[blob_hash], encodings)
+        rows.append((blob_hash, _binary(gz), _binary(br)))
+    if rows:
+        psycopg2.extras.execute_values(cur, UPDATE_BLOBS_SQL, rows,
+                                       template="(%s, %s::BYTEA, %s::BYTEA)", page_size=len(rows))
+    return len(rows)
+
+
+def compress_pages(cur, keys: Iterable[Tuple[int, str]], encodings: Iterable[str]) -> int:
+    """
+    Erzeugt die fehlenden Varianten der Seiten-Dokumente je (country_id, language_code)
+    (alle Slugs); liefert die Zahl komprimierter Seiten.
+    """
+    encodings = list(encodings)
+    keys = sorted(set(keys))
+    if not keys or not encodings:
+        return 0
+    cur.execute(MISSING_PAGES_SQL.format(missing=_missing("p.document", encodings)),
+                ([cid for cid, _ in keys], [lang for _, lang in keys]))
+    rows = []
+    for slug, language_code, document in cur.fetchall():
+        gz, br = variants(document, encodings)
+        rows.append((slug, language_code, _binary(gz), _binary(br)))
+    if rows:
+        psycopg2.extras.execute_values(cur, UPDATE_PAGES_SQL, rows,
+                                       template="(%s, %s, %s::BYTEA, %s::BYTEA)", page_size=len(rows))
+    return len(rows)
@@ -0,0 +1,304 @@
+"""
+Speicherformat für Abschnitts-HTML (gemeinsam für main.py und import_full_article.py)
+- content_hash: md5 über UTF-8, identisch zu md5(content) in PostgreSQL
+- Cold Storage: selten gelesene Abschnitte (Einzelnachweise, Anmerkungen, Literatur,
+  Weblinks) liegen zlib-komprimiert in localized_content_cold; die Hot-Zeile behält
+  nur Hash, Größe und storage_tier
+"""
+
+import io
+import re
+import hashlib
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import psycopg2
+import psycopg2.extras
+
+import compression_storage
+
+DEFAULT_COLD_SECTIONS = "references,notes,literature,external_links"
+
+UPSERT_COLD_SQL = """
+INSERT INTO localized_content_cold (
+  localized_content_id, content_compressed, compression, raw_bytes, compressed_bytes, updated_at
+) VALUES (%s, %s, 'zlib', %s, %s, NOW())
+ON CONFLICT (localized_content_id) DO UPDATE SET
+  content_compressed = EXCLUDED.content_compressed,
+  compression        = EXCLUDED.compression,
+  raw_bytes          = EXCLUDED.raw_bytes,
+  compressed_bytes   = EXCLUDED.compressed_bytes,
+  updated_at         = NOW()
+"""
+
+DELETE_COLD_SQL = "DELETE FROM localized_content_cold WHERE localized_content_id = %s"
+
+# Hot-HTML content-adressiert (sha256): identische Abschnitte liegen nur einmal vor,
+# localized_contents verweist über blob_hash darauf.
+# Vorhandene Blobs nur "auffrischen", wenn sie verwaist sind (schützt vor gc_content_blobs)
+UPSERT_BLOB_SQL = """
+INSERT INTO content_blobs AS b (hash, content, raw_bytes)
+VALUES (%s, %s, %s)
+ON CONFLICT (hash) DO UPDATE SET last_referenced_at = NOW()
+WHERE b.refcount <= 0
+"""
+
+GC_BLOBS_SQL = "SELECT gc_content_blobs(%s * INTERVAL '1 hour')"
+
+DELETE_SECTION_TABLES_SQL = """
+DELETE FROM section_tables
+WHERE country_id = %s AND language_code = %s AND content_type_id = %s
+"""
+
+INSERT_SECTION_TABLE_SQL = """
+INSERT INTO section_tables (
+  country_id, language_code, content_type_id, table_index,
+  caption, columns, rows, row_count, table_hash, updated_at
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+"""
+
+
+def parse_section_keys(value: Optional[str]) -> Set[str]:
+    """'references,notes' → {'references', 'notes'}"""
+    return {k.strip() for k in (value or "").split(",") if k.strip()}
+
+
+def content_hash(content: Optional[str]) -> str:
+    return hashlib.md5((content or "").encode("utf-8")).hexdigest()
+
+
+def content_bytes(content: Optional[str]) -> int:
+    return len((content or "").encode("utf-8"))
+
+
+def blob_hash(content: Optional[str]) -> str:
+    """Schlüssel in content_blobs, identisch zu encode(sha256(convert_to(content, 'UTF8')), 'hex')"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def blob_params(content: str) -> tuple:
+    """Parameter für UPSERT_BLOB_SQL"""
+    return (blob_hash(content), content, content_bytes(content))
+
+
+def compress_content(content: str) -> bytes:
+    # zlib-Format → PHP liest es direkt mit gzuncompress()
+    return zlib.compress((content or "").encode("utf-8"), 9)
+
+
+def decompress_content(data: bytes) -> str:
+    return zlib.decompress(bytes(data)).decode("utf-8")
+
+
+def cold_params(localized_content_id: int, content: str) -> tuple:
+    """Parameter für UPSERT_COLD_SQL"""
+    blob = compress_content(content)
+    return (localized_content_id, psycopg2.Binary(blob), content_bytes(content), len(blob))
+
+
+def replace_section_tables(cur, country_id: int, language_code: str, content_type_id: int,
+                           tables: List[Dict[str, Any]]):
+    """
+    Ersetzt alle als Spalten-JSON ausgelagerten großen Tabellen eines Abschnitts
+    (section_tables, im Transaktionskontext des Aufrufers)
+    """
+    cur.execute(DELETE_SECTION_TABLES_SQL, (country_id, language_code, content_type_id))
+    if not tables:
+        return
+    psycopg2.extras.execute_batch(cur, INSERT_SECTION_TABLE_SQL, [
+        (country_id, language_code, content_type_id, t["table_index"], t.get("caption"),
+         psycopg2.extras.Json(t["columns"]), psycopg2.extras.Json(t["rows"]),
+         t["row_count"], t["table_hash"])
+        for t in tables
+    ])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Bulk-UPSERT über Staging-Tabelle (COPY → ein INSERT … ON CONFLICT)
+# ──────────────────────────────────────────────────────────────────────────────
+STAGE_COLUMNS = (
+    "country_id", "language_code", "content_type_id", "content", "source_url",
+    "content_hash", "storage_tier", "content_bytes", "plain_text", "excerpt",
+    "word_count", "reading_time_minutes", "content_compressed", "blob_hash",
+)
+
+# Temp-Tabelle lebt pro Pool-Verbindung; ON COMMIT DELETE ROWS leert sie nach jeder Transaktion
+CREATE_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS localized_content_stage (
+  country_id           INTEGER NOT NULL,
+  language_code        TEXT    NOT NULL,
+  content_type_id      INTEGER NOT NULL,
+  content              TEXT,
+  source_url           TEXT,
+  content_hash         TEXT,
+  storage_tier         TEXT,
+  content_bytes        INTEGER,
+  plain_text           TEXT,
+  excerpt              TEXT,
+  word_count           INTEGER,
+  reading_time_minutes SMALLINT,
+  content_compressed   BYTEA,
+  blob_hash            TEXT
+) ON COMMIT DELETE ROWS;
+TRUNCATE localized_content_stage;
+"""
+
+COPY_STAGE_SQL = f"COPY localized_content_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN"
+
+# Eigenes Statement vor APPLY_STAGE_SQL, damit die FK-Prüfung von blob_hash die Blobs sieht
+INSERT_STAGE_BLOBS_SQL = """
+INSERT INTO content_blobs AS b (hash, content, raw_bytes)
+SELECT DISTINCT ON (blob_hash) blob_hash, content, content_bytes
+FROM localized_content_stage
+WHERE blob_hash IS NOT NULL
+ORDER BY blob_hash
+ON CONFLICT (hash) DO UPDATE SET last_referenced_at = NOW()
+WHERE b.refcount <= 0
+"""
+
+# Ein Statement: UPSERT (nur bei geändertem Hash/Tier), Cold-Kopien pflegen,
+# Status je Staging-Zeile zurückgeben (insert / update_changed / update_unchanged).
+# Das HTML steht im Blob, die Zeile trägt nur blob_hash (content = NULL).
+# search_vector (Konfiguration je Sprache über xntop_ts_config) entsteht zusammen mit
+# plain_text, also nur bei geändertem Hash.
+# {target}: localized_contents oder die Ladetabelle einer Sprache (partition_storage);
+# ON CONFLICT per Spaltenliste, weil die Constraint-Namen der Ladetabelle generiert sind
+APPLY_STAGE_TEMPLATE = """
+WITH up AS (
+  INSERT INTO {target} AS lc (
+    country_id, subregion_id, language_code, content_type_id,
+    content, blob_hash, source_url, updated_at, content_hash, storage_tier, content_bytes,
+    plain_text, excerpt, word_count, reading_time_minutes, search_vector
+  )
+  SELECT country_id, NULL, language_code, content_type_id,
+         NULL, blob_hash, source_url, NOW(), content_hash, storage_tier, content_bytes,
+         plain_text, excerpt, word_count, reading_time_minutes,
+         to_tsvector(xntop_ts_config(language_code), COALESCE(plain_text, ''))
+  FROM localized_content_stage
+  ON CONFLICT (country_id, subregion_key, language_code, content_type_id) DO UPDATE SET
+    content      = EXCLUDED.content,
+    blob_hash    = EXCLUDED.blob_hash,
+    source_url   = EXCLUDED.source_url,
+    content_hash = EXCLUDED.content_hash,
+    storage_tier = EXCLUDED.storage_tier,
+    content_bytes = EXCLUDED.content_bytes,
+    plain_text   = EXCLUDED.plain_text,
+    excerpt      = EXCLUDED.excerpt,
+    word_count   = EXCLUDED.word_count,
+    reading_time_minutes = EXCLUDED.reading_time_minutes,
+    search_vector = EXCLUDED.search_vector,
+    updated_at   = NOW()
+  WHERE lc.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+     OR lc.storage_tier IS DISTINCT FROM EXCLUDED.storage_tier
+     OR lc.blob_hash IS DISTINCT FROM EXCLUDED.blob_hash
+     OR (lc.word_count IS NULL AND EXCLUDED.word_count IS NOT NULL)
+  RETURNING lc.id, lc.country_id, lc.language_code, lc.content_type_id, lc.storage_tier,
+            (lc.xmax = 0) AS inserted
+),
+cold AS (
+  INSERT INTO localized_content_cold (
+    localized_content_id, content_compressed, compression, raw_bytes, compressed_bytes, updated_at
+  )
+  SELECT up.id, s.content_compressed, 'zlib', s.content_bytes, octet_length(s.content_compressed), NOW()
+  FROM up
+  JOIN localized_content_stage s
+    ON s.country_id = up.country_id AND s.language_code = up.language_code
+   AND s.content_type_id = up.content_type_id
+  WHERE up.storage_tier = 'cold'
+  ON CONFLICT (localized_content_id) DO UPDATE SET
+    content_compressed = EXCLUDED.content_compressed,
+    compression        = EXCLUDED.compression,
+    raw_bytes          = EXCLUDED.raw_bytes,
+    compressed_bytes   = EXCLUDED.compressed_bytes,
+    updated_at         = NOW()
+),
+hot AS (
+  DELETE FROM localized_content_cold c
+  USING up
+  WHERE c.localized_content_id = up.id AND up.storage_tier = 'hot'
+)
+SELECT s.country_id, s.language_code, s.content_type_id,
+       COALESCE(up.id, cur.id) AS id,
+       CASE WHEN up.id IS NULL THEN 'update_unchanged'
+            WHEN up.inserted   THEN 'insert'
+            ELSE 'update_changed' END AS status
+FROM localized_content_stage s
+LEFT JOIN up
+  ON up.country_id = s.country_id AND up.language_code = s.language_code
+ AND up.content_type_id = s.content_type_id
+LEFT JOIN {target} cur
+  ON cur.country_id = s.country_id AND cur.language_code = s.language_code
+ AND cur.content_type_id = s.content_type_id AND cur.subregion_id IS NULL
+"""
+
+APPLY_STAGE_SQL = APPLY_STAGE_TEMPLATE.format(target="localized_contents")
+
+_TARGET_RE = re.compile(r"^localized_contents(_load_[a-z0-9_]+)?$")
+
+
+def _copy_value(value: Any) -> str:
+    """Ein Feld im COPY-Textformat (Tab-getrennt, \\N = NULL)"""
+    if value is None:
+        return r"\N"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def stage_row(country_id: int, language_code: str, content_type_id: int, content: str,
+              source_url: Optional[str] = None, text_stats: Optional[Dict[str, Any]] = None,
+              cold: bool = False) -> tuple:
+    """Eine Abschnittszeile in STAGE_COLUMNS-Reihenfolge"""
+    stats = text_stats or {}
+    return (
+        country_id, (language_code or "en").strip().lower(), content_type_id,
+        None if cold else content, source_url,
+        content_hash(content), "cold" if cold else "hot", content_bytes(content),
+        stats.get("plain_text"), stats.get("excerpt"),
+        stats.get("word_count"), stats.get("reading_time_minutes"),
+        compress_content(content) if cold else None,
+        None if cold else blob_hash(content),
+    )
+
+
+def copy_payload(rows: List[tuple]) -> io.StringIO:
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+def apply_stage_sql(target: Optional[str] = None) -> str:
+    """APPLY_STAGE_SQL für localized_contents oder eine Ladetabelle (nur bekannte Namen)"""
+    if not target or target == "localized_contents":
+        return APPLY_STAGE_SQL
+    if not _TARGET_RE.match(target):
+        raise ValueError(f"Ungültige Zieltabelle: {target}")
+    return APPLY_STAGE_TEMPLATE.format(target=target)
+
+
+def bulk_upsert_sections(cur, rows: List[tuple], target: Optional[str] = None,
+                         encodings: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Schreibt viele Abschnitte (stage_row-Tupel, beliebig viele Länder/Sprachen) in
+    einem COPY, einem Blob-INSERT und einem UPSERT. Liefert [{country_id, language_code, content_type_id, id, status}].
+    Doppelte Schlüssel im Batch: die letzte Zeile gewinnt (ON CONFLICT darf eine Zeile
+    nur einmal pro Statement treffen). target: Ladetabelle statt localized_contents.
+    encodings: vorkomprimierte Varianten, die für neue Blobs angelegt werden.
+    """
+    unique = {(r[0], r[1], r[2]): r for r in rows}
+    if not unique:
+        return []
+    sql = apply_stage_sql(target)
+    cur.execute(CREATE_STAGE_SQL)
+    cur.copy_expert(COPY_STAGE_SQL, copy_payload(list(unique.values())))
+    cur.execute(INSERT_STAGE_BLOBS_SQL)
+    compression_storage.compress_blobs(cur, {r[13]: r[3] for r in unique.values() if r[13]}, encodings)
+    cur.execute(sql)
+    return [
+        {"country_id": c, "language_code": l, "content_type_id": t, "id": i, "status": st}
+        for c, l, t, i, st in cur.fetchall()
+    ]
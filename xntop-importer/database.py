@@ -2,15 +2,36 @@
 Datenbankverbindung und -operationen für XNTOP Importer
 """
 
+import time
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
 from typing import Optional, Dict, Any, List
 import logging
 
+import content_storage
+import media_storage
+import page_storage
+import slug_storage
+import fact_storage
+import sync_storage
+import partition_storage
+import shadow_storage
+import change_events
+import compression_storage
+import revision_storage
+
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 min_connections: int = 1, max_connections: int = 5, pool_timeout: float = 30.0,
+                 sync_log_batch_size: int = 1, change_channel: str = change_events.DEFAULT_CHANNEL,
+                 precompress_encodings: Optional[List[str]] = None, section_history: bool = True):
         self.connection_params = {
             'host': host,
             'port': port,
@@ -18,28 +39,199 @@ class DatabaseManager:
             'user': user,
             'password': password
         }
-        self.connection = None
+        self.min_connections = max(0, min_connections)
+        self.max_connections = max(1, max_connections, self.min_connections)
+        self.pool_timeout = pool_timeout
+        # Begrenzter, thread-sicherer Pool (max_connections); Wartezeiten in get_pool_metrics()
+        self.pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+
+        # ThreadedConnectionPool wirft bei Erschöpfung sofort PoolError –
+        # das Semaphor lässt Threads stattdessen (messbar) auf eine freie Verbindung warten
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._local = threading.local()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'checkouts': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+            'in_use': 0,
+            'in_use_max': 0,
+        }
+
+        # sync_logs-Puffer (Group Commit); 1 = sofort schreiben
+        self.sync_log_batch_size = max(1, sync_log_batch_size)
+        self._sync_log_lock = threading.Lock()
+        self._sync_log_buffer: List[tuple] = []
+
+        # Sprachen im Bulk-Load: language_code → Ladetabelle (partition_storage)
+        self.load_tables: Dict[str, str] = {}
+        # Vollständiger Neuaufbau: Medien in die Schattentabelle (shadow_storage); None = live
+        self.media_table: Optional[str] = None
+
+        # LISTEN/NOTIFY-Kanal für Änderungs-Events; leer = keine Events
+        self.change_channel = change_channel
+
+        # Vorkomprimierte Varianten (compression_storage.ENCODINGS); leer = keine
+        self.precompress_encodings = list(precompress_encodings or [])
+
+        # Versionshistorie der Abschnitte; run_id ordnet Versionen dem laufenden Import zu
+        self.section_history = section_history
+        self.run_id: Optional[int] = None
     
     def connect(self):
-        """Stellt Verbindung zur Datenbank her"""
+        """Erstellt den Connection-Pool"""
         try:
-            self.connection = psycopg2.connect(**self.connection_params)
-            self.connection.autocommit = False
-            logger.info("Datenbankverbindung erfolgreich hergestellt")
+            self.pool = psycopg2.pool.ThreadedConnectionPool(
+                self.min_connections, self.max_connections, **self.connection_params
+            )
+            logger.info(f"Datenbank-Pool erstellt ({self.min_connections}–{self.max_connections} Verbindungen)")
         except psycopg2.Error as e:
             logger.error(f"Fehler bei Datenbankverbindung: {e}")
             raise
     
     def disconnect(self):
-        """Schließt Datenbankverbindung"""
-        if self.connection:
-            self.connection.close()
-            logger.info("Datenbankverbindung geschlossen")
+        """Schließt alle Verbindungen des Pools"""
+        if self.pool:
+            try:
+                self.flush_sync_logs()
+            except psycopg2.Error as e:
+                logger.error(f"sync_logs konnten nicht geschrieben werden: {e}")
+            self.pool.closeall()
+            self.pool = None
+            logger.info(f"Datenbankverbindungen geschlossen – Pool: {self.get_pool_metrics()}")
+
+    @property
+    def connection(self):
+        """Die im aktuellen Thread gebundene Verbindung (nur innerhalb von transaction())"""
+        return getattr(self._local, 'conn', None)
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Wartezeiten und Auslastung des Pools"""
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        m['wait_seconds_avg'] = m['wait_seconds_total'] / m['checkouts'] if m['checkouts'] else 0.0
+        m['max_connections'] = self.max_connections
+        return m
+
+    def _checkout(self):
+        if not self.pool:
+            raise psycopg2.InterfaceError("Datenbank-Pool nicht verbunden (connect() fehlt)")
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            with self._metrics_lock:
+                self._metrics['timeouts'] += 1
+            raise psycopg2.pool.PoolError(f"Keine freie DB-Verbindung nach {self.pool_timeout:.0f}s")
+        waited = time.monotonic() - started
+        try:
+            conn = self.pool.getconn()
+            conn.autocommit = False
+        except Exception:
+            self._slots.release()
+            raise
+        with self._metrics_lock:
+            m = self._metrics
+            m['checkouts'] += 1
+            m['wait_seconds_total'] += waited
+            m['wait_seconds_max'] = max(m['wait_seconds_max'], waited)
+            m['in_use'] += 1
+            m['in_use_max'] = max(m['in_use_max'], m['in_use'])
+        return conn
+
+    def _checkin(self, conn, broken: bool = False):
+        try:
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            self._slots.release()
+            with self._metrics_lock:
+                self._metrics['in_use'] -= 1
+
+    @contextmanager
+    def transaction(self, commit_every: int = 0):
+        """
+        Eigene Verbindung + Transaktion für die aktuelle Aufgabe.
+        Commit beim Verlassen, Rollback bei Exception. Verschachtelte Aufrufe
+        (und alle execute_*-Helfer darin) laufen in derselben Transaktion.
+        commit_every > 0: Zwischen-Commit nach jeweils N Schreiboperationen
+        (nie innerhalb eines Savepoints).
+        """
+        outer = self.connection
+        if outer is not None:
+            yield outer
+            return
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.commit_every = max(0, commit_every)
+        self._local.writes = 0
+        self._local.savepoints = 0
+        broken = False
+        try:
+            yield conn
+            if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+                # COMMIT auf eine abgebrochene Transaktion wäre ein stilles ROLLBACK
+                raise psycopg2.InternalError("Transaktion abgebrochen – Commit verweigert")
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self._checkin(conn, broken=broken)
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Savepoint in der laufenden Transaktion: ein Fehler im Block wird zurückgerollt,
+        ohne die umgebende Transaktion zu verwerfen. Ohne laufende Transaktion
+        verhält sich savepoint() wie transaction().
+        """
+        conn = self.connection
+        if conn is None:
+            with self.transaction() as conn:
+                yield conn
+            return
+        depth = self._local.savepoints + 1
+        name = f"xntop_sp_{depth}"
+        with conn.cursor() as cur:
+            cur.execute(f"SAVEPOINT {name}")
+        self._local.savepoints = depth
+        try:
+            yield conn
+            with conn.cursor() as cur:
+                cur.execute(f"RELEASE SAVEPOINT {name}")
+        except BaseException:
+            # auch wenn der Block einen DB-Fehler selbst geschluckt hat (RELEASE schlägt dann fehl)
+            with conn.cursor() as cur:
+                cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        finally:
+            self._local.savepoints = depth - 1
+
+    def _count_write(self):
+        """Zählt Schreiboperationen der gebundenen Transaktion (für commit_every)"""
+        conn = self.connection
+        every = getattr(self._local, 'commit_every', 0)
+        if conn is None or not every:
+            return
+        self._local.writes += 1
+        if self._local.writes >= every and self._local.savepoints == 0:
+            conn.commit()
+            self._local.writes = 0
+
+    @contextmanager
+    def cursor(self, cursor_factory=None):
+        """Cursor in der aktuellen (oder einer eigenen, kurzen) Transaktion"""
+        with self.transaction() as conn:
+            with conn.cursor(cursor_factory=cursor_factory) as cur:
+                yield cur
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Führt SELECT-Query aus und gibt Ergebnisse zurück"""
         try:
-            with self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            with self.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(query, params)
                 return cursor.fetchall()
         except psycopg2.Error as e:
@@ -49,34 +241,33 @@ class DatabaseManager:
     def execute_insert(self, query: str, params: tuple = None) -> int:
         """Führt INSERT-Query aus und gibt ID zurück"""
         try:
-            with self.connection.cursor() as cursor:
+            with self.cursor() as cursor:
                 cursor.execute(query, params)
-                self.connection.commit()
-                return cursor.fetchone()[0] if cursor.description else 0
+                result = cursor.fetchone()[0] if cursor.description else 0
+            self._count_write()
+            return result
         except psycopg2.Error as e:
-            self.connection.rollback()
             logger.error(f"Fehler bei INSERT: {e}")
             raise
     
     def execute_upsert(self, query: str, params: tuple = None) -> int:
         """Führt UPSERT-Query aus und gibt ID zurück"""
         try:
-            with self.connection.cursor() as cursor:
+            with self.cursor() as cursor:
                 cursor.execute(query, params)
-                self.connection.commit()
                 result = cursor.fetchone()
-                if result is not None and len(result) > 0:
-                    return result[0]
-                return 0  # No row returned (e.g., ON CONFLICT DO NOTHING)
+            self._count_write()
+            if result is not None and len(result) > 0:
+                return result[0]
+            return 0  # No row returned (e.g., ON CONFLICT DO NOTHING)
         except psycopg2.Error as e:
-            self.connection.rollback()
             logger.error(f"Fehler bei UPSERT: {e}")
             raise
 
     def execute_select_one(self, query: str, params: tuple) -> tuple:
         """Führt SELECT aus und gibt ein Ergebnis zurück"""
         try:
-            with self.connection.cursor() as cursor:
+            with self.cursor() as cursor:
                 cursor.execute(query, params)
                 return cursor.fetchone()
         except psycopg2.Error as e:
@@ -106,7 +297,7 @@ class DatabaseManager:
     
     def upsert_country(self, iso_code: str, name_en: str, continent: str, 
                       has_subregions: bool = False, slug_en: str = None, slug_de: str = None) -> int:
-        """Fügt Land hinzu oder aktualisiert es"""
+        """Fügt Land hinzu oder aktualisiert es (slug_de=None lässt den vorhandenen stehen)"""
         query = """
         INSERT INTO countries (iso_code, name_en, continent, has_subregions, slug_en, slug_de) 
         VALUES (%s, %s, %s, %s, %s, %s) 
@@ -115,61 +306,148 @@ class DatabaseManager:
             continent = EXCLUDED.continent,
             has_subregions = EXCLUDED.has_subregions,
             slug_en = EXCLUDED.slug_en,
-            slug_de = EXCLUDED.slug_de,
+            slug_de = COALESCE(EXCLUDED.slug_de, countries.slug_de),
             updated_at = CURRENT_TIMESTAMP
         RETURNING id
         """
         return self.execute_upsert(query, (iso_code, name_en, continent, has_subregions, slug_en, slug_de))
     
     def upsert_localized_content_with_status(self, country_id: int, language_code: str, 
-                                            content_type_id: int, content: str, source_url: str = None) -> tuple[int, str]:
-        """Advanced two-step UPSERT with detailed logging. Returns (id, status)."""
+                                            content_type_id: int, content: str, source_url: str = None,
+                                            text_stats: Optional[Dict[str, Any]] = None,
+                                            cold: bool = False, wiki_revision: Optional[int] = None) -> tuple[int, str]:
+        """Advanced two-step UPSERT with detailed logging. Returns (id, status).
+
+        text_stats (plain_text, excerpt, word_count, reading_time_minutes) wird
+        nur beim Insert bzw. bei geändertem content_hash geschrieben.
+        cold=True legt das HTML komprimiert in localized_content_cold ab; die
+        Hot-Zeile behält nur Hash, Größe und storage_tier. Hot-HTML liegt
+        content-adressiert in content_blobs (blob_hash), content bleibt NULL.
+        Blob, Insert/Update und Cold-Kopie laufen in einer Transaktion (bzw. einem
+        Savepoint, wenn der Aufrufer bereits eine Transaktion hält); eine geänderte
+        Version landet in derselben Transaktion in section_revisions.
+        """
+        section = self._history_section(country_id, language_code, content_type_id, content, wiki_revision)
+        with self.savepoint():
+            heads = self._section_heads([section])
+            result_id, status = self._upsert_localized_content(country_id, language_code, content_type_id,
+                                                               content, source_url, text_stats, cold)
+            if status != "update_unchanged":
+                self._record_revisions([section], heads)
+            return result_id, status
+
+    def _history_section(self, country_id: int, language_code: str, content_type_id: int,
+                         content: str, wiki_revision: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            'country_id': country_id, 'language_code': (language_code or "en").strip().lower(),
+            'content_type_id': content_type_id, 'content': content,
+            'content_hash': content_storage.content_hash(content), 'wiki_revision': wiki_revision,
+        }
+
+    def _section_heads(self, sections: List[Dict[str, Any]]) -> Dict[tuple, Any]:
+        """Stand vor dem UPSERT (Basis der Deltas); leer ohne Historie"""
+        if not self.section_history:
+            return {}
+        with self.cursor() as cursor:
+            return revision_storage.fetch_heads(cursor, sections)
+
+    def _record_revisions(self, sections: List[Dict[str, Any]], heads: Dict[tuple, Any]) -> int:
+        """Versionen der geänderten Abschnitte im laufenden Importlauf (Delta zu heads, siehe revision_storage)"""
+        if not self.section_history or not sections:
+            return 0
+        with self.cursor() as cursor:
+            return revision_storage.record_revisions(cursor, sections, heads, self.run_id)
+
+    def _upsert_localized_content(self, country_id: int, language_code: str, content_type_id: int,
+                                  content: str, source_url: Optional[str],
+                                  text_stats: Optional[Dict[str, Any]], cold: bool) -> tuple[int, str]:
         # Normalize inputs
         normalized_lang = (language_code or "en").strip().lower()
+        stats = text_stats or {}
+        blob_hash = None
+        if not cold:
+            # HTML zuerst in den Blob-Speicher, die Zeile verweist nur per Hash darauf
+            blob_hash = content_storage.blob_hash(content)
+            self.execute_insert(content_storage.UPSERT_BLOB_SQL, content_storage.blob_params(content))
+            if self.precompress_encodings:
+                with self.cursor() as cursor:
+                    compression_storage.compress_blobs(cursor, {blob_hash: content}, self.precompress_encodings)
+        row_params = (
+            blob_hash,
+            source_url,
+            content_storage.content_hash(content),
+            'cold' if cold else 'hot',
+            content_storage.content_bytes(content),
+            stats.get('plain_text'), stats.get('excerpt'),
+            stats.get('word_count'), stats.get('reading_time_minutes'),
+        )
         
         # Step 1: Try INSERT
         insert_query = """
         INSERT INTO localized_contents (
           country_id, subregion_id, language_code, content_type_id,
-          content, source_url, updated_at, content_hash
+          content, blob_hash, source_url, updated_at, content_hash, storage_tier, content_bytes,
+          plain_text, excerpt, word_count, reading_time_minutes, search_vector
         ) VALUES (
-          %s, NULL, %s, %s, %s, %s, NOW(), md5(COALESCE(%s, ''))
+          %s, NULL, %s, %s, NULL, %s, %s, NOW(), %s, %s, %s,
+          %s, %s, %s, %s, to_tsvector(xntop_ts_config(%s), COALESCE(%s::TEXT, ''))
         )
         ON CONFLICT ON CONSTRAINT uq_localized_content DO NOTHING
         RETURNING id
         """
         
-        insert_result = self.execute_upsert(insert_query, (country_id, normalized_lang, content_type_id, content, source_url, content))
+        insert_result = self.execute_upsert(insert_query, (country_id, normalized_lang, content_type_id) + row_params
+                                            + (normalized_lang, stats.get('plain_text')))
         if insert_result:
+            self._sync_cold_content(insert_result, content, cold)
             logger.info(f"UPSERT: Inserted new content for country_id={country_id}, lang={normalized_lang}, type={content_type_id}")
             return insert_result, "insert"
         
-        # Step 2: Try UPDATE only if content changed
+        # Step 2: Try UPDATE only if content (or storage tier) changed
         update_query = """
         UPDATE localized_contents AS lc SET
-          content      = EXCLUDED.content,
+          content      = NULL,
+          blob_hash    = EXCLUDED.blob_hash,
           source_url   = EXCLUDED.source_url,
           content_hash = EXCLUDED.content_hash,
+          storage_tier = EXCLUDED.storage_tier,
+          content_bytes = EXCLUDED.content_bytes,
+          plain_text   = EXCLUDED.plain_text,
+          excerpt      = EXCLUDED.excerpt,
+          word_count   = EXCLUDED.word_count,
+          reading_time_minutes = EXCLUDED.reading_time_minutes,
+          search_vector = to_tsvector(xntop_ts_config(EXCLUDED.language_code), COALESCE(EXCLUDED.plain_text, '')),
           updated_at   = NOW()
         FROM (
           SELECT %s AS country_id,
                  NULL::INTEGER AS subregion_id,
                  %s AS language_code,
                  %s AS content_type_id,
-                 %s AS content,
+                 %s::CHAR(64) AS blob_hash,
                  %s AS source_url,
-                 md5(COALESCE(%s, '')) AS content_hash
+                 %s AS content_hash,
+                 %s AS storage_tier,
+                 %s::INTEGER AS content_bytes,
+                 %s::TEXT AS plain_text,
+                 %s::TEXT AS excerpt,
+                 %s::INTEGER AS word_count,
+                 %s::SMALLINT AS reading_time_minutes
         ) AS EXCLUDED
         WHERE lc.country_id = EXCLUDED.country_id
           AND COALESCE(lc.subregion_id, 0) = COALESCE(EXCLUDED.subregion_id, 0)
           AND lc.language_code = EXCLUDED.language_code
           AND lc.content_type_id = EXCLUDED.content_type_id
-          AND lc.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+          AND (lc.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+               OR lc.storage_tier IS DISTINCT FROM EXCLUDED.storage_tier
+               OR lc.blob_hash IS DISTINCT FROM EXCLUDED.blob_hash
+               -- einmaliges Nachfüllen für Zeilen von vor der Klartext-Migration
+               OR (lc.word_count IS NULL AND EXCLUDED.word_count IS NOT NULL))
         RETURNING lc.id
         """
         
-        update_result = self.execute_upsert(update_query, (country_id, normalized_lang, content_type_id, content, source_url, content))
+        update_result = self.execute_upsert(update_query, (country_id, normalized_lang, content_type_id) + row_params)
         if update_result:
+            self._sync_cold_content(update_result, content, cold)
             logger.info(f"UPSERT: Updated content (changed) for country_id={country_id}, lang={normalized_lang}, type={content_type_id}")
             return update_result, "update_changed"
         else:
@@ -183,17 +461,320 @@ class DatabaseManager:
             logger.info(f"UPSERT: Content unchanged for country_id={country_id}, lang={normalized_lang}, type={content_type_id}")
             return existing_id[0] if existing_id else None, "update_unchanged"
 
+    def _sync_cold_content(self, localized_content_id: int, content: str, cold: bool):
+        """Schreibt bzw. entfernt die Cold-Kopie passend zum storage_tier der Hot-Zeile"""
+        if cold:
+            self.execute_insert(content_storage.UPSERT_COLD_SQL, content_storage.cold_params(localized_content_id, content))
+        else:
+            self.execute_insert(content_storage.DELETE_COLD_SQL, (localized_content_id,))
+
+    def upsert_localized_content_plain(self, country_id: int, language_code: str, content_type_id: int,
+                                       content: str, source_url: str = None) -> int:
+        """Schreibpfad ohne ON CONFLICT für Schemata ohne uq_localized_content"""
+        with self.cursor() as cur:
+            # Eintrag suchen (NULL-sicher über COALESCE)
+            cur.execute("""
+                SELECT id FROM localized_contents
+                WHERE country_id = %s
+                AND COALESCE(subregion_id,0) = 0
+                AND language_code = %s
+                AND content_type_id = %s
+                LIMIT 1
+            """, (country_id, language_code, content_type_id))
+            row = cur.fetchone()
+            if row and row[0]:
+                cur.execute("""
+                    UPDATE localized_contents
+                    SET content = %s,
+                        source_url = %s,
+                        updated_at = NOW()
+                    WHERE id = %s
+                    RETURNING id
+                """, (content, source_url, row[0]))
+            else:
+                cur.execute("""
+                    INSERT INTO localized_contents
+                        (country_id, subregion_id, language_code, content_type_id, content, source_url, updated_at)
+                    VALUES (%s, NULL, %s, %s, %s, %s, NOW())
+                    RETURNING id
+                """, (country_id, language_code, content_type_id, content, source_url))
+            result = cur.fetchone()[0]
+        self._count_write()
+        return result
+
+    def get_cold_content(self, localized_content_id: int) -> Optional[str]:
+        """Lädt einen Cold-Abschnitt (nur auf expliziten Wunsch)"""
+        row = self.execute_select_one(
+            "SELECT content_compressed FROM localized_content_cold WHERE localized_content_id = %s",
+            (localized_content_id,)
+        )
+        return content_storage.decompress_content(row[0]) if row else None
+
+    def gc_content_blobs(self, grace_hours: float = 24) -> int:
+        """Löscht unreferenzierte Blobs, die länger als grace_hours verwaist sind"""
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(content_storage.GC_BLOBS_SQL, (grace_hours,))
+                removed = cursor.fetchone()[0]
+        except psycopg2.Error as e:
+            logger.error(f"Fehler bei der Blob-Garbage-Collection: {e}")
+            return 0
+        logger.info(f"Blob-GC: {removed} verwaiste Blobs entfernt")
+        return removed
+
+    def start_import_run(self, source: str, rollback_of: Optional[int] = None) -> Optional[int]:
+        """Legt den Importlauf an; alle folgenden Abschnittsversionen gehören zu ihm"""
+        if not self.section_history:
+            return None
+        try:
+            with self.cursor() as cursor:
+                self.run_id = revision_storage.start_run(cursor, source, rollback_of)
+        except psycopg2.Error as e:
+            logger.error(f"Importlauf nicht angelegt (Historie ohne Lauf): {e}")
+            return None
+        logger.info(f"Importlauf {self.run_id} gestartet ({source})")
+        return self.run_id
+
+    def finish_import_run(self, status: str = 'finished'):
+        if self.run_id is None:
+            return
+        try:
+            with self.cursor() as cursor:
+                revision_storage.finish_run(cursor, self.run_id, status)
+        except psycopg2.Error as e:
+            logger.error(f"Importlauf {self.run_id} nicht abgeschlossen: {e}")
+
+    def section_rollback_targets(self, run_id: int) -> Dict[str, Any]:
+        """Abschnitte des Laufs mit ihrer Version vor dem Lauf (siehe revision_storage.rollback_targets)"""
+        with self.cursor() as cursor:
+            return revision_storage.rollback_targets(cursor, run_id)
+
+    def reconstruct_section(self, country_id: int, language_code: str, content_type_id: int,
+                            seq: int) -> Optional[str]:
+        """HTML einer beliebigen Version aus section_revisions (None = gelöscht/unbekannt)"""
+        with self.cursor() as cursor:
+            return revision_storage.reconstruct(cursor, (country_id, language_code, content_type_id), seq)
+
+    def delete_sections(self, keys: List[tuple]) -> int:
+        """Entfernt Abschnitte (country_id, language_code, content_type_id) samt delete-Version"""
+        with self.cursor() as cursor:
+            if self.section_history:
+                heads = revision_storage.fetch_heads(cursor, [
+                    {'country_id': c, 'language_code': l, 'content_type_id': t, 'content_hash': None}
+                    for c, l, t in keys
+                ])
+                revision_storage.record_deletes(cursor, keys, heads, self.run_id)
+            removed = revision_storage.delete_sections(cursor, keys)
+        self._count_write()
+        return removed
+
+    def mark_run_rolled_back(self, run_id: int) -> bool:
+        with self.cursor() as cursor:
+            return revision_storage.mark_rolled_back(cursor, run_id)
+
+    def maintain_sync_logs(self, retention_days: float, months_ahead: int = 2) -> int:
+        """Monatspartitionen der sync_logs anlegen; ältere als retention_days verdichten und löschen"""
+        try:
+            with self.cursor() as cursor:
+                dropped = sync_storage.maintain_logs(cursor, retention_days, months_ahead)
+        except psycopg2.Error as e:
+            logger.error(f"Fehler bei der sync_logs-Retention: {e}")
+            return 0
+        logger.info(f"sync_logs-Retention: {dropped} Monatspartitionen verdichtet und entfernt")
+        return dropped
+
     def upsert_localized_content(self, country_id: int, language_code: str, 
-                                content_type_id: int, content: str, source_url: str = None) -> int:
+                                content_type_id: int, content: str, source_url: str = None,
+                                text_stats: Optional[Dict[str, Any]] = None, cold: bool = False) -> int:
         """Legacy wrapper for backward compatibility."""
-        result_id, status = self.upsert_localized_content_with_status(country_id, language_code, content_type_id, content, source_url)
+        result_id, status = self.upsert_localized_content_with_status(country_id, language_code, content_type_id, content, source_url, text_stats, cold)
         return result_id
     
+    def load_content_hashes(self, language_codes: Optional[List[str]] = None) -> Dict[tuple, tuple]:
+        """
+        (country_id, language_code, content_type_id) → (content_hash, storage_tier)
+        für alle Länder-Abschnitte in einer Abfrage. Zeilen ohne Klartext-Spalten fehlen
+        bewusst, damit sie beim nächsten Lauf nachgefüllt werden.
+        language_codes: None = alle Sprachen, [] = keine (z. B. alle im Bulk-Load).
+        """
+        if language_codes is not None and not language_codes:
+            return {}
+        query = """
+        SELECT country_id, language_code, content_type_id, content_hash, storage_tier
+        FROM localized_contents
+        WHERE subregion_id IS NULL
+          AND content_hash IS NOT NULL
+          AND word_count IS NOT NULL
+        """
+        params = None
+        if language_codes is not None:
+            query += " AND language_code = ANY(%s)"
+            params = (list(language_codes),)
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            return {(c, l, t): (h, tier) for c, l, t, h, tier in cursor.fetchall()}
+
+    def bulk_upsert_localized_contents(self, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Mengenbasiertes UPSERT vieler Abschnitte (auch über mehrere Länder/Sprachen):
+        COPY in eine Staging-Tabelle, dann ein INSERT … ON CONFLICT … WHERE content_hash
+        IS DISTINCT FROM. sections: [{country_id, language_code, content_type_id, content,
+        source_url, text_stats, cold[, wiki_revision]}]. Liefert je Abschnitt {…, id, status}.
+        Geänderte Abschnitte werden in derselben Transaktion versioniert (section_revisions).
+        """
+        rows = [
+            content_storage.stage_row(
+                s['country_id'], s['language_code'], s['content_type_id'], s['content'],
+                s.get('source_url'), s.get('text_stats'), s.get('cold', False)
+            )
+            for s in sections
+        ]
+        # Sprachen im Bulk-Load gehen in ihre Ladetabelle, alle anderen nach localized_contents
+        by_target: Dict[Optional[str], List[tuple]] = {}
+        for row in rows:
+            by_target.setdefault(self.load_tables.get(row[1]), []).append(row)
+        history = {
+            (r[0], r[1], r[2]): self._history_section(r[0], r[1], r[2], s['content'], s.get('wiki_revision'))
+            for r, s in zip(rows, sections)
+        }
+        results = []
+        try:
+            with self.cursor() as cursor:
+                heads = self._section_heads(list(history.values()))
+                for target, target_rows in by_target.items():
+                    results += content_storage.bulk_upsert_sections(cursor, target_rows, target,
+                                                                    self.precompress_encodings)
+                self._record_revisions([
+                    history[(r['country_id'], r['language_code'], r['content_type_id'])]
+                    for r in results if r['status'] != 'update_unchanged'
+                ], heads)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Bulk-UPSERT: {e}")
+            raise
+        counts: Dict[str, int] = {}
+        for r in results:
+            counts[r['status']] = counts.get(r['status'], 0) + 1
+        logger.info(f"BULK UPSERT: {len(results)} Abschnitte – {counts}")
+        return results
+
+    def prepare_language_load(self, language_code: str, reset: bool = False, bulk: bool = False) -> bool:
+        """
+        Abschnitte der Sprache ab jetzt in die abgetrennte Ladetabelle schreiben
+        (bulk: UNLOGGED, Indexe erst beim Abschluss – nur für finish_full_rebuild).
+        Liefert True, wenn die Ladetabelle neu ist (False: abgebrochener Lauf wird fortgesetzt).
+        """
+        try:
+            with self.cursor() as cursor:
+                table, created = partition_storage.prepare_load(cursor, language_code, reset, bulk)
+        except psycopg2.Error as e:
+            logger.error(f"Ladetabelle für {language_code} nicht angelegt: {e}")
+            raise
+        self.load_tables[language_code] = table
+        logger.info(f"Bulk-Load {language_code}: {table} ({'neu' if created else 'fortgesetzt'})")
+        return created
+
+    def attach_language_load(self, language_code: str) -> int:
+        """Hängt die Ladetabelle atomar als Partition der Sprache an (inkl. Seiten-Neuaufbau)"""
+        try:
+            with self.cursor() as cursor:
+                sections, pages = partition_storage.attach_load(cursor, language_code, self.precompress_encodings)
+        except psycopg2.Error as e:
+            logger.error(f"Partition für {language_code} nicht angehängt: {e}")
+            raise
+        self.load_tables.pop(language_code, None)
+        logger.info(f"Partition {language_code} angehängt: {sections} Abschnitte, {pages} Seiten")
+        return sections
+
+    def abort_language_load(self, language_code: str):
+        """Verwirft die Ladetabelle der Sprache (die bisherige Partition bleibt unverändert)"""
+        with self.cursor() as cursor:
+            partition_storage.abort_load(cursor, language_code)
+        self.load_tables.pop(language_code, None)
+
+    def prepare_media_shadow(self, reset: bool = False) -> bool:
+        """
+        Medien ab jetzt in media_assets_shadow schreiben (FULL_REBUILD).
+        Liefert True, wenn die Schattentabelle neu bzw. leer ist.
+        """
+        try:
+            with self.cursor() as cursor:
+                table, created = shadow_storage.prepare_shadow(cursor, 'media_assets', reset)
+        except psycopg2.Error as e:
+            logger.error(f"Schattentabelle für media_assets nicht angelegt: {e}")
+            raise
+        self.media_table = table
+        logger.info(f"Neuaufbau media_assets: {table} ({'neu' if created else 'fortgesetzt'})")
+        return created
+
+    def finish_full_rebuild(self, languages: List[str],
+                            min_ratio: float = shadow_storage.DEFAULT_MIN_RATIO) -> bool:
+        """
+        Schließt den Neuaufbau ab: Lade-/Schattentabellen WAL-sicher machen und indexieren
+        (eigene Transaktion, die API ist nicht betroffen), Zeilenzahlen gegen live prüfen,
+        dann alles in einer kurzen Transaktion tauschen und die Seiten danach neu bauen.
+        Abschnitte und Medien wechseln atomar; die Seiten-Dokumente (country_pages) folgen
+        danach in Blöcken zu je 200 Länder-Sprachen, jeder Block in eigener Transaktion.
+        Bis dahin liefert die API für eine Länder-Sprache noch das alte Dokument, aber ohne
+        ETag (page_versions wurde im Tausch entfernt) – also kein 304 auf den alten Stand.
+        False = Prüfung fehlgeschlagen; live bleibt unverändert, die Tabellen bleiben für
+        einen weiteren Lauf bzw. zur Analyse stehen.
+        """
+        shadows = list(shadow_storage.SHADOW_TABLES) if self.media_table else []
+        start = time.time()
+        try:
+            with self.cursor() as cursor:
+                loaded = {lang: partition_storage.finalize_load(cursor, lang) for lang in languages}
+                for table in shadows:
+                    loaded[table] = shadow_storage.finalize_shadow(cursor, table)
+                live = shadow_storage.live_counts(cursor, languages)
+        except psycopg2.Error as e:
+            logger.error(f"Abschluss des Neuaufbaus fehlgeschlagen: {e}")
+            raise
+        logger.info(f"Neuaufbau abgeschlossen in {time.time() - start:.1f}s: {loaded} (live: {live})")
+
+        problems = shadow_storage.check_counts(loaded, live, min_ratio)
+        if problems:
+            for problem in problems:
+                logger.error(f"Neuaufbau verworfen – {problem}")
+            return False
+
+        start = time.time()
+        try:
+            with self.transaction():
+                with self.cursor() as cursor:
+                    keys = shadow_storage.swap(cursor, languages, shadows)
+        except psycopg2.Error as e:
+            logger.error(f"Tausch der Neuaufbau-Tabellen fehlgeschlagen: {e}")
+            raise
+        logger.info(f"Tabellen getauscht in {time.time() - start:.2f}s ({len(languages)} Sprachen, {len(shadows)} Schattentabellen)")
+        for lang in languages:
+            self.load_tables.pop(lang, None)
+        self.media_table = None
+
+        changed: List[tuple] = []
+        for i in range(0, len(keys), 200):
+            changed.extend(self.rebuild_country_pages(keys[i:i + 200]))
+        self.notify_changes({tuple(key): ['page'] for key in changed})
+        logger.info(f"Seiten nach Neuaufbau: {len(changed)} von {len(keys)} geändert")
+        return True
+
+    def replace_section_tables(self, country_id: int, language_code: str, content_type_id: int,
+                               tables: List[Dict[str, Any]]):
+        """Ersetzt die als JSON ausgelagerten Tabellen eines Abschnitts"""
+        try:
+            with self.cursor() as cursor:
+                content_storage.replace_section_tables(cursor, country_id, language_code, content_type_id, tables)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Speichern der Tabellen: {e}")
+            raise
+
     def upsert_media_asset(self, country_id: int, language_code: str, title: str, 
                           asset_type: str, url: str, attribution: str = None, source_url: str = None) -> int:
         """Fügt Medien-Asset hinzu oder aktualisiert es"""
-        query = """
-        INSERT INTO media_assets (country_id, language_code, title, type, url, attribution, source_url) 
+        query = f"""
+        INSERT INTO {self.media_table or 'media_assets'} (country_id, language_code, title, type, url, attribution, source_url) 
         VALUES (%s, %s, %s, %s, %s, %s, %s) 
         ON CONFLICT (country_id, language_code, type, url)
         DO UPDATE SET 
@@ -205,13 +786,127 @@ class DatabaseManager:
         """
         return self.execute_upsert(query, (country_id, language_code, title, asset_type, url, attribution, source_url))
     
-    def log_sync(self, country_id: int, language_code: str, source: str, status: str):
-        """Loggt Synchronisations-Status"""
-        query = """
-        INSERT INTO sync_logs (country_id, language_code, source, status) 
-        VALUES (%s, %s, %s, %s)
+    def upsert_media_assets(self, assets: List[tuple]) -> Dict[str, int]:
+        """
+        Mehrere Medien (country_id, language_code, title, type, url, attribution, source_url)
+        in einem INSERT … ON CONFLICT (country_id, language_code, url). Liefert Zähler.
+        """
+        try:
+            with self.cursor() as cursor:
+                counts = media_storage.bulk_upsert_media(cursor, assets, target=self.media_table)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Speichern der Medien: {e}")
+            raise
+        return counts
+
+    def claim_country_slugs(self, titles: List[tuple]) -> int:
+        """Kanonischer Slug je (country_id, language_code, lokalisierter Titel); alte werden Weiterleitungen"""
+        try:
+            with self.cursor() as cursor:
+                claimed = slug_storage.claim_slugs(cursor, titles)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Speichern der Slugs: {e}")
+            raise
+        return claimed
+
+    def rebuild_country_pages(self, keys: List[tuple]) -> List[tuple]:
+        """
+        Baut das Seiten-Dokument (country_pages) je (country_id, language_code) neu;
+        liefert die Länder-Sprachen mit geänderter Seite. Sprachen im Bulk-Load werden
+        übersprungen (ihre Seiten baut das Anhängen der Ladetabelle).
+        """
+        keys = [key for key in keys if key[1] not in self.load_tables]
+        if not keys:
+            return []
+        try:
+            with self.cursor() as cursor:
+                written = page_storage.rebuild_pages(cursor, keys, self.precompress_encodings)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Aufbau der Länderseiten: {e}")
+            raise
+        return written
+
+    def notify_changes(self, changes: Dict[tuple, List[str]]) -> int:
         """
-        self.execute_insert(query, (country_id, language_code, source, status))
+        pg_notify je geänderter Länder-Sprache; zugestellt erst mit dem Commit der Transaktion.
+        Sprachen im Bulk-Load sind noch nicht sichtbar und lösen keine Events aus.
+        """
+        changes = {key: kinds for key, kinds in changes.items() if key[1] not in self.load_tables}
+        if not self.change_channel or not changes:
+            return 0
+        with self.cursor() as cursor:
+            return change_events.notify_changes(cursor, changes, self.change_channel)
+
+    def invalidate_page_versions(self, keys: List[tuple]) -> int:
+        """Entfernt page_versions je (country_id, language_code) – die API liefert dann keinen ETag"""
+        with self.cursor() as cursor:
+            removed = page_storage.invalidate_versions(cursor, keys)
+        self._count_write()
+        return removed
+
+    def upsert_country_fact(self, country_id: int, language_code: str, key: str,
+                            value: str, unit: str = None, entity: str = None) -> int:
+        """Fügt Fakt (rechte Spalte) hinzu oder aktualisiert ihn (inkl. typisierter Spalten)"""
+        return self.execute_upsert(fact_storage.UPSERT_FACT_SQL,
+                                   fact_storage.fact_row(country_id, language_code, key, value, unit, entity))
+
+    def upsert_country_facts(self, facts: List[tuple]) -> int:
+        """
+        Mehrere Fakten (country_id, language_code, key, value, unit[, entity]) in einem
+        Statement; value_numeric/value_date/value_entity werden dabei geparst
+        """
+        try:
+            with self.cursor() as cursor:
+                written = fact_storage.bulk_upsert_facts(cursor, facts)
+            self._count_write()
+        except psycopg2.Error as e:
+            logger.error(f"Fehler beim Speichern der Fakten: {e}")
+            raise
+        return written
+
+    def insert_sync_logs(self, rows: List[tuple]):
+        """
+        Mehrere sync_logs (country_id, language_code, source, status[, duration_ms[, error]])
+        in einem INSERT; sync_state wird in derselben Transaktion nachgezogen
+        """
+        if not rows:
+            return
+        with self.cursor() as cursor:
+            sync_storage.record_syncs(cursor, rows)
+        self._count_write()
+
+    def log_sync(self, country_id: int, language_code: str, source: str, status: str,
+                 duration_ms: Optional[int] = None, error: Optional[str] = None):
+        """Loggt Synchronisations-Status inkl. sync_state (bei sync_log_batch_size > 1 gepuffert)"""
+        row = sync_storage.log_row(country_id, language_code, source, status, duration_ms, error)
+        if self.sync_log_batch_size <= 1:
+            self.insert_sync_logs([row])
+            return
+        with self._sync_log_lock:
+            self._sync_log_buffer.append(row)
+            full = len(self._sync_log_buffer) >= self.sync_log_batch_size
+        # nie in eine fremde, evtl. noch zurückgerollte Transaktion schreiben
+        if full and self.connection is None:
+            self.flush_sync_logs()
+
+    def flush_sync_logs(self) -> int:
+        """Schreibt alle gepufferten sync_logs in einer eigenen Transaktion"""
+        with self._sync_log_lock:
+            rows, self._sync_log_buffer = self._sync_log_buffer, []
+        if not rows:
+            return 0
+        try:
+            self.insert_sync_logs(rows)
+        except psycopg2.Error as e:
+            with self._sync_log_lock:
+                self._sync_log_buffer[:0] = rows
+            logger.error(f"Fehler beim Schreiben der sync_logs: {e}")
+            raise
+        logger.debug(f"sync_logs: {len(rows)} Einträge geschrieben")
+        return len(rows)
     
     def get_country_by_iso(self, iso_code: str) -> Optional[Dict[str, Any]]:
         """Holt Land anhand ISO-Code"""
@@ -0,0 +1,349 @@
+"""
+Write-Behind für den Importer
+- Fetch/Parse-Worker legen je Länder-Sprache eine WriteUnit (typisierte Records:
+  Abschnitte, Fakten, Medien, Sync-Log) in eine begrenzte Queue
+- Writer-Thread(s) schreiben mehrere Units gebündelt in einer Transaktion
+  (ein COPY für alle Abschnitte, je ein INSERT für Fakten, Medien und Sync-Logs)
+- Nach den Daten: Slugs und Seiten-Dokumente (country_pages) der erfolgreichen Units
+  in derselben Transaktion neu aufbauen, danach je geänderter Länder-Sprache ein
+  Änderungs-Event (pg_notify, zugestellt mit dem Commit)
+- Volle Queue → submit() blockiert (Backpressure)
+- on_ack(unit, outcome) erst nach dem Commit → treibt den Fortschritt
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_BATCH_SIZE = 8
+
+MISSING_CONSTRAINT_ERROR = "no unique or exclusion constraint matching the ON CONFLICT specification"
+
+
+@dataclass
+class SectionWrite:
+    country_id: int
+    language_code: str
+    content_type_id: int
+    key: str
+    content: str
+    source_url: Optional[str]
+    content_hash: str
+    text_stats: Dict[str, Any] = field(default_factory=dict)
+    cold: bool = False
+    tables: List[Dict[str, Any]] = field(default_factory=list)
+    wiki_revision: Optional[int] = None  # Wikipedia-Revision des Artikels (section_revisions)
+
+
+@dataclass
+class FactWrite:
+    country_id: int
+    language_code: str
+    key: str
+    value: str
+    unit: Optional[str] = None
+    entity: Optional[str] = None  # Wikidata-QID (value_entity)
+
+
+@dataclass
+class MediaWrite:
+    country_id: int
+    language_code: str
+    title: str
+    asset_type: str
+    url: str
+    attribution: Optional[str] = None
+    source_url: Optional[str] = None
+
+
+@dataclass
+class SyncLogWrite:
+    country_id: int
+    language_code: str
+    source: str
+    status: str
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class WriteUnit:
+    """Alle Schreibvorgänge einer Länder-Sprache – wird atomar geschrieben"""
+    iso_code: str
+    country_id: int
+    language_code: str
+    status: str  # Ergebnis der Länder-Sprache (success / no_data / error …)
+    local_title: Optional[str] = None  # lokalisierter Artikeltitel → kanonischer Slug der Sprache
+    sections: List[SectionWrite] = field(default_factory=list)
+    facts: List[FactWrite] = field(default_factory=list)
+    media: List[MediaWrite] = field(default_factory=list)
+    sync_logs: List[SyncLogWrite] = field(default_factory=list)
+
+
+def _section_dict(s: SectionWrite) -> Dict[str, Any]:
+    return {
+        'country_id': s.country_id, 'language_code': s.language_code,
+        'content_type_id': s.content_type_id, 'content': s.content,
+        'source_url': s.source_url, 'text_stats': s.text_stats, 'cold': s.cold,
+        'wiki_revision': s.wiki_revision,
+    }
+
+
+def _write_sections(db, sections: List[SectionWrite]) -> List[Dict[str, Any]]:
+    by_key = {(s.country_id, s.language_code, s.content_type_id): s for s in sections}
+    try:
+        with db.savepoint():
+            results = db.bulk_upsert_localized_contents([_section_dict(s) for s in by_key.values()])
+    except psycopg2.Error as e:
+        # Fallback bei fehlender Constraint (alte Schemata): Abschnitt für Abschnitt ohne ON CONFLICT
+        if MISSING_CONSTRAINT_ERROR not in str(e):
+            raise
+        logger.warning(f"Bulk-UPSERT nicht möglich, schreibe einzeln: {e}")
+        return [
+            {'country_id': s.country_id, 'language_code': s.language_code, 'content_type_id': s.content_type_id,
+             'id': db.upsert_localized_content_plain(s.country_id, s.language_code, s.content_type_id,
+                                                     s.content, s.source_url),
+             'status': 'update_changed'}
+            for s in by_key.values()
+        ]
+    for r in results:
+        if r['status'] != 'update_unchanged':
+            s = by_key[(r['country_id'], r['language_code'], r['content_type_id'])]
+            db.replace_section_tables(s.country_id, s.language_code, s.content_type_id, s.tables)
+    return results
+
+
+def apply_units(db, units: List[WriteUnit]) -> List[Dict[str, int]]:
+    """
+    Schreibt Units im Transaktionskontext des Aufrufers. Abschnitte aller Units gehen
+    in einen Bulk-UPSERT; Fakten/Medien/Seiten sind wie bisher fehlertolerant (Savepoint).
+    Liefert Zähler je Unit (gleiche Reihenfolge wie units).
+    """
+    counts = [{'sections': 0, 'sections_changed': 0, 'facts': 0, 'media': 0, 'pages': 0} for _ in units]
+    owner = {}
+    for i, u in enumerate(units):
+        for s in u.sections:
+            owner[(s.country_id, s.language_code, s.content_type_id)] = (i, s.key)
+    # (country_id, language_code) → geänderte Schlüssel für die Änderungs-Events
+    changes: Dict[tuple, List[str]] = {}
+
+    sections = [s for u in units for s in u.sections]
+    if sections:
+        for r in _write_sections(db, sections):
+            i, key = owner[(r['country_id'], r['language_code'], r['content_type_id'])]
+            c = counts[i]
+            c['sections'] += 1
+            if r['status'] != 'update_unchanged':
+                c['sections_changed'] += 1
+                changes.setdefault((units[i].country_id, units[i].language_code), []).append(key)
+
+    facts = [(i, f) for i, u in enumerate(units) for f in u.facts]
+    if facts:
+        try:
+            with db.savepoint():
+                db.upsert_country_facts([(f.country_id, f.language_code, f.key, f.value, f.unit, f.entity)
+                                         for _, f in facts])
+            for i, _ in facts:
+                counts[i]['facts'] += 1
+        except psycopg2.Error as e:
+            logger.debug(f"Fakten konnten nicht geschrieben werden: {e}")
+
+    media = [(i, m) for i, u in enumerate(units) for m in u.media]
+    if media:
+        try:
+            with db.savepoint():
+                result = db.upsert_media_assets([
+                    (m.country_id, m.language_code, m.title, m.asset_type, m.url, m.attribution, m.source_url)
+                    for _, m in media
+                ])
+            for i, _ in media:
+                counts[i]['media'] += 1
+            logger.debug(f"Medien: {result}")
+        except psycopg2.Error as e:
+            logger.debug(f"Medien konnten nicht geschrieben werden: {e}")
+
+    titles = [(u.country_id, u.language_code, u.local_title) for u in units if u.local_title]
+    if titles:
+        try:
+            with db.savepoint():
+                db.claim_country_slugs(titles)
+        except psycopg2.Error as e:
+            logger.warning(f"Slugs konnten nicht geschrieben werden: {e}")
+
+    pages = [(i, u) for i, u in enumerate(units) if u.status == 'success']
+    if pages:
+        # Read-Model + Seiten-Version erst nach allen Daten der Units, damit sie vollständig enthalten sind
+        keys = [(u.country_id, u.language_code) for _, u in pages]
+        try:
+            with db.savepoint():
+                for key in db.rebuild_country_pages(keys):
+                    changes.setdefault(tuple(key), []).append('page')
+            for i, _ in pages:
+                counts[i]['pages'] += 1
+        except psycopg2.Error as e:
+            logger.warning(f"Länderseiten konnten nicht aufgebaut werden: {e}")
+            # keine veraltete Version zu geänderten Inhalten stehen lassen (sonst falsches 304)
+            db.invalidate_page_versions(keys)
+
+    logs = [(l.country_id, l.language_code, l.source, l.status, l.duration_ms, l.error)
+            for u in units for l in u.sync_logs]
+    if logs:
+        # Group Commit: Logs und sync_state committen zusammen mit den Daten, auf die sie sich beziehen
+        db.insert_sync_logs(logs)
+
+    if changes:
+        # NOTIFY wird erst mit dem Commit zugestellt – Events nur für gespeicherte Änderungen
+        try:
+            with db.savepoint():
+                db.notify_changes(changes)
+        except psycopg2.Error as e:
+            logger.warning(f"Änderungs-Events konnten nicht gesendet werden: {e}")
+    return counts
+
+
+class DatabaseWriter:
+    """
+    Begrenzte Queue + Writer-Thread(s). submit() blockiert bei voller Queue;
+    on_ack(unit, outcome) läuft im Writer-Thread nach dem Commit
+    (outcome: {'ok': bool, 'error': str|None, 'counts': {...}}).
+    """
+
+    def __init__(self, db, on_ack: Callable[[WriteUnit, Dict[str, Any]], None],
+                 queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 threads: int = 1):
+        self.db = db
+        self.on_ack = on_ack
+        self.batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[Optional[WriteUnit]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = [
+            threading.Thread(target=self._run, name=f"db-writer-{i}", daemon=True)
+            for i in range(max(1, threads))
+        ]
+        self._lock = threading.Lock()
+        self._started = False
+        self._started_at: Optional[float] = None
+        self._closed = False
+        self.metrics = {
+            'units_submitted': 0,
+            'units_written': 0,
+            'units_failed': 0,
+            'batches': 0,
+            'submit_blocked_seconds': 0.0,
+            'queue_depth_max': 0,
+            'write_seconds_total': 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._started and not self._closed
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        self._started = True
+        self._started_at = time.monotonic()
+        logger.info(f"DB-Writer gestartet ({len(self._threads)} Thread(s), Queue {self._queue.maxsize}, Batch {self.batch_size})")
+
+    def submit(self, unit: WriteUnit):
+        """Reiht eine Unit ein; blockiert, solange die Queue voll ist"""
+        if not self.running:
+            raise RuntimeError("DB-Writer läuft nicht (start() fehlt oder bereits geschlossen)")
+        started = time.monotonic()
+        self._queue.put(unit)
+        blocked = time.monotonic() - started
+        with self._lock:
+            self.metrics['units_submitted'] += 1
+            self.metrics['submit_blocked_seconds'] += blocked
+            self.metrics['queue_depth_max'] = max(self.metrics['queue_depth_max'], self._queue.qsize())
+
+    def close(self):
+        """Wartet, bis alle eingereihten Units geschrieben sind, und beendet die Threads"""
+        if not self.running:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        logger.info(f"DB-Writer beendet: {self.get_metrics()}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            m = dict(self.metrics)
+        m['queue_depth'] = self._queue.qsize()
+        return m
+
+    def stage_metrics(self) -> Dict[str, Any]:
+        """Metriken im Format der Pipeline-Stufen (pipeline.Stage) – die Schreibstufe"""
+        m = self.get_metrics()
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        done = m['units_written'] + m['units_failed']
+        return {
+            'workers': len(self._threads),
+            'queue_depth': m['queue_depth'],
+            'queue_depth_max': m['queue_depth_max'],
+            'processed': done,
+            'failed': m['units_failed'],
+            'busy_seconds': m['write_seconds_total'],
+            'throughput': done / elapsed if elapsed > 0 else 0.0,
+            'utilization': m['write_seconds_total'] / (elapsed * len(self._threads)) if elapsed > 0 else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            unit = self._queue.get()
+            if unit is None:
+                return
+            batch = [unit]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[WriteUnit]):
+        started = time.monotonic()
+        try:
+            with self.db.transaction():
+                counts = apply_units(self.db, batch)
+            outcomes = [(u, {'ok': True, 'error': None, 'counts': c}) for u, c in zip(batch, counts)]
+        except Exception as e:
+            # Batch verworfen → Units einzeln, damit eine kaputte Unit die anderen nicht mitreißt
+            logger.warning(f"DB-Writer: Batch mit {len(batch)} Units fehlgeschlagen ({e}), schreibe einzeln")
+            outcomes = []
+            for u in batch:
+                try:
+                    with self.db.transaction():
+                        counts = apply_units(self.db, [u])
+                    outcomes.append((u, {'ok': True, 'error': None, 'counts': counts[0]}))
+                except Exception as inner:
+                    logger.error(f"DB-Writer: {u.iso_code}/{u.language_code} nicht geschrieben: {inner}")
+                    outcomes.append((u, {'ok': False, 'error': str(inner), 'counts': {}}))
+
+        with self._lock:
+            self.metrics['batches'] += 1
+            self.metrics['write_seconds_total'] += time.monotonic() - started
+            for _, outcome in outcomes:
+                self.metrics['units_written' if outcome['ok'] else 'units_failed'] += 1
+
+        for unit, outcome in outcomes:
+            try:
+                self.on_ack(unit, outcome)
+            except Exception as e:
+                logger.error(f"DB-Writer: Ack für {unit.iso_code}/{unit.language_code} fehlgeschlagen: {e}")
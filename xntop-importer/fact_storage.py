@@ -0,0 +1,147 @@
+"""
+Typisierte Fakten (gemeinsam für main.py und import_full_article.py)
+- value bleibt der Anzeige-String; daneben value_numeric (kanonische Einheit aus
+  FACT_UNITS), value_date und value_entity (Wikidata-QID)
+- Zahlen werden sprachabhängig geparst (Tausender-/Dezimaltrenner, Zahlwörter wie
+  million, Mio., millones, 万/亿, लाख/करोड़)
+- Filter/Sortierung über btree-Indexe (key, language_code, value_numeric) statt Casts über die Tabelle
+"""
+
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+import psycopg2.extras
+
+from infobox import FACT_UNITS
+
+NUMERIC_KEYS = {"population", "area_km2", "population_density", "gdp_nominal", "gdp_ppp", "hdi", "gini"}
+DATE_KEYS = {"founded"}
+MONEY_KEYS = {"gdp_nominal", "gdp_ppp"}
+
+# Sprachen mit Komma als Dezimaltrenner (Punkt = Tausender)
+DECIMAL_COMMA_LANGS = {"de", "es", "fr", "it", "pt", "nl"}
+
+SQ_MI_IN_KM2 = Decimal("2.589988110336")
+
+# Zahlwörter → Faktor je Sprache (längere Wörter zuerst; "billion" ist auf Deutsch 10¹²)
+_MULTIPLIERS = {
+    "en": [("trillion", 12), ("billion", 9), ("million", 6)],
+    "de": [("billionen", 12), ("billion", 12), ("milliarden", 9), ("mrd", 9), ("millionen", 6), ("mio", 6)],
+    "es": [("billones", 12), ("billón", 12), ("millardos", 9), ("millones", 6), ("millón", 6)],
+    "zh": [("万亿", 12), ("兆", 12), ("亿", 8), ("万", 4)],
+    "hi": [("खरब", 11), ("अरब", 9), ("करोड़", 7), ("लाख", 5)],
+}
+
+# Ziffern mit Trennern; ein normales Leerzeichen nur vor einer Dreiergruppe ("83 149 300")
+_NUMBER_RE = re.compile(r"\d(?:[\d.,'\u00a0\u2009\u202f]|\s(?=\d{3}(?!\d)))*")
+_DATE_RE = re.compile(r"^\s*(-?\d{1,4})(?:-(\d{2})-(\d{2}))?")
+_QID_RE = re.compile(r"(Q\d+)\s*$")
+_USD_MARKERS = ("$", "usd", "us-dollar", "dólar", "美元", "डॉलर")
+
+UPSERT_FACTS_SQL = """
+INSERT INTO country_facts (
+  country_id, language_code, key, value, unit, value_numeric, value_date, value_entity
+)
+VALUES %s
+ON CONFLICT (country_id, language_code, key) DO UPDATE SET
+  value         = EXCLUDED.value,
+  unit          = EXCLUDED.unit,
+  value_numeric = EXCLUDED.value_numeric,
+  value_date    = EXCLUDED.value_date,
+  value_entity  = EXCLUDED.value_entity,
+  last_updated  = CURRENT_TIMESTAMP
+"""
+
+# Einzelzeile (Legacy-Pfad) mit id
+UPSERT_FACT_SQL = UPSERT_FACTS_SQL % "(%s, %s, %s, %s, %s, %s, %s, %s)" + "RETURNING id\n"
+
+
+def _parse_number_token(token: str, lang: str) -> Optional[Decimal]:
+    t = token.strip().rstrip(".,")
+    t = re.sub(r"[\s'\u00a0\u2009\u202f]", "", t)
+    decimal_sep, group_sep = (",", ".") if lang in DECIMAL_COMMA_LANGS else (".", ",")
+    if t.count(decimal_sep) > 1:
+        # mehrfach vorkommend → kann nur Tausendertrenner sein ("83.149.300" auf en)
+        decimal_sep, group_sep = group_sep, decimal_sep
+    t = t.replace(group_sep, "").replace(decimal_sep, ".")
+    try:
+        return Decimal(t)
+    except InvalidOperation:
+        return None
+
+
+def parse_number(value: Optional[str], lang: str = "en") -> Optional[Decimal]:
+    """Erste Zahl im Anzeige-String inkl. Zahlwort ('$4.3 trillion' → 4.3e12)"""
+    if not value:
+        return None
+    match = _NUMBER_RE.search(value)
+    if not match:
+        return None
+    lang = (lang or "en").lower()
+    number = _parse_number_token(match.group(0), lang)
+    if number is None:
+        return None
+    tail = value[match.end():match.end() + 16].strip().lower()
+    for word, exponent in _MULTIPLIERS.get(lang, _MULTIPLIERS["en"]):
+        if tail.startswith(word):
+            return number * (Decimal(10) ** exponent)
+    return number
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """'1949-05-23T00:00:00Z' / '1949-05-23' / '1949' → date"""
+    match = _DATE_RE.match(value or "")
+    if not match or match.group(1).startswith("-"):
+        return None
+    year = int(match.group(1))
+    try:
+        return date(year, int(match.group(2) or 1), int(match.group(3) or 1))
+    except ValueError:
+        return None
+
+
+def parse_entity(value: Optional[str]) -> Optional[str]:
+    """'http://www.wikidata.org/entity/Q64' / 'Q64' → 'Q64'"""
+    match = _QID_RE.search(value or "")
+    return match.group(1) if match else None
+
+
+def typed_values(key: str, value: Optional[str], lang: str = "en",
+                 entity: Optional[str] = None) -> Dict[str, object]:
+    """value_numeric (in FACT_UNITS[key]), value_date, value_entity für einen Fakt"""
+    numeric = None
+    if key in NUMERIC_KEYS:
+        text = (value or "").lower()
+        if key in MONEY_KEYS and not any(m in text for m in _USD_MARKERS):
+            text = ""  # andere Währungen nicht in USD umrechnen
+        numeric = parse_number(text, lang)
+        if numeric is not None and key in ("area_km2", "population_density") \
+                and "km" not in text and "sq mi" in text:
+            numeric = numeric * SQ_MI_IN_KM2 if key == "area_km2" else numeric / SQ_MI_IN_KM2
+    return {
+        "value_numeric": numeric,
+        "value_date": parse_date(value) if key in DATE_KEYS else None,
+        "value_entity": parse_entity(entity),
+    }
+
+
+def fact_row(country_id: int, language_code: str, key: str, value: str,
+             unit: Optional[str] = None, entity: Optional[str] = None) -> tuple:
+    """Eine Zeile in UPSERT_FACTS_SQL-Reihenfolge; unit fällt auf die kanonische Einheit zurück"""
+    typed = typed_values(key, value, language_code, entity)
+    return (country_id, language_code, key, value, unit or FACT_UNITS.get(key),
+            typed["value_numeric"], typed["value_date"], typed["value_entity"])
+
+
+def bulk_upsert_facts(cur, rows: List[tuple]) -> int:
+    """
+    rows: (country_id, language_code, key, value, unit[, entity]). Schreibt alle Fakten in
+    einem Statement (im Transaktionskontext des Aufrufers); pro Schlüssel gewinnt die letzte Zeile.
+    """
+    unique = {(r[0], r[1], r[2]): fact_row(*r) for r in rows if r[3]}
+    if not unique:
+        return 0
+    psycopg2.extras.execute_values(cur, UPSERT_FACTS_SQL, list(unique.values()), page_size=len(unique))
+    return len(unique)
@@ -0,0 +1,298 @@
+"""
+HTML-Nachbearbeitung für importierte Wikipedia-Abschnitte (Parse-Stage)
+- Bilder: https-URLs, loading/decoding-Hints, intrinsische Maße, normalisierte srcsets
+- Klartext, Excerpt, Wortzahl & Lesezeit je Abschnitt
+- Große wikitables → kompaktes Spalten-JSON + Platzhalter im HTML
+"""
+
+import re
+import json
+import math
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SRCSET_WIDTHS = (320, 640, 1024)
+DEFAULT_EXCERPT_LENGTH = 300
+DEFAULT_LARGE_TABLE_MIN_ROWS = 25
+
+# Lesegeschwindigkeit: Wörter bzw. CJK-Zeichen pro Minute
+WORDS_PER_MINUTE = 200
+CJK_CHARS_PER_MINUTE = 400
+
+# Parsoid-Attribute, die das Frontend nicht braucht (nur Bytes)
+_DROP_IMG_ATTRS = ("resource", "typeof", "about", "data-mw", "data-file-type", "data-file-width", "data-file-height")
+
+# .../wikipedia/commons/thumb/a/ab/File.jpg/250px-File.jpg
+_THUMB_RE = re.compile(r"^(?P<base>https://upload\.wikimedia\.org/.+/thumb/.+/(?P<file>[^/]+))/(?P<width>\d+)px-(?P<name>[^/]+)$")
+
+
+def parse_widths(value: Optional[str]) -> List[int]:
+    """'320,640,1024' → [320, 640, 1024]; ungültige Einträge werden ignoriert"""
+    widths = []
+    for part in (value or "").split(","):
+        part = part.strip()
+        if part.isdigit() and int(part) > 0:
+            widths.append(int(part))
+    return sorted(set(widths)) or list(DEFAULT_SRCSET_WIDTHS)
+
+
+def normalize_image_url(url: str) -> str:
+    """Protokoll-relative und http-URLs → https"""
+    if not url:
+        return ""
+    url = url.strip()
+    if url.startswith("//"):
+        return "https:" + url
+    if url.startswith("http://"):
+        return "https://" + url[len("http://"):]
+    return url
+
+
+def _int_attr(img, name: str) -> Optional[int]:
+    try:
+        return int(img.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_srcset(src: str, widths: Iterable[int], original_width: Optional[int]) -> Optional[str]:
+    """Erzeugt ein srcset mit w-Deskriptoren aus einer Commons-Thumbnail-URL"""
+    m = _THUMB_RE.match(src)
+    if not m:
+        return None
+    # Vektorgrafiken dürfen beliebig skaliert werden, Rastergrafiken nicht über das Original hinaus
+    is_vector = m.group("file").lower().endswith(".svg")
+    candidates = []
+    for w in widths:
+        if original_width and not is_vector and w > original_width:
+            continue
+        candidates.append(f"{m.group('base')}/{w}px-{m.group('name')} {w}w")
+    return ", ".join(candidates) or None
+
+
+def optimize_images(html: str, widths: Iterable[int] = DEFAULT_SRCSET_WIDTHS, hero: bool = False) -> str:
+    """
+    Schreibt alle <img> eines Abschnitts um:
+      - src/srcset → https
+      - loading="lazy" + decoding="async" (außer beim ersten Bild, wenn hero=True)
+      - width/height bleiben erhalten (kein Layout-Shift)
+      - srcset auf die konfigurierten Breiten normalisiert
+    """
+    if not html or not BeautifulSoup or "<img" not in html:
+        return html
+    widths = list(widths)
+    soup = BeautifulSoup(html, "html.parser")
+    images = soup.find_all("img")
+
+    for idx, img in enumerate(images):
+        src = normalize_image_url(img.get("src", ""))
+        if not src:
+            continue
+        img["src"] = src
+
+        original_width = _int_attr(img, "data-file-width")
+        srcset = _build_srcset(src, widths, original_width)
+        if srcset:
+            img["srcset"] = srcset
+            width = _int_attr(img, "width")
+            img["sizes"] = f"(max-width: {width}px) 100vw, {width}px" if width else "100vw"
+        elif img.get("srcset"):
+            img["srcset"] = ", ".join(
+                normalize_image_url(part.strip()) for part in img["srcset"].split(",") if part.strip()
+            )
+
+        for attr in _DROP_IMG_ATTRS:
+            if attr in img.attrs:
+                del img[attr]
+
+        if hero and idx == 0:
+            img["fetchpriority"] = "high"
+            for attr in ("loading", "decoding"):
+                if attr in img.attrs:
+                    del img[attr]
+        else:
+            img["loading"] = "lazy"
+            img["decoding"] = "async"
+
+    return str(soup)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Klartext / Excerpt / Lesezeit
+# ──────────────────────────────────────────────────────────────────────────────
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_WS_RE = re.compile(r"\s+")
+
+# Elemente ohne Lesetext (Fußnoten-Marker, Edit-Links, Styles)
+_NOISE_SELECTORS = ("sup.reference", "span.mw-editsection", "style", "script", "link", "meta")
+
+
+def _collapse(text: str) -> str:
+    return _WS_RE.sub(" ", (text or "").replace("\xa0", " ")).strip()
+
+
+def _cut(text: str, length: int) -> str:
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    # an Wortgrenze kürzen (bei CJK gibt es keine Leerzeichen → harter Schnitt)
+    if " " in cut[length // 2:]:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:-–") + "…"
+
+
+def count_words(text: str) -> Dict[str, int]:
+    """Wörter (leerzeichengetrennt) und CJK-Zeichen getrennt zählen"""
+    cjk = len(_CJK_RE.findall(text or ""))
+    rest = _CJK_RE.sub(" ", text or "")
+    words = sum(1 for tok in rest.split() if any(ch.isalnum() for ch in tok))
+    return {"words": words, "cjk": cjk}
+
+
+def section_text_stats(html: str, excerpt_length: int = DEFAULT_EXCERPT_LENGTH) -> Dict[str, Any]:
+    """
+    Liefert plain_text, excerpt, word_count und reading_time_minutes für einen Abschnitt.
+    Das Excerpt kommt bevorzugt aus den Absätzen, nicht aus Tabellen/Listen.
+    """
+    empty = {"plain_text": "", "excerpt": "", "word_count": 0, "reading_time_minutes": 0}
+    if not html:
+        return empty
+    if not BeautifulSoup:
+        plain = _collapse(re.sub(r"<[^>]+>", " ", html))
+        paragraphs = plain
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+        for selector in _NOISE_SELECTORS:
+            for el in soup.select(selector):
+                el.decompose()
+        plain = _collapse(soup.get_text(" "))
+        paragraphs = " ".join(t for t in (_collapse(p.get_text(" ")) for p in soup.find_all("p")) if t)
+    if not plain:
+        return empty
+
+    counts = count_words(plain)
+    minutes = counts["words"] / WORDS_PER_MINUTE + counts["cjk"] / CJK_CHARS_PER_MINUTE
+    return {
+        "plain_text": plain,
+        "excerpt": _cut(paragraphs or plain, excerpt_length),
+        "word_count": counts["words"] + counts["cjk"],
+        "reading_time_minutes": max(1, math.ceil(minutes)),
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Große Tabellen → JSON
+# ──────────────────────────────────────────────────────────────────────────────
+def _cell_text(cell) -> str:
+    for el in cell.select("sup.reference, style, span[style*='display:none']"):
+        el.decompose()
+    return _collapse(cell.get_text(" "))
+
+
+def _span(cell, attr: str) -> int:
+    try:
+        return max(1, min(int(cell.get(attr, 1)), 100))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _table_grid(table) -> List[Tuple[bool, List[str]]]:
+    """Expandiert rowspan/colspan → [(is_header_row, [zellen…])]"""
+    grid: List[Tuple[bool, List[str]]] = []
+    carry: Dict[int, Tuple[int, str]] = {}  # Spalte → (verbleibende Zeilen, Text)
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table:
+            continue  # verschachtelte Tabellen ignorieren
+        cells = tr.find_all(["th", "td"], recursive=False)
+        row: List[str] = []
+        col = 0
+        queue = list(cells)
+        while queue or col in carry:
+            if col in carry:
+                remaining, text = carry.pop(col)
+                row.append(text)
+                if remaining > 1:
+                    carry[col] = (remaining - 1, text)
+                col += 1
+                continue
+            cell = queue.pop(0)
+            text = _cell_text(cell)
+            for _ in range(_span(cell, "colspan")):
+                row.append(text)
+                if _span(cell, "rowspan") > 1:
+                    carry[col] = (_span(cell, "rowspan") - 1, text)
+                col += 1
+        if row:
+            grid.append((bool(cells) and all(c.name == "th" for c in cells), row))
+    return grid
+
+
+def _table_to_json(table, index: int) -> Dict[str, Any]:
+    grid = _table_grid(table)
+    header_rows = []
+    while grid and grid[0][0]:
+        header_rows.append(grid.pop(0)[1])
+    rows = [r for _, r in grid]
+    width = max([len(r) for r in rows + header_rows] or [0])
+
+    columns = []
+    for i in range(width):
+        labels: List[str] = []
+        for hr in header_rows:
+            if i < len(hr) and hr[i] and hr[i] not in labels:
+                labels.append(hr[i])
+        columns.append(" / ".join(labels))
+    rows = [r + [""] * (width - len(r)) for r in rows]
+
+    caption = table.find("caption")
+    data = {
+        "table_index": index,
+        "caption": _collapse(caption.get_text(" ")) if caption else None,
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+    }
+    payload = json.dumps([data["caption"], columns, rows], ensure_ascii=False, separators=(",", ":"))
+    data["table_hash"] = hashlib.md5(payload.encode("utf-8")).hexdigest()[:12]
+    return data
+
+
+def extract_large_tables(html: str, min_rows: int = DEFAULT_LARGE_TABLE_MIN_ROWS) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Ersetzt wikitables mit mindestens min_rows Datenzeilen durch einen Platzhalter
+    <div class="xntop-table" data-table-index=… data-rows=… data-table-hash=…>
+    und liefert die Tabellen als {caption, columns, rows}. Der Hash im Platzhalter
+    sorgt dafür, dass sich content_hash ändert, sobald sich eine Tabelle ändert.
+    """
+    if not html or not BeautifulSoup or "wikitable" not in html:
+        return html, []
+    soup = BeautifulSoup(html, "html.parser")
+    tables: List[Dict[str, Any]] = []
+    for table in soup.find_all("table", class_="wikitable"):
+        if table.find_parent("table") is not None:
+            continue
+        data_rows = sum(1 for tr in table.find_all("tr") if tr.find("td", recursive=False))
+        if data_rows < min_rows:
+            continue
+        data = _table_to_json(table, len(tables))
+        placeholder = soup.new_tag("div", attrs={
+            "class": "xntop-table",
+            "data-table-index": str(data["table_index"]),
+            "data-rows": str(data["row_count"]),
+            "data-table-hash": data["table_hash"],
+        })
+        if data["caption"]:
+            placeholder.string = data["caption"]
+        table.replace_with(placeholder)
+        tables.append(data)
+    if not tables:
+        return html, []
+    return str(soup), tables
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from main import XNTOPImporter
+from db_writer import WriteUnit, apply_units
 import logging
 
 # Setup logging
@@ -13,23 +14,27 @@ def import_flags_for_countries():
     
     # Import flags for specific countries
     importer = XNTOPImporter()
+    importer.db.connect()
     importer.setup_database()  # Initialize database connection
     
     for country_name in target_countries:
         logger.info(f'=== Importing flag for {country_name} ===')
         
         # Get country from database
-        with importer.db.connection.cursor() as cur:
-            cur.execute('SELECT id FROM countries WHERE name_en = %s', (country_name,))
-            result = cur.fetchone()
-            if result:
-                country_id = result[0]
-                importer.import_additional_images(country_id, country_name, 'de')
-                logger.info(f'✅ Flag imported for {country_name}')
-            else:
-                logger.error(f'❌ Country {country_name} not found')
+        result = importer.db.execute_select_one('SELECT id FROM countries WHERE name_en = %s', (country_name,))
+        if result:
+            country_id = result[0]
+            # Same write path as the importer: media, page version and change event in one transaction
+            unit = WriteUnit(iso_code=importer.get_iso_code_for_country(country_name), country_id=country_id,
+                             language_code='de', status='success',
+                             media=importer.additional_image_assets(country_id, country_name, 'de'))
+            with importer.db.transaction():
+                apply_units(importer.db, [unit])
+            logger.info(f'✅ Flag imported for {country_name}')
+        else:
+            logger.error(f'❌ Country {country_name} not found')
     
-    importer.db.close()
+    importer.db.disconnect()
 
 if __name__ == "__main__":
     import_flags_for_countries()
@@ -11,6 +11,18 @@ import psycopg2.extras
 import requests
 from bs4 import BeautifulSoup
 
+import content_storage
+import media_storage
+import page_storage
+import slug_storage
+import fact_storage
+import sync_storage
+import change_events
+import compression_storage
+import revision_storage
+from html_processing import optimize_images, parse_widths, section_text_stats, extract_large_tables
+from infobox import extract_infobox_facts, FACT_UNITS
+
 # ──────────────────────────────────────────────────────────────
 # ENV / Konfiguration
 # ──────────────────────────────────────────────────────────────
@@ -33,6 +45,25 @@ WIKI_UA = os.getenv(
 REQUEST_TIMEOUT = int(os.getenv("WIKI_TIMEOUT", "30"))
 REQUEST_DELAY = float(os.getenv("WIKI_DELAY", "0.25"))
 
+# Breiten für normalisierte srcsets der Abschnittsbilder
+IMAGE_SRCSET_WIDTHS = parse_widths(os.getenv("IMAGE_SRCSET_WIDTHS", "320,640,1024"))
+EXCERPT_LENGTH = int(os.getenv("EXCERPT_LENGTH", "300"))
+
+# Selten gelesene Abschnitte → komprimiert in localized_content_cold
+COLD_SECTIONS = content_storage.parse_section_keys(os.getenv("COLD_SECTIONS", content_storage.DEFAULT_COLD_SECTIONS))
+
+# Ab dieser Zeilenzahl werden wikitables als JSON in section_tables ausgelagert
+LARGE_TABLE_MIN_ROWS = int(os.getenv("LARGE_TABLE_MIN_ROWS", "25"))
+
+# pg_notify je geänderter Länder-Sprache (leer = keine Events)
+CHANGE_EVENTS_CHANNEL = os.getenv("CHANGE_EVENTS_CHANNEL", change_events.DEFAULT_CHANNEL).strip()
+
+# Vorkomprimierte Varianten neuer Blobs und geänderter Seiten (leer = keine)
+PRECOMPRESS_ENCODINGS = compression_storage.parse_encodings(os.getenv("PRECOMPRESS_ENCODINGS", "gzip,br"))
+
+# Geänderte Abschnitte je Lauf in section_revisions (Audit/Rollback)
+SECTION_HISTORY = os.getenv("SECTION_HISTORY", "true").strip().lower() in ("1", "true", "yes")
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - import_full_article - %(levelname)s - %(message)s",
@@ -134,44 +165,101 @@ def norm_lang(lang: str, default: str = "en") -> str:
     """Normalize language code to lowercase ISO 639-1"""
     return (lang or default).strip().lower()
 
-def upsert_localized_html_with_status(conn, country_id: int, lang: str, content_type_id: int, html: str, source_url: Optional[str]) -> str:
-    """Advanced UPSERT with xmax-based status detection. Returns 'insert', 'update_changed', or 'update_unchanged'."""
+def upsert_localized_html_with_status(conn, country_id: int, lang: str, content_type_id: int, html: str, source_url: Optional[str],
+                                      text_stats: Optional[Dict] = None, cold: bool = False,
+                                      wiki_revision: Optional[int] = None, run_id: Optional[int] = None) -> str:
+    """
+    Advanced UPSERT with xmax-based status detection. Returns 'insert', 'update' or 'no_change'.
+    Unveränderte Zeilen (gleicher Hash, gleiche Ablage) werden nicht angefasst und
+    liefern 'no_change', lösen also auch kein Änderungs-Event aus.
+    Mit SECTION_HISTORY wird jede neue Version (Delta gegen den bisherigen Stand) in
+    section_revisions angehängt, im selben Commit wie der Abschnitt.
+    """
     if not html:
-        logger.info(f"UPSERT: Skipped empty content for country_id={country_id}, lang={lang}, type={content_type_id}")
+        log.info(f"UPSERT: Skipped empty content for country_id={country_id}, lang={lang}, type={content_type_id}")
         return "skipped_empty"
     
     # Normalize inputs
     normalized_lang = norm_lang(lang)
+    stats = text_stats or {}
     
     # Single UPSERT with xmax-based status detection
+    # Klartext-Spalten (inkl. search_vector) nur bei geändertem Hash (bzw. einmalig, falls noch leer) erneuern
+    # Cold-Abschnitte: content bleibt NULL, HTML liegt komprimiert in localized_content_cold
+    # Hot-Abschnitte: content bleibt NULL, HTML liegt content-adressiert in content_blobs
     UPSERT_SQL = """
         INSERT INTO localized_contents (
           country_id, subregion_id, language_code, content_type_id,
-          content, source_url, updated_at, content_hash
+          content, blob_hash, source_url, updated_at, content_hash, storage_tier, content_bytes,
+          plain_text, excerpt, word_count, reading_time_minutes, search_vector
         ) VALUES (
-          %s, NULL, %s, %s, %s, %s, NOW(), md5(COALESCE(%s, ''))
+          %s, NULL, %s, %s, NULL, %s, %s, NOW(), %s, %s, %s,
+          %s, %s, %s, %s, to_tsvector(xntop_ts_config(%s), COALESCE(%s::TEXT, ''))
         )
         ON CONFLICT ON CONSTRAINT uq_localized_content
         DO UPDATE SET
-          content      = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash THEN EXCLUDED.content ELSE localized_contents.content END,
+          content      = CASE WHEN localized_contents.blob_hash IS DISTINCT FROM EXCLUDED.blob_hash OR localized_contents.storage_tier <> EXCLUDED.storage_tier THEN NULL ELSE localized_contents.content END,
+          blob_hash    = EXCLUDED.blob_hash,
           source_url   = EXCLUDED.source_url,
           content_hash = EXCLUDED.content_hash,
+          storage_tier = EXCLUDED.storage_tier,
+          content_bytes = EXCLUDED.content_bytes,
+          plain_text   = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash OR localized_contents.word_count IS NULL THEN EXCLUDED.plain_text ELSE localized_contents.plain_text END,
+          excerpt      = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash OR localized_contents.word_count IS NULL THEN EXCLUDED.excerpt ELSE localized_contents.excerpt END,
+          word_count   = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash OR localized_contents.word_count IS NULL THEN EXCLUDED.word_count ELSE localized_contents.word_count END,
+          reading_time_minutes = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash OR localized_contents.word_count IS NULL THEN EXCLUDED.reading_time_minutes ELSE localized_contents.reading_time_minutes END,
+          search_vector = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash OR localized_contents.search_vector IS NULL THEN EXCLUDED.search_vector ELSE localized_contents.search_vector END,
           updated_at   = CASE WHEN localized_contents.content_hash <> EXCLUDED.content_hash THEN NOW() ELSE localized_contents.updated_at END
+        WHERE localized_contents.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+           OR localized_contents.storage_tier IS DISTINCT FROM EXCLUDED.storage_tier
+           OR localized_contents.blob_hash IS DISTINCT FROM EXCLUDED.blob_hash
+           -- einmaliges Nachfüllen für Zeilen von vor der Klartext-Migration
+           OR (localized_contents.word_count IS NULL AND EXCLUDED.word_count IS NOT NULL)
         RETURNING
-          (xmax = 0) AS inserted,
-          (xmax <> 0) AS updated
+          id,
+          (xmax = 0) AS inserted
+    """
+    SELECT_ID_SQL = """
+        SELECT id FROM localized_contents
+        WHERE country_id = %s AND subregion_id IS NULL AND language_code = %s AND content_type_id = %s
     """
     
+    blob_hash = None if cold else content_storage.blob_hash(html)
+    section = {"country_id": country_id, "language_code": normalized_lang, "content_type_id": content_type_id,
+               "content": html, "content_hash": content_storage.content_hash(html), "wiki_revision": wiki_revision}
     with conn.cursor() as cur:
-        cur.execute(UPSERT_SQL, (country_id, normalized_lang, content_type_id, html, source_url, html))
+        heads = revision_storage.fetch_heads(cur, [section]) if SECTION_HISTORY else {}
+        if not cold:
+            cur.execute(content_storage.UPSERT_BLOB_SQL, content_storage.blob_params(html))
+            compression_storage.compress_blobs(cur, {blob_hash: html}, PRECOMPRESS_ENCODINGS)
+        cur.execute(UPSERT_SQL, (country_id, normalized_lang, content_type_id,
+                                 blob_hash, source_url,
+                                 content_storage.content_hash(html), "cold" if cold else "hot",
+                                 content_storage.content_bytes(html),
+                                 stats.get("plain_text"), stats.get("excerpt"),
+                                 stats.get("word_count"), stats.get("reading_time_minutes"),
+                                 normalized_lang, stats.get("plain_text")))
         result = cur.fetchone()
+        changed = result is not None
+        if not changed:
+            # WHERE hat das Update unterdrückt: Zeile unverändert, id für die Cold-Kopie nachladen
+            cur.execute(SELECT_ID_SQL, (country_id, normalized_lang, content_type_id))
+            result = cur.fetchone()
+            if result:
+                result = (result[0], False)
         
         if result:
-            inserted, updated = result
+            row_id, inserted = result
+            if cold:
+                cur.execute(content_storage.UPSERT_COLD_SQL, content_storage.cold_params(row_id, html))
+            else:
+                cur.execute(content_storage.DELETE_COLD_SQL, (row_id,))
+            if SECTION_HISTORY and changed:
+                revision_storage.record_revisions(cur, [section], heads, run_id)
             if inserted:
                 log.info(f"UPSERT: Inserted new content for country_id={country_id}, lang={normalized_lang}, type={content_type_id}")
                 return "insert"
-            elif updated:
+            elif changed:
                 log.info(f"UPSERT: Updated content for country_id={country_id}, lang={normalized_lang}, type={content_type_id}")
                 return "update"
             else:
@@ -183,24 +271,42 @@ def upsert_localized_html_with_status(conn, country_id: int, lang: str, content_
         return "unknown"
 
 # Backward compatibility wrapper
-def upsert_localized_html(conn, country_id: int, lang: str, content_type_id: int, html: str, source_url: Optional[str]):
+def upsert_localized_html(conn, country_id: int, lang: str, content_type_id: int, html: str, source_url: Optional[str],
+                          text_stats: Optional[Dict] = None, cold: bool = False,
+                          wiki_revision: Optional[int] = None, run_id: Optional[int] = None):
     """Legacy wrapper for backward compatibility."""
-    result = upsert_localized_html_with_status(conn, country_id, lang, content_type_id, html, source_url)
+    result = upsert_localized_html_with_status(conn, country_id, lang, content_type_id, html, source_url, text_stats, cold,
+                                               wiki_revision, run_id)
     conn.commit()
     return result
 
-def upsert_fact(conn, country_id: int, lang: str, key: str, value: str, unit: Optional[str] = None):
-    if not value:
-        return
+def upsert_fact(conn, country_id: int, lang: str, key: str, value: str, unit: Optional[str] = None,
+                entity: Optional[str] = None):
+    upsert_facts(conn, [(country_id, lang, key, value, unit, entity)])
+
+def upsert_facts(conn, facts: List[Tuple]):
+    """(country_id, lang, key, value, unit, entity) → ein Statement inkl. typisierter Spalten"""
     with conn.cursor() as cur:
-        cur.execute("""
-        INSERT INTO country_facts(country_id, language_code, key, value, unit)
-        VALUES (%s, %s, %s, %s, %s)
-        ON CONFLICT (country_id, language_code, key)
-        DO UPDATE SET value = EXCLUDED.value, unit = EXCLUDED.unit, last_updated = CURRENT_TIMESTAMP
-        """, (country_id, lang, key, value, unit))
+        fact_storage.bulk_upsert_facts(cur, facts)
     conn.commit()
 
+def record_sync(conn, country_id: int, lang: str, status: str, started: float, error: Optional[str] = None,
+                changed: Optional[List[str]] = None):
+    """
+    sync_logs-Eintrag + sync_state-UPSERT; mit changed zusätzlich ein Änderungs-Event
+    (zugestellt mit diesem Commit). Fehler hier brechen den Import nicht ab.
+    """
+    duration_ms = int((time.monotonic() - started) * 1000)
+    try:
+        with conn.cursor() as cur:
+            sync_storage.record_syncs(cur, [(country_id, norm_lang(lang), "wikipedia", status, duration_ms, error)])
+            if changed and CHANGE_EVENTS_CHANNEL:
+                change_events.notify_changes(cur, {(country_id, norm_lang(lang)): changed}, CHANGE_EVENTS_CHANNEL)
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        log.warning(f"Sync-Status für {country_id} ({lang}) nicht gespeichert: {e}")
+
 def normalize_media_url(url: str) -> str:
     """Normalize media URL to avoid duplicates."""
     if not url:
@@ -232,32 +338,29 @@ def normalize_media_url(url: str) -> str:
     
     return normalized
 
-def upsert_media_asset_safe(conn, country_id: int, lang: str, title: str, media_type: str, url: str, attribution: str, source_url: str):
-    """Save media asset with SAVEPOINT protection against duplicates."""
-    if not url:
-        return
-    
-    # Normalize URL to avoid duplicates
-    normalized_url = normalize_media_url(url)
-    if not normalized_url:
-        return
-    
+def upsert_media_assets_bulk(conn, assets: List[Tuple]) -> Dict[str, int]:
+    """
+    Save all media assets of a country-language with one INSERT … ON CONFLICT
+    (country_id, language_code, url). Duplicates are removed in memory by normalized URL.
+    assets: (country_id, lang, title, type, url, attribution, source_url)
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    if not assets:
+        return counts
     with conn.cursor() as cur:
-        # Use SAVEPOINT to protect against duplicate key errors
+        # one savepoint for the whole batch, so a bad row can't abort the caller's transaction
         cur.execute("SAVEPOINT sp_media")
         try:
-            cur.execute("""
-            INSERT INTO media_assets (country_id, language_code, title, type, url, attribution, source_url, uploaded_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
-            """, (country_id, lang, title, media_type, normalized_url, attribution, source_url))
-            log.info(f"Inserted new media asset: {title[:50]}...")
+            counts = media_storage.bulk_upsert_media(cur, assets, normalize_media_url)
             cur.execute("RELEASE SAVEPOINT sp_media")
-        except Exception as e:
+        except psycopg2.Error as e:
             cur.execute("ROLLBACK TO SAVEPOINT sp_media")
-            if "duplicate key" in str(e).lower():
-                log.info(f"Media duplicate skipped: {title[:50]}... ({normalized_url[:60]}...)")
-            else:
-                log.warning(f"Media insert error: {e}")
+            log.warning(f"Media insert error: {e}")
+    return counts
+
+def upsert_media_asset_safe(conn, country_id: int, lang: str, title: str, media_type: str, url: str, attribution: str, source_url: str):
+    """Save a single media asset (duplicates are handled by ON CONFLICT)."""
+    upsert_media_assets_bulk(conn, [(country_id, lang, title, media_type, url, attribution, source_url)])
 
 # Backward compatibility wrapper
 def upsert_media_asset(conn, country_id: int, lang: str, title: str, media_type: str, url: str, attribution: str, source_url: str):
@@ -653,17 +756,21 @@ def split_sections_from_html(html: str, lang: str) -> Dict[str, str]:
 # Wikidata Facts (rechte Spalte)
 # ──────────────────────────────────────────────────────────────
 
-def wikidata_facts(qid: str, lang: str = "en") -> Dict[str, str]:
-    """Kleine, robuste Auswahl. Du kannst die Query jederzeit erweitern."""
+def wikidata_facts(qid: str, lang: str = "en") -> Dict[str, Dict]:
+    """
+    Kleine, robuste Auswahl. Du kannst die Query jederzeit erweitern.
+    Liefert key → {value, unit, entity}; entity ist die Entitäts-URI (Hauptstadt, Währung, Sprache).
+    """
     if not qid:
         return {}
     query = f"""
-    SELECT ?pop ?area ?capitalLabel ?currencyLabel ?languageLabel WHERE {{
+    SELECT ?pop ?area ?capital ?capitalLabel ?currency ?currencyLabel ?language ?languageLabel ?inception WHERE {{
       wd:{qid} wdt:P1082 ?pop .
       wd:{qid} wdt:P2046 ?area .
       OPTIONAL {{ wd:{qid} wdt:P36 ?capital . }}
       OPTIONAL {{ wd:{qid} wdt:P38 ?currency . }}
       OPTIONAL {{ wd:{qid} wdt:P37 ?language . }}
+      OPTIONAL {{ wd:{qid} wdt:P571 ?inception . }}
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "{lang},en". }}
     }}
     LIMIT 1
@@ -700,17 +807,24 @@ def wikidata_facts(qid: str, lang: str = "en") -> Dict[str, str]:
             field = row.get(key, {})
             return field.get("value") if field else None
         
+        def fact(value: Optional[str], entity: Optional[str] = None) -> Dict:
+            return {"value": value, "unit": None, "entity": entity}
+
         facts = {}
         if safe_val("pop"):
-            facts["population"] = safe_val("pop")
+            facts["population"] = fact(safe_val("pop"))
         if safe_val("area"):
-            facts["area_km2"] = safe_val("area")
+            facts["area_km2"] = fact(safe_val("area"))
         if safe_val("capitalLabel"):
-            facts["capital"] = safe_val("capitalLabel")
+            facts["capital"] = fact(safe_val("capitalLabel"), safe_val("capital"))
         if safe_val("currencyLabel"):
-            facts["currency"] = safe_val("currencyLabel")
+            facts["currency"] = fact(safe_val("currencyLabel"), safe_val("currency"))
         if safe_val("languageLabel"):
-            facts["official_language"] = safe_val("languageLabel")
+            facts["official_language"] = fact(safe_val("languageLabel"), safe_val("language"))
+        if safe_val("inception"):
+            facts["founded"] = fact(safe_val("inception").split("T")[0])
+        for key, f in facts.items():
+            f["unit"] = FACT_UNITS.get(key)
             
         log.info(f"Retrieved {len(facts)} facts from Wikidata for {qid}")
         return facts
@@ -757,10 +871,12 @@ def resolve_titles_and_qid(country_name_en: str, lang: str, qid_hint: Optional[s
 
     return (local_title, qid)
 
-def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str, int]):
+def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str, int],
+                                run_id: Optional[int] = None):
     cid = country["id"]
     name_en = country["name_en"]
     qid_hint = country.get("wikidata_id")
+    started = time.monotonic()
 
     # Caching: schon bekannter lokaler Titel?
     local_title = get_cached_local_title(conn, cid, lang)
@@ -776,10 +892,20 @@ def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str
 
     if not local_title:
         log.warning(f"[{name_en}][{lang}] Kein lokaler Titel gefunden – überspringe.")
+        record_sync(conn, cid, lang, "no_title", started)
         return
 
     log.info(f"→ {name_en} [{lang}] Titel: {local_title}  QID: {qid or '-'}")
 
+    # Kanonischer Slug der Sprache aus dem lokalisierten Titel (alter Slug → Weiterleitung)
+    try:
+        with conn.cursor() as cur:
+            slug_storage.claim_slugs(cur, [(cid, norm_lang(lang), local_title)])
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        log.warning(f"[{name_en}][{lang}] Slug nicht gespeichert: {e}")
+
     # Volltext-HTML holen
     html = fetch_parsoid_html(local_title, lang)
     if not html:
@@ -788,10 +914,12 @@ def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str
 
     if not html:
         log.warning(f"[{name_en}][{lang}] Kein HTML erhalten.")
+        record_sync(conn, cid, lang, "no_content", started)
         return
 
     # Abschnitte extrahieren & mappen
     sections = split_sections_from_html(html, lang)
+    wiki_revision = revision_storage.wikipedia_revision(html)
 
     # Übersicht/Lead sicherstellen (falls leer)
     if "overview" not in sections:
@@ -804,32 +932,35 @@ def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str
     else:
         page_url = None
 
+    # Bilder-Markup optimieren (erstes Overview-Bild = Hero), große Tabellen → JSON
+    section_tables: Dict[str, List[Dict]] = {}
+    for key in list(sections.keys()):
+        sections[key] = optimize_images(sections[key], IMAGE_SRCSET_WIDTHS, hero=(key == "overview"))
+        sections[key], section_tables[key] = extract_large_tables(sections[key], LARGE_TABLE_MIN_ROWS)
+
     # Speichern je Abschnitt (nur bekannte Keys)
     order = ["overview","geography","demography","history","politics","economy","transport","culture",
              "see_also","literature","external_links","notes","references"]
+    changed: List[str] = []
     for key in order:
         if key in sections and sections[key]:
             ctid = ct_ids.get(key)
             if not ctid:
                 continue
-            upsert_localized_html(conn, cid, lang, ctid, sections[key], page_url)
+            with conn.cursor() as cur:
+                content_storage.replace_section_tables(cur, cid, norm_lang(lang), ctid, section_tables.get(key, []))
+            status = upsert_localized_html(conn, cid, lang, ctid, sections[key], page_url,
+                                           section_text_stats(sections[key], EXCERPT_LENGTH),
+                                           cold=key in COLD_SECTIONS, wiki_revision=wiki_revision, run_id=run_id)
+            if status in ("insert", "update"):
+                changed.append(key)
 
     # Extract and save Wikipedia images for hero sections
     try:
         wikipedia_images = extract_wikipedia_images(html, name_en, lang)
-        
-        # Deduplicate URLs before inserting
-        seen_urls = set()
-        unique_images = []
+
+        assets = []
         for img in wikipedia_images:
-            normalized_url = normalize_media_url(img['url'])
-            if normalized_url and normalized_url not in seen_urls:
-                seen_urls.add(normalized_url)
-                unique_images.append(img)
-        
-        log.info(f"Extracted {len(wikipedia_images)} images, {len(unique_images)} unique for {name_en} ({lang})")
-        
-        for img in unique_images:
             # Save flags and coats of arms with their original types, others as hero types
             if img['type'] == 'flag':
                 media_type = 'flag'
@@ -837,19 +968,39 @@ def import_one_country_language(conn, country: Dict, lang: str, ct_ids: Dict[str
                 media_type = 'coat_of_arms'
             else:
                 media_type = 'hero_' + img['type']  # hero_scenic, hero_landmark, etc.
-            
-            upsert_media_asset_safe(conn, cid, lang, img['title'], media_type, img['url'], 'Wikipedia', page_url)
-        
-        log.info(f"Saved {len(unique_images)} unique Wikipedia images for {name_en} ({lang})")
+            assets.append((cid, lang, img['title'], media_type, img['url'], 'Wikipedia', page_url))
+
+        # dedup by normalized URL + one INSERT … ON CONFLICT for all images
+        counts = upsert_media_assets_bulk(conn, assets)
+        conn.commit()
+        log.info(f"Extracted {len(wikipedia_images)} images for {name_en} ({lang}): "
+                 f"{counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged, "
+                 f"{counts['skipped']} duplicates")
     except Exception as e:
         log.warning(f"Error extracting images for {name_en} ({lang}): {e}")
 
-    # Wikidata-Fakten (rechte Spalte)
-    if qid:
-        facts = wikidata_facts(qid, lang)
-        for k, v in facts.items():
-            upsert_fact(conn, cid, lang, k, v)
+    # Fakten (rechte Spalte): Infobox aus dem vorhandenen HTML, Wikidata hat Vorrang
+    facts = wikidata_facts(qid, lang) if qid else {}
+    rows = [(cid, lang, f["key"], f["value"], f["unit"], None)
+            for f in extract_infobox_facts(html, lang) if f["key"] not in facts]
+    rows += [(cid, lang, k, f["value"], f["unit"], f["entity"]) for k, f in facts.items()]
+    upsert_facts(conn, rows)
 
+    # Seiten-Dokument (country_pages) aus dem jetzt vollständigen Stand neu aufbauen
+    try:
+        with conn.cursor() as cur:
+            if page_storage.rebuild_pages(cur, [(cid, lang)], PRECOMPRESS_ENCODINGS):
+                changed.append("page")
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        log.warning(f"Seiten-Dokument für {name_en} ({lang}) nicht aufgebaut: {e}")
+        # ohne gültige Version kein ETag (die Abschnitte sind bereits committet)
+        with conn.cursor() as cur:
+            page_storage.invalidate_versions(cur, [(cid, lang)])
+        conn.commit()
+
+    record_sync(conn, cid, lang, "success", started, changed=changed)
     time.sleep(REQUEST_DELAY)
 
 # ──────────────────────────────────────────────────────────────
@@ -863,16 +1014,30 @@ def main():
         ensure_aux_schema(conn)
         ct_ids = load_content_type_ids(conn)
         countries = get_countries(conn)
+        run_id = None
+        if SECTION_HISTORY:
+            with conn.cursor() as cur:
+                run_id = revision_storage.start_run(cur, "import_full_article")
+            conn.commit()
+            log.info(f"Importlauf {run_id}")
 
         log.info(f"{len(countries)} Länder, Sprachen: {LANGS}")
 
         for i, country in enumerate(countries, start=1):
             log.info(f"[{i}/{len(countries)}] {country['name_en']} ({country['iso_code']})")
             for lang in LANGS:
+                started = time.monotonic()
                 try:
-                    import_one_country_language(conn, country, lang, ct_ids)
+                    import_one_country_language(conn, country, lang, ct_ids, run_id)
                 except Exception as e:
                     log.error(f"Fehler bei {country['name_en']} [{lang}]: {e}")
+                    conn.rollback()
+                    record_sync(conn, country["id"], lang, "error", started, str(e))
+
+        if run_id is not None:
+            with conn.cursor() as cur:
+                revision_storage.finish_run(cur, run_id)
+            conn.commit()
 
     log.info("Fertig.")
 
@@ -0,0 +1,205 @@
+"""
+Infobox-Extraktion aus dem Parsoid-HTML (rechte Spalte ohne Zusatz-Requests)
+- Sucht die Länder-Infobox, mappt Zeilen-Labels je Sprache auf Fakten-Keys
+- Liefert bereinigte Anzeige-Werte inkl. Einheit für country_facts
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+logger = logging.getLogger(__name__)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Infobox-Labels (Label-Präfix → Fakten-Key)
+# Reihenfolge zählt: spezifischere Labels vor allgemeineren
+# ──────────────────────────────────────────────────────────────────────────────
+INFOBOX_LABELS = {
+    "en": {
+        "capital": ["capital"],
+        "official_language": ["official languages", "official language", "national language"],
+        "population_density": ["density"],
+        "population": ["population"],
+        "area_km2": ["area"],
+        "gdp_ppp": ["gdp (ppp)"],
+        "gdp_nominal": ["gdp (nominal)"],
+        "hdi": ["hdi"],
+        "gini": ["gini"],
+        "currency": ["currency"],
+        "time_zone": ["time zone"],
+        "calling_code": ["calling code"],
+        "internet_tld": ["internet tld"],
+        "driving_side": ["driving side"],
+    },
+    "de": {
+        "capital": ["hauptstadt"],
+        "official_language": ["amtssprache"],
+        "population_density": ["bevölkerungsdichte"],
+        "population": ["einwohnerzahl", "einwohner"],
+        "area_km2": ["fläche"],
+        "gdp_nominal": ["bruttoinlandsprodukt", "bip"],
+        "hdi": ["index der menschlichen entwicklung", "hdi"],
+        "currency": ["währung"],
+        "time_zone": ["zeitzone"],
+        "calling_code": ["telefonvorwahl"],
+        "internet_tld": ["internet-tld"],
+    },
+    "es": {
+        "capital": ["capital"],
+        "official_language": ["idiomas oficiales", "idioma oficial"],
+        "population_density": ["densidad"],
+        "population": ["población total", "población"],
+        "area_km2": ["superficie"],
+        "gdp_ppp": ["pib (ppa)"],
+        "gdp_nominal": ["pib (nominal)"],
+        "hdi": ["idh"],
+        "gini": ["coeficiente de gini", "gini"],
+        "currency": ["moneda"],
+        "time_zone": ["huso horario"],
+        "calling_code": ["prefijo telefónico"],
+        "internet_tld": ["dominio internet"],
+    },
+    "zh": {
+        "capital": ["首都"],
+        "official_language": ["官方语言", "官方語言"],
+        "population_density": ["人口密度"],
+        "population": ["人口"],
+        "area_km2": ["面积", "面積"],
+        "gdp_ppp": ["国内生产总值（购买力平价）", "gdp（购买力平价）"],
+        "gdp_nominal": ["国内生产总值（国际汇率）", "国内生产总值", "gdp（国际汇率）"],
+        "hdi": ["人类发展指数", "人類發展指數"],
+        "gini": ["基尼系数"],
+        "currency": ["货币", "貨幣"],
+        "time_zone": ["时区", "時區"],
+        "calling_code": ["国际电话区号", "電話區號", "电话区号"],
+        "internet_tld": ["互联网顶级域", "網際網路頂級域"],
+        "driving_side": ["行驶方位", "行車方向"],
+    },
+    "hi": {
+        "capital": ["राजधानी"],
+        "official_language": ["राजभाषा", "आधिकारिक भाषा"],
+        "population_density": ["घनत्व"],
+        "population": ["जनसंख्या"],
+        "area_km2": ["क्षेत्रफल"],
+        "gdp_nominal": ["सकल घरेलू उत्पाद"],
+        "hdi": ["मानव विकास सूचकांक"],
+        "currency": ["मुद्रा"],
+        "time_zone": ["समय मण्डल", "समय क्षेत्र"],
+        "calling_code": ["दूरभाष कूट", "कॉलिंग कोड"],
+        "internet_tld": ["इंटरनेट टीएलडी"],
+    },
+}
+
+# Kanonische Einheiten je Fakten-Key (unit in country_facts; fact_storage normalisiert
+# value_numeric auf diese Einheit)
+FACT_UNITS = {
+    "area_km2": "km²",
+    "population_density": "/km²",
+    "gdp_nominal": "USD",
+    "gdp_ppp": "USD",
+}
+
+MAX_VALUE_LENGTH = 200
+
+_REF_RE = re.compile(r"\[[^\]]{1,12}\]")
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalize_label(text: str) -> str:
+    t = (text or "").replace("\xa0", " ").replace("•", "").replace("·", "")
+    return _WS_RE.sub(" ", t).strip().strip(":：").strip().lower()
+
+
+def _match_key(label: str, lang: str) -> Optional[str]:
+    table = INFOBOX_LABELS.get(lang, INFOBOX_LABELS["en"])
+    for key, names in table.items():
+        for n in names:
+            if label.startswith(n):
+                return key
+    return None
+
+
+def _clean_value(cell) -> str:
+    # Fußnoten, versteckte Sortierschlüssel & Styles entfernen; km<sup>2</sup> → km²
+    for el in cell.find_all("sup"):
+        if el.get_text(strip=True) == "2":
+            el.replace_with("²")
+        else:
+            el.decompose()
+    for el in cell.find_all(["style", "script"]):
+        el.decompose()
+    for el in cell.find_all(style=re.compile(r"display:\s*none")):
+        el.decompose()
+    text = cell.get_text(" ").replace("\xa0", " ")
+    text = _REF_RE.sub("", text).replace(" ²", "²")
+    text = _WS_RE.sub(" ", text).strip()
+    if len(text) > MAX_VALUE_LENGTH:
+        text = text[:MAX_VALUE_LENGTH].rsplit(" ", 1)[0] + "…"
+    return text
+
+
+def _find_infobox(soup):
+    for table in soup.find_all("table"):
+        classes = " ".join(table.get("class") or []).lower()
+        if "infobox" in classes:
+            return table
+    return None
+
+
+def _label_and_value(row) -> Tuple[Optional[str], Optional[object]]:
+    """Label-Zelle (th oder erstes td) und Wert-Zelle einer Infobox-Zeile"""
+    cells = row.find_all(["th", "td"], recursive=False)
+    if not cells:
+        return None, None
+    if len(cells) == 1:
+        # reine Gruppenüberschrift (z. B. "Population" mit "• 2023 estimate" darunter)
+        return (cells[0].get_text(" ") if cells[0].name == "th" else None), None
+    return cells[0].get_text(" "), cells[1]
+
+
+def extract_infobox_facts(html: str, lang: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Liefert [{key, value, unit}] aus der Länder-Infobox.
+    Gruppenzeilen ohne Wert (Area, Population, GDP …) übernehmen den
+    Wert der ersten Unterzeile ("• Total", "• 2023 estimate").
+    """
+    if not html or not BeautifulSoup:
+        return []
+    soup = BeautifulSoup(html, "html.parser")
+    infobox = _find_infobox(soup)
+    if not infobox:
+        return []
+
+    facts: Dict[str, str] = {}
+    group_key: Optional[str] = None
+
+    for row in infobox.find_all("tr"):
+        raw_label, cell = _label_and_value(row)
+        if raw_label is None:
+            continue
+        is_sub_row = raw_label.strip().startswith(("•", "·"))
+        label = _normalize_label(raw_label)
+        key = _match_key(label, lang)
+
+        if cell is None:
+            group_key = key
+            continue
+
+        if key is None and is_sub_row and group_key:
+            key, group_key = group_key, None
+        elif not is_sub_row:
+            group_key = None
+
+        if not key or key in facts:
+            continue
+        value = _clean_value(cell)
+        if value:
+            facts[key] = value
+
+    logger.debug(f"Infobox ({lang}): {len(facts)} Fakten extrahiert")
+    return [{"key": k, "value": v, "unit": FACT_UNITS.get(k)} for k, v in facts.items()]
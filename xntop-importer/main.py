@@ -10,7 +10,11 @@ XNTOP Importer - Hauptskript (Volltext + Abschnitte + Tabellen)
 import os
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import traceback
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from typing import Dict, Any, Set, Optional, Tuple, List
 from datetime import datetime
 import time
@@ -22,8 +26,17 @@ try:
 except ImportError:
     BeautifulSoup = None  # Fallback: wir importieren dann nur Lead & Summary
 
+import content_storage
+import partition_storage
+import compression_storage
+import revision_storage
+import shadow_storage
 from database import DatabaseManager
+from pipeline import Pipeline, Scheduler, Stage
+from db_writer import DatabaseWriter, WriteUnit, SectionWrite, FactWrite, MediaWrite, SyncLogWrite, apply_units
 from wikipedia_api import WikipediaAPIClient
+from html_processing import optimize_images, parse_widths, section_text_stats, extract_large_tables
+from infobox import extract_infobox_facts
 from countries_data import COUNTRIES_BY_CONTINENT, SUPPORTED_LANGUAGES, WIKIPEDIA_LANGUAGE_CODES
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -34,6 +47,16 @@ os.environ.setdefault('DB_PORT', '5433')
 os.environ.setdefault('DB_NAME', 'xandhopp')
 os.environ.setdefault('DB_USER', 'xandhopp')
 os.environ.setdefault('DB_PASSWORD', 'xandhopp')
+os.environ.setdefault('DB_POOL_MIN', '1')
+os.environ.setdefault('DB_POOL_MAX', '5')
+os.environ.setdefault('DB_POOL_TIMEOUT', '30')
+os.environ.setdefault('DB_TRANSACTION_SCOPE', 'language')   # language | operations | statement
+os.environ.setdefault('DB_COMMIT_EVERY', '50')
+os.environ.setdefault('SYNC_LOG_BATCH_SIZE', '50')
+os.environ.setdefault('WRITE_BEHIND', 'true')
+os.environ.setdefault('WRITER_THREADS', '1')
+os.environ.setdefault('WRITER_QUEUE_SIZE', '32')
+os.environ.setdefault('WRITER_BATCH_SIZE', '8')
 
 os.environ.setdefault('WIKIPEDIA_API_BASE', 'https://en.wikipedia.org/api/rest_v1')
 os.environ.setdefault('WIKIPEDIA_TIMEOUT', '30')
@@ -44,7 +67,25 @@ os.environ.setdefault('WIKIPEDIA_USER_AGENT', 'XNTOP/1.0 (https://xntop.app; con
 os.environ.setdefault('BATCH_SIZE', '10')
 os.environ.setdefault('DELAY_BETWEEN_REQUESTS', '0.35')
 os.environ.setdefault('MAX_WORKERS', '3')
-os.environ.setdefault('LANGUAGES_PER_BATCH', '2')
+os.environ.setdefault('LANGUAGES_PER_BATCH', '2')           # Vorgabe für PIPELINE_FETCH_WORKERS
+os.environ.setdefault('PIPELINE_RESOLVE_WORKERS', '2')      # Titel/QID (Wikidata, Langlinks, Suche)
+os.environ.setdefault('PIPELINE_PARSE_WORKERS', '2')        # Abschnitte, Bilder, Tabellen, Infobox (CPU)
+os.environ.setdefault('PIPELINE_QUEUE_SIZE', '8')           # begrenzte Queue je Stufe (Backpressure)
+os.environ.setdefault('MAX_IN_FLIGHT', '16')                # Länder-Sprachen gleichzeitig unterwegs (über alle Länder)
+os.environ.setdefault('IMAGE_SRCSET_WIDTHS', '320,640,1024')
+os.environ.setdefault('EXCERPT_LENGTH', '300')
+os.environ.setdefault('COLD_SECTIONS', content_storage.DEFAULT_COLD_SECTIONS)
+os.environ.setdefault('LARGE_TABLE_MIN_ROWS', '25')
+os.environ.setdefault('SKIP_UNCHANGED_SECTIONS', 'true')
+os.environ.setdefault('BLOB_GC_GRACE_HOURS', '24')          # < 0 → keine Blob-GC nach dem Lauf
+os.environ.setdefault('SYNC_LOG_RETENTION_DAYS', '180')     # ältere sync_logs → sync_logs_daily; < 0 → aus
+os.environ.setdefault('CHANGE_EVENTS_CHANNEL', 'xntop_changes')  # NOTIFY je geänderter Länder-Sprache; leer → aus
+os.environ.setdefault('PRECOMPRESS_ENCODINGS', 'gzip,br')   # vorkomprimierte Blobs/Seiten für die API; leer → aus
+os.environ.setdefault('SECTION_HISTORY', 'true')            # Abschnittsversionen je Lauf in section_revisions
+os.environ.setdefault('ROLLBACK_RUN_ID', '')                # z. B. "42": statt Import die Abschnitte von Lauf 42 zurücksetzen
+os.environ.setdefault('LOAD_LANGUAGES', '')                 # z. B. "fr,it": in Ladetabelle importieren, danach Partition tauschen
+os.environ.setdefault('FULL_REBUILD', 'false')              # alle Sprachen + Medien in Schattentabellen, am Ende atomar tauschen
+os.environ.setdefault('REBUILD_MIN_RATIO', '0.9')           # Tausch nur, wenn je Tabelle/Sprache ≥ 90 % der Live-Zeilen geladen
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Logging
@@ -142,6 +183,8 @@ class ProgressTracker:
         self.completed_operations: Set[str] = set()  # "ISO:lang"
         self.start_time = None
         self.last_save = None
+        # Acks kommen aus den Writer-Threads
+        self._lock = threading.RLock()
         self.load_progress()
 
     def load_progress(self):
@@ -157,6 +200,10 @@ class ProgressTracker:
             logger.warning(f"Konnte Fortschritt nicht laden: {e}")
 
     def save_progress(self):
+        with self._lock:
+            self._save_progress()
+
+    def _save_progress(self):
         try:
             data = {
                 'completed_countries': list(self.completed_countries),
@@ -177,13 +224,23 @@ class ProgressTracker:
         return f"{iso_code}:{lang_code}" in self.completed_operations
 
     def mark_operation_completed(self, iso_code: str, lang_code: str):
-        self.completed_operations.add(f"{iso_code}:{lang_code}")
-        if len(self.completed_operations) % 10 == 0:
-            self.save_progress()
+        with self._lock:
+            self.completed_operations.add(f"{iso_code}:{lang_code}")
+            if len(self.completed_operations) % 10 == 0:
+                self._save_progress()
 
     def mark_country_completed(self, iso_code: str):
-        self.completed_countries.add(iso_code)
-        self.save_progress()
+        with self._lock:
+            self.completed_countries.add(iso_code)
+            self._save_progress()
+
+    def reset_language(self, lang_code: str):
+        """Sprache neu laden: ihre Operationen (und damit alle Länder) gelten als offen"""
+        with self._lock:
+            self.completed_operations = {op for op in self.completed_operations
+                                         if not op.endswith(f":{lang_code}")}
+            self.completed_countries.clear()
+            self._save_progress()
 
     def start_import(self):
         if not self.start_time:
@@ -199,6 +256,31 @@ class ProgressTracker:
 # ──────────────────────────────────────────────────────────────────────────────
 # XNTOP Importer
 # ──────────────────────────────────────────────────────────────────────────────
+@dataclass
+class LanguageTask:
+    """Eine Länder-Sprache auf dem Weg durch die Pipeline (resolve → fetch → parse → write)"""
+    country_id: int
+    country_name: str
+    iso_code: str
+    lang_code: str
+    overview_type_id: int
+    qid_hint: Optional[str] = None
+    started: float = field(default_factory=time.monotonic)
+    local_title: Optional[str] = None
+    qid: Optional[str] = None
+    lead_html: Optional[str] = None
+    parsoid_html: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None  # WikipediaAPIClient.get_country_data
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def wiki_lang(self) -> str:
+        return WIKIPEDIA_LANGUAGE_CODES.get(self.lang_code, self.lang_code)
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+
 class XNTOPImporter:
     def __init__(self):
         # DB
@@ -207,8 +289,27 @@ class XNTOPImporter:
             port=int(os.getenv('DB_PORT', 5433)),
             database=os.getenv('DB_NAME', 'xandhopp'),
             user=os.getenv('DB_USER', 'xandhopp'),
-            password=os.getenv('DB_PASSWORD', 'xandhopp')
+            password=os.getenv('DB_PASSWORD', 'xandhopp'),
+            min_connections=int(os.getenv('DB_POOL_MIN', 1)),
+            max_connections=int(os.getenv('DB_POOL_MAX', 5)),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+            sync_log_batch_size=int(os.getenv('SYNC_LOG_BATCH_SIZE', 50)),
+            change_channel=os.getenv('CHANGE_EVENTS_CHANNEL', 'xntop_changes').strip(),
+            precompress_encodings=compression_storage.parse_encodings(os.getenv('PRECOMPRESS_ENCODINGS', 'gzip,br')),
+            section_history=os.getenv('SECTION_HISTORY', 'true').strip().lower() in ('1', 'true', 'yes')
         )
+        self.transaction_scope = os.getenv('DB_TRANSACTION_SCOPE', 'language').strip().lower()
+        self.commit_every = int(os.getenv('DB_COMMIT_EVERY', 50))
+
+        # Write-Behind: Fetch/Parse-Worker warten nicht auf die DB (None = synchron schreiben)
+        self.writer: Optional[DatabaseWriter] = None
+        if os.getenv('WRITE_BEHIND', 'true').strip().lower() in ('1', 'true', 'yes'):
+            self.writer = DatabaseWriter(
+                self.db, on_ack=self._on_unit_written,
+                queue_size=int(os.getenv('WRITER_QUEUE_SIZE', 32)),
+                batch_size=int(os.getenv('WRITER_BATCH_SIZE', 8)),
+                threads=int(os.getenv('WRITER_THREADS', 1))
+            )
 
         # Wikipedia API Client (für Medien & Summary-Fallback)
         self.wikipedia = WikipediaAPIClient(
@@ -227,25 +328,49 @@ class XNTOPImporter:
         self.delay_between_requests = float(os.getenv('DELAY_BETWEEN_REQUESTS', 0.35))
         self.max_workers = int(os.getenv('MAX_WORKERS', 3))
         self.languages_per_batch = int(os.getenv('LANGUAGES_PER_BATCH', 2))
+        self.image_srcset_widths = parse_widths(os.getenv('IMAGE_SRCSET_WIDTHS', '320,640,1024'))
+        self.excerpt_length = int(os.getenv('EXCERPT_LENGTH', 300))
+        self.cold_sections = content_storage.parse_section_keys(
+            os.getenv('COLD_SECTIONS', content_storage.DEFAULT_COLD_SECTIONS))
+        self.large_table_min_rows = int(os.getenv('LARGE_TABLE_MIN_ROWS', 25))
+        self.skip_unchanged = os.getenv('SKIP_UNCHANGED_SECTIONS', 'true').strip().lower() in ('1', 'true', 'yes')
 
         # Stats
         self.stats = {
             'countries_processed': 0,
             'languages_processed': 0,
             'contents_imported': 0,
+            'contents_unchanged': 0,
             'media_imported': 0,
+            'facts_imported': 0,
             'errors': 0
         }
 
         # Progress
         self.progress = ProgressTracker()
 
-        # Performance
-        self._last_request_time = 0
+        # Performance: Mindestabstand zwischen Requests, gemeinsam für resolve und fetch
+        self._last_request_time = 0.0
+        self._request_lock = threading.Lock()
 
         # Content-Type-IDs (gefüllt bei setup_database)
         self.content_type_ids: Dict[str, int] = {}
 
+        # (country_id, lang, content_type_id) → (content_hash, storage_tier); unveränderte
+        # Abschnitte werden lokal erkannt und gar nicht erst an die DB geschickt
+        self.content_hashes: Dict[Tuple[int, str, int], Tuple[str, str]] = {}
+
+        # Stufen resolve → fetch → parse mit begrenzten Queues; geschrieben wird über self.writer
+        self.pipeline = self._build_pipeline()
+
+        # Globale Steuerung: feste Zahl Länder-Sprachen unterwegs, Länder werden asynchron
+        # abgeschlossen (_on_country_done) – kein Warten auf die langsamste Sprache eines Landes
+        self.scheduler = Scheduler(self.pipeline, int(os.getenv('MAX_IN_FLIGHT', 16)),
+                                   on_done=self._on_task_done, on_group_done=self._on_country_done)
+        self._stats_lock = threading.Lock()
+        self._country_names: Dict[str, str] = {}
+        self._progress_totals: Tuple[int, int] = (0, 0)
+
     # ──────────────────────────────────────────────────────────────────────
     # Setup
     # ──────────────────────────────────────────────────────────────────────
@@ -277,27 +402,29 @@ class XNTOPImporter:
 
         # Map IDs laden
         self.content_type_ids = self._load_content_type_ids()
+
+        if self.skip_unchanged:
+            # Sprachen im Bulk-Load vollständig schreiben (die Ladetabelle startet leer)
+            self.content_hashes = self.db.load_content_hashes(
+                [code for code in SUPPORTED_LANGUAGES.keys() if code not in self.db.load_tables])
+            logger.info(f"Content-Hash-Index geladen: {len(self.content_hashes)} Abschnitte")
         return self.content_type_ids["overview"]
 
     def _load_content_type_ids(self) -> Dict[str, int]:
-        # einfache Hilfsabfrage über DatabaseManager wäre besser; hier minimalistisch:
-        # Wir nehmen an, DatabaseManager hat bereits eine Methode upsert + evtl. get_id.
-        # Wenn nicht vorhanden, hinterlegen wir ein statisches Mapping in DB-Seite.
-        # Für jetzigen Kontext: wir holen sie pragmatisch über private Connection:
-        with self.db.connection.cursor() as cur:
-            cur.execute("SELECT id, key FROM content_types")
-            rows = cur.fetchall()
-        return {k: i for i, k in rows}
+        rows = self.db.execute_query("SELECT id, key FROM content_types")
+        return {r['key']: r['id'] for r in rows}
 
     # ──────────────────────────────────────────────────────────────────────
     # Rate Limiting
     # ──────────────────────────────────────────────────────────────────────
     def _rate_limited_request(self):
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < self.delay_between_requests:
-            time.sleep(self.delay_between_requests - elapsed)
-        self._last_request_time = time.time()
+        # Zeitfenster unter dem Lock reservieren, geschlafen wird außerhalb
+        with self._request_lock:
+            now = time.monotonic()
+            slot = max(now, self._last_request_time + self.delay_between_requests)
+            self._last_request_time = slot
+        if slot > now:
+            time.sleep(slot - now)
 
     # ──────────────────────────────────────────────────────────────────────
     # Wikipedia Helpers (Titel, HTML, Lead)
@@ -562,201 +689,286 @@ class XNTOPImporter:
     # ──────────────────────────────────────────────────────────────────────
     # Kern: Import pro Sprache
     # ──────────────────────────────────────────────────────────────────────
-    def _process_language_for_country(
-        self, country_id: int, country_name: str, iso_code: str, wikipedia_slug: str,
-        lang_code: str, lang_name: str, overview_type_id: int, qid_hint: Optional[str] = None
-    ) -> Dict[str, Any]:
+    def _write_scope(self):
+        """
+        Transaktionsumfang der Schreibphase einer Länder-Sprache:
+          language   – alles oder nichts (Leser sehen nie halb aktualisierte Seiten)
+          operations – Zwischen-Commit alle DB_COMMIT_EVERY Schreiboperationen
+          statement  – jede Operation committet einzeln (altes Verhalten)
+        """
+        if self.transaction_scope == 'language':
+            return self.db.transaction()
+        if self.transaction_scope == 'operations':
+            return self.db.transaction(commit_every=self.commit_every)
+        return nullcontext()
+
+    def _section_unchanged(self, country_id: int, lang_code: str, content_type_id: int,
+                           digest: str, tier: str) -> bool:
+        """Gleicher Hash und gleiche Ablage wie zuletzt committet → nicht erneut senden"""
+        return self.skip_unchanged and self.content_hashes.get((country_id, lang_code, content_type_id)) == (digest, tier)
+
+    def _remember_hashes(self, sections: List[SectionWrite]):
+        """Hash-Index nach erfolgreichem Commit nachziehen"""
+        for section in sections:
+            key = (section.country_id, section.language_code, section.content_type_id)
+            self.content_hashes[key] = (section.content_hash, 'cold' if section.cold else 'hot')
+
+    def _submit_unit(self, unit: WriteUnit):
+        """Write-Behind-Queue (blockiert bei voller Queue) oder synchron im Transaktionsumfang"""
+        if self.writer and self.writer.running:
+            self.writer.submit(unit)
+            return
         try:
-            if self.progress.is_operation_completed(iso_code, lang_code):
-                return {'status': 'skipped', 'lang_code': lang_code, 'reason': 'already_completed'}
+            with self._write_scope():
+                counts = apply_units(self.db, [unit])[0]
+            outcome = {'ok': True, 'error': None, 'counts': counts}
+        except Exception as e:
+            outcome = {'ok': False, 'error': str(e), 'counts': {}}
+        self._on_unit_written(unit, outcome)
+
+    def _on_unit_written(self, unit: WriteUnit, outcome: Dict[str, Any]):
+        """Bestätigung nach dem Commit: erst jetzt gilt die Länder-Sprache als erledigt"""
+        if not outcome['ok']:
+            self._count('errors')
+            logger.error(f"  ✗ {unit.iso_code}/{unit.language_code}: nicht geschrieben ({outcome['error']})")
+            duration_ms = next((l.duration_ms for l in unit.sync_logs), None)
+            self.db.log_sync(unit.country_id, unit.language_code, 'wikipedia', 'error',
+                             duration_ms, f"write: {outcome['error']}")
+            return
+        counts = outcome['counts']
+        self._count('contents_imported', counts.get('sections', 0))
+        self._count('facts_imported', counts.get('facts', 0))
+        self._count('media_imported', counts.get('media', 0))
+        self._remember_hashes(unit.sections)
+        self.progress.mark_operation_completed(unit.iso_code, unit.language_code)
+        self._complete_country(unit.iso_code)
+
+    def _count(self, key: str, n: int = 1):
+        """Statistik-Zähler (Pipeline-, Writer- und Hauptthread zählen gleichzeitig)"""
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _complete_country(self, iso_code: str):
+        """Land abschließen, sobald alle Sprachen erledigt sind (einmalig)"""
+        with self._stats_lock:
+            if self.progress.is_country_completed(iso_code):
+                return
+            if not all(self.progress.is_operation_completed(iso_code, code) for code in SUPPORTED_LANGUAGES.keys()):
+                return
+            self.progress.mark_country_completed(iso_code)
+        name = self._country_names.get(iso_code, iso_code)
+        logger.info(f"Land {name} ({iso_code}) vollständig abgeschlossen")
 
-            wiki_lang = WIKIPEDIA_LANGUAGE_CODES.get(lang_code, lang_code)
+    def _finish(self, task: 'LanguageTask', status: str, **extra) -> bool:
+        """Beendet eine Länder-Sprache in der aktuellen Stufe (Pipeline: False = fertig)"""
+        task.result = dict({'status': status, 'lang_code': task.lang_code}, **extra)
+        return False
 
-            # 1) Korrekte Seitentitel + QID
-            try:
-                local_title, qid = self._resolve_title_and_qid(country_name, wiki_lang, qid_hint)
-            except Exception as e:
-                logger.error(f"Error resolving title for {country_name} ({lang_code}): {e}")
-                self.db.log_sync(country_id, lang_code, 'wikipedia', 'title_resolve_error')
-                return {'status': 'error', 'lang_code': lang_code, 'error': f'title_resolve: {str(e)}'}
-            
-            if not local_title:
-                self.db.log_sync(country_id, lang_code, 'wikipedia', 'no_title')
-                return {'status': 'no_data', 'lang_code': lang_code}
-
-            # 2) Lead 1:1 (section=0, HTML)
-            try:
-                lead_html = self._fetch_lead_section_html(local_title, wiki_lang)
-            except Exception as e:
-                logger.error(f"Error fetching lead for {country_name} ({lang_code}): {e}")
-                lead_html = None
+    def _on_stage_error(self, task: 'LanguageTask', error: Exception):
+        """Unerwartete Exception einer Stufe → wie bisher: Log, sync_logs 'error', Ergebnis error"""
+        logger.error(f"Fehler beim Import von {task.country_name} ({task.lang_code}): {error}")
+        logger.error("Traceback: " + "".join(traceback.format_exception(type(error), error, error.__traceback__)))
+        self.db.log_sync(task.country_id, task.lang_code, 'wikipedia', 'error', task.elapsed_ms(), str(error))
+        self._finish(task, 'error', error=str(error))
 
-            # 3) Gesamter Artikel (Parsoid HTML) → Abschnitte
-            sections: Dict[str, str] = {}
-            try:
-                parsoid_html = self._fetch_parsoid_html(local_title, wiki_lang)
-                if parsoid_html:
-                    sections = self._split_sections_from_html(parsoid_html, wiki_lang)
-            except Exception as e:
-                logger.error(f"Error fetching/parsing parsoid for {country_name} ({lang_code}): {e}")
-                parsoid_html = None
-                sections = {}
+    def _resolve_stage(self, task: 'LanguageTask') -> bool:
+        """Stufe resolve: lokaler Artikeltitel + QID (Wikidata/Langlinks/Suche)"""
+        if self.progress.is_operation_completed(task.iso_code, task.lang_code):
+            return self._finish(task, 'skipped', reason='already_completed')
 
-            # Lead sicherstellen/überschreiben (Lead aus parse ist „gold standard")
-            if lead_html:
-                sections["overview"] = lead_html
+        try:
+            task.local_title, task.qid = self._resolve_title_and_qid(task.country_name, task.wiki_lang, task.qid_hint)
+        except Exception as e:
+            logger.error(f"Error resolving title for {task.country_name} ({task.lang_code}): {e}")
+            self.db.log_sync(task.country_id, task.lang_code, 'wikipedia', 'title_resolve_error', task.elapsed_ms(), str(e))
+            return self._finish(task, 'error', error=f'title_resolve: {str(e)}')
 
-            if not sections and not lead_html:
-                # Fallback: alter Summary-Client
-                try:
-                    wiki_data = self.wikipedia.get_country_data(local_title, wiki_lang)
-                    if wiki_data and isinstance(wiki_data, dict) and wiki_data.get('extract'):
-                        sections["overview"] = f"<p>{wiki_data['extract']}</p>"
-                except Exception as e:
-                    logger.error(f"Error fetching summary fallback for {country_name} ({lang_code}): {e}")
+        if not task.local_title:
+            self.db.log_sync(task.country_id, task.lang_code, 'wikipedia', 'no_title', task.elapsed_ms())
+            return self._finish(task, 'no_data')
+        return True
+
+    def _fetch_stage(self, task: 'LanguageTask') -> bool:
+        """Stufe fetch: Lead (section=0), Parsoid-HTML und Summary (Seiten-URL, Medien, Fallback)"""
+        try:
+            task.lead_html = self._fetch_lead_section_html(task.local_title, task.wiki_lang)
+        except Exception as e:
+            logger.error(f"Error fetching lead for {task.country_name} ({task.lang_code}): {e}")
+
+        try:
+            task.parsoid_html = self._fetch_parsoid_html(task.local_title, task.wiki_lang)
+        except Exception as e:
+            logger.error(f"Error fetching parsoid for {task.country_name} ({task.lang_code}): {e}")
+
+        # Einmal je Länder-Sprache (bisher je Verwendung ein eigener Abruf)
+        try:
+            summary = self.wikipedia.get_country_data(task.local_title, task.wiki_lang)
+            task.summary = summary if isinstance(summary, dict) else None
+        except Exception as e:
+            logger.error(f"Error fetching summary/media data for {task.country_name} ({task.lang_code}): {e}")
+        return True
+
+    def _parse_stage(self, task: 'LanguageTask') -> bool:
+        """Stufe parse: Abschnitte, Bilder, Tabellen, Infobox → WriteUnit an die Schreibstufe"""
+        country_id, country_name, lang_code, wiki_lang = task.country_id, task.country_name, task.lang_code, task.wiki_lang
+
+        # Gesamter Artikel (Parsoid HTML) → Abschnitte
+        sections: Dict[str, str] = {}
+        parsoid_html = task.parsoid_html
+        try:
+            if parsoid_html:
+                sections = self._split_sections_from_html(parsoid_html, wiki_lang)
+        except Exception as e:
+            logger.error(f"Error parsing parsoid for {country_name} ({lang_code}): {e}")
+            parsoid_html = None
+            sections = {}
+
+        wiki_revision = revision_storage.wikipedia_revision(parsoid_html)
 
-            if not sections:
-                self.db.log_sync(country_id, lang_code, 'wikipedia', 'no_content')
-                return {'status': 'no_data', 'lang_code': lang_code}
+        # Lead sicherstellen/überschreiben (Lead aus parse ist „gold standard")
+        if task.lead_html:
+            sections["overview"] = task.lead_html
 
-            # 4) Speichern (Overview + bekannte Keys)
-            page_url = None
+        if not sections and not task.lead_html:
+            # Fallback: alter Summary-Client
+            if task.summary and task.summary.get('extract'):
+                sections["overview"] = f"<p>{task.summary['extract']}</p>"
+
+        if not sections:
+            self.db.log_sync(country_id, lang_code, 'wikipedia', 'no_content', task.elapsed_ms())
+            return self._finish(task, 'no_data')
+
+        # Bilder-Markup einmalig beim Import optimieren (erstes Overview-Bild = Hero)
+        # Große wikitables → JSON (section_tables), im HTML bleibt ein Platzhalter
+        section_tables: Dict[str, List[Dict[str, Any]]] = {}
+        for key in list(sections.keys()):
             try:
-                w = self.wikipedia.get_country_data(local_title, wiki_lang)
-                if w and isinstance(w, dict):
-                    content_urls = w.get("content_urls")
-                    if content_urls and isinstance(content_urls, dict):
-                        desktop = content_urls.get("desktop")
-                        if desktop and isinstance(desktop, dict):
-                            page_url = desktop.get("page")
-                    if not page_url:
-                        page_url = w.get("page_url")
+                sections[key] = optimize_images(sections[key], self.image_srcset_widths, hero=(key == "overview"))
             except Exception as e:
-                logger.debug(f"Error getting page URL for {country_name} ({lang_code}): {e}")
-
-            order = [
-                "overview", "geography", "demography", "history", "politics",
-                "economy", "transport", "culture", "see_also", "literature", "external_links", "notes", "references"
-            ]
-            for key in order:
-                html = sections.get(key)
-                if not html:
-                    continue
-                ctid = self.content_type_ids.get(key)
-                if not ctid:
-                    continue
-                try:
-                    self.db.upsert_localized_content(
-                        country_id=country_id,
-                        language_code=lang_code,
-                        content_type_id=ctid,
-                        content=html,               # HTML inkl. Tabellen, Listen, Bilder-Wrapper etc.
-                        source_url=page_url or f"https://{wiki_lang}.wikipedia.org/wiki/{local_title.replace(' ', '_')}"
-                    )
-                    self.stats['contents_imported'] += 1
-                except Exception as e:
-                    msg = str(e)
-                    # 2) Fallback bei fehlender Constraint
-                    if "no unique or exclusion constraint matching the ON CONFLICT specification" in msg:
-                        try:
-                            with self.db.connection.cursor() as cur:
-                                # Eintrag suchen (NULL-sicher über COALESCE)
-                                cur.execute("""
-                                    SELECT id FROM localized_contents
-                                    WHERE country_id = %s
-                                    AND COALESCE(subregion_id,0) = 0
-                                    AND language_code = %s
-                                    AND content_type_id = %s
-                                    LIMIT 1
-                                """, (country_id, lang_code, content_type_id))
-                                row = cur.fetchone()
-                                if row and row[0]:
-                                    cur.execute("""
-                                        UPDATE localized_contents
-                                        SET content = %s,
-                                            source_url = %s,
-                                            updated_at = NOW()
-                                        WHERE id = %s
-                                    """, (html, source_url, row[0]))
-                                else:
-                                    cur.execute("""
-                                        INSERT INTO localized_contents
-                                            (country_id, subregion_id, language_code, content_type_id, content, source_url, updated_at)
-                                        VALUES (%s, NULL, %s, %s, %s, %s, NOW())
-                                    """, (country_id, lang_code, content_type_id, html, source_url))
-                            self.db.connection.commit()
-                            return
-                        except Exception as inner:
-                            raise inner
-                    # 3) sonst: echten Fehler weiterreichen, damit wir ihn sehen
-                    raise
-
-            # 5) Medien (Thumbnail / best image) – wie bisher
-            media_imported = 0
+                logger.debug(f"Bildoptimierung fehlgeschlagen für {country_name} ({lang_code}, {key}): {e}")
             try:
-                wiki_data_for_media = self.wikipedia.get_country_data(local_title, wiki_lang)
-                if wiki_data_for_media and isinstance(wiki_data_for_media, dict):
-                    if wiki_data_for_media.get('thumbnail'):
-                        try:
-                            media_id = self.db.upsert_media_asset(
-                                country_id=country_id,
-                                language_code=lang_code,
-                                title=f"Thumbnail für {country_name}",
-                                asset_type='thumbnail',
-                                url=wiki_data_for_media['thumbnail'],
-                                attribution='Wikipedia',
-                                source_url=wiki_data_for_media.get('page_url', '')
-                            )
-                            if media_id:
-                                media_imported += 1
-                        except Exception as e:
-                            logger.debug(f"Error saving thumbnail for {country_name} ({lang_code}): {e}")
-                    
-                    if wiki_data_for_media.get('image_url'):
-                        try:
-                            media_id = self.db.upsert_media_asset(
-                                country_id=country_id,
-                                language_code=lang_code,
-                                title=f"Bild für {country_name}",
-                                asset_type='image',
-                                url=wiki_data_for_media['image_url'],
-                                attribution='Wikipedia',
-                                source_url=wiki_data_for_media.get('page_url', '')
-                            )
-                            if media_id:
-                                media_imported += 1
-                        except Exception as e:
-                            logger.debug(f"Error saving image for {country_name} ({lang_code}): {e}")
+                sections[key], section_tables[key] = extract_large_tables(sections[key], self.large_table_min_rows)
             except Exception as e:
-                logger.error(f"Error fetching media data for {country_name} ({lang_code}): {e}")
+                logger.debug(f"Tabellenextraktion fehlgeschlagen für {country_name} ({lang_code}, {key}): {e}")
+
+        # Speichern (Overview + bekannte Keys)
+        page_url = None
+        w = task.summary
+        if w:
+            content_urls = w.get("content_urls")
+            if content_urls and isinstance(content_urls, dict):
+                desktop = content_urls.get("desktop")
+                if desktop and isinstance(desktop, dict):
+                    page_url = desktop.get("page")
+            if not page_url:
+                page_url = w.get("page_url")
+
+        order = [
+            "overview", "geography", "demography", "history", "politics",
+            "economy", "transport", "culture", "see_also", "literature", "external_links", "notes", "references"
+        ]
+        source_url = page_url or f"https://{wiki_lang}.wikipedia.org/wiki/{task.local_title.replace(' ', '_')}"
+        unit = WriteUnit(iso_code=task.iso_code, country_id=country_id, language_code=lang_code, status='success',
+                         local_title=task.local_title)
+        for key in order:
+            html = sections.get(key)
+            if not html:
+                continue
+            ctid = self.content_type_ids.get(key)
+            if not ctid:
+                continue
+            digest = content_storage.content_hash(html)
+            tier = 'cold' if key in self.cold_sections else 'hot'
+            if self._section_unchanged(country_id, lang_code, ctid, digest, tier):
+                self._count('contents_unchanged')
+                continue
+            unit.sections.append(SectionWrite(
+                country_id=country_id,
+                language_code=lang_code,
+                content_type_id=ctid,
+                key=key,
+                content=html,               # HTML inkl. Tabellen, Listen, Bilder-Wrapper etc.
+                source_url=source_url,
+                content_hash=digest,
+                text_stats=section_text_stats(html, self.excerpt_length),
+                cold=tier == 'cold',        # Einzelnachweise & Co. komprimiert auslagern
+                tables=section_tables.get(key, []),
+                wiki_revision=wiki_revision,
+            ))
+
+        # Infobox → country_facts (aus dem bereits geladenen Parsoid-HTML)
+        try:
+            for fact in extract_infobox_facts(parsoid_html, wiki_lang):
+                unit.facts.append(FactWrite(country_id, lang_code, fact['key'], fact['value'], fact['unit']))
+        except Exception as e:
+            logger.debug(f"Infobox-Fehler {country_name} ({lang_code}): {e}")
+
+        # Medien (Thumbnail / best image) – aus dem Summary der fetch-Stufe
+        if w:
+            if w.get('thumbnail'):
+                unit.media.append(MediaWrite(
+                    country_id=country_id,
+                    language_code=lang_code,
+                    title=f"Thumbnail für {country_name}",
+                    asset_type='thumbnail',
+                    url=w['thumbnail'],
+                    attribution='Wikipedia',
+                    source_url=w.get('page_url', '')
+                ))
+            if w.get('image_url'):
+                unit.media.append(MediaWrite(
+                    country_id=country_id,
+                    language_code=lang_code,
+                    title=f"Bild für {country_name}",
+                    asset_type='image',
+                    url=w['image_url'],
+                    attribution='Wikipedia',
+                    source_url=w.get('page_url', '')
+                ))
 
-            # 6) Zusatzbilder (Flagge/Wappen/Fallback)
-            try:
-                self.import_additional_images(country_id, country_name, lang_code)
-            except Exception as e:
-                logger.debug(f"Zusatzbilder-Fehler {country_name} ({lang_code}): {e}")
+        # Zusatzbilder (Flagge/Wappen/Fallback)
+        try:
+            unit.media.extend(self.additional_image_assets(country_id, country_name, lang_code))
+        except Exception as e:
+            logger.debug(f"Zusatzbilder-Fehler {country_name} ({lang_code}): {e}")
 
-            self.db.log_sync(country_id, lang_code, 'wikipedia', 'success')
-            return {'status': 'success', 'lang_code': lang_code, 'media_imported': media_imported}
+        # Schreibstufe: Write-Behind-Queue bzw. synchron; Fortschritt erst nach Commit (_on_unit_written)
+        unit.sync_logs.append(SyncLogWrite(country_id, lang_code, 'wikipedia', 'success', task.elapsed_ms()))
+        self._submit_unit(unit)
+        return self._finish(task, 'success')
 
-        except Exception as e:
-            logger.error(f"Fehler beim Import von {country_name} ({lang_code}): {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            self.db.log_sync(country_id, lang_code, 'wikipedia', 'error')
-            return {'status': 'error', 'lang_code': lang_code, 'error': str(e)}
+    def _build_pipeline(self) -> Pipeline:
+        """resolve (Wikidata/Suche) → fetch (Wikipedia) → parse (CPU); schreiben: DatabaseWriter"""
+        queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', 8))
+        return Pipeline([
+            Stage('resolve', self._resolve_stage, int(os.getenv('PIPELINE_RESOLVE_WORKERS', 2)), queue_size),
+            Stage('fetch', self._fetch_stage, int(os.getenv('PIPELINE_FETCH_WORKERS', self.languages_per_batch)), queue_size),
+            Stage('parse', self._parse_stage, int(os.getenv('PIPELINE_PARSE_WORKERS', 2)), queue_size),
+        ], on_error=self._on_stage_error)
+
+    def _writer_stage_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {'write': self.writer.stage_metrics()} if self.writer else {}
+
+    def _process_language_for_country(
+        self, country_id: int, country_name: str, iso_code: str, wikipedia_slug: str,
+        lang_code: str, lang_name: str, overview_type_id: int, qid_hint: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Eine Länder-Sprache durch alle Stufen im aufrufenden Thread (ohne Pipeline-Threads)"""
+        task = LanguageTask(country_id, country_name, iso_code, lang_code, overview_type_id, qid_hint)
+        return self.pipeline.run_inline(task).result().result
 
     # ──────────────────────────────────────────────────────────────────────
     # Country Import (alle Sprachen)
     # ──────────────────────────────────────────────────────────────────────
-    def import_country_data(self, country_data: Dict[str, Any], continent: str, overview_type_id: int):
+    def import_country_data(self, country_data: Dict[str, Any], continent: str,
+                            overview_type_id: int) -> List[Future]:
         country_name = country_data['name']
         iso_code = country_data['iso']
         wikipedia_slug = country_data.get('wikipedia_slug') or country_name.replace(' ', '_')
 
         if self.progress.is_country_completed(iso_code):
             logger.info(f"Überspringe {country_name} ({iso_code}) - bereits abgeschlossen")
-            return
+            return []
 
         logger.info(f"Importiere {country_name} ({iso_code}) aus {continent}")
 
@@ -766,10 +978,10 @@ class XNTOPImporter:
             name_en=country_name,
             continent=continent,
             has_subregions=False,
-            slug_en=wikipedia_slug.lower().replace(' ', '-'),
-            slug_de=wikipedia_slug.lower().replace(' ', '-')
+            slug_en=wikipedia_slug.lower().replace(' ', '-')
+            # slug_de kommt aus dem deutschen Titel (slug_storage.claim_slugs)
         )
-        self.stats['countries_processed'] += 1
+        self._count('countries_processed')
 
         # Sprachen
         language_items = list(SUPPORTED_LANGUAGES.items())
@@ -778,82 +990,75 @@ class XNTOPImporter:
         remaining_languages = [(code, name) for code, name in language_items if not self.progress.is_operation_completed(iso_code, code)]
         if not remaining_languages:
             self.progress.mark_country_completed(iso_code)
-            return
-
-        # Nebenläufig
-        with ThreadPoolExecutor(max_workers=min(self.languages_per_batch, len(remaining_languages))) as executor:
-            futures = []
-            for lang_code, lang_name in remaining_languages:
-                futures.append(executor.submit(
-                    self._process_language_for_country,
-                    country_id, country_name, iso_code, wikipedia_slug,
-                    lang_code, lang_name, overview_type_id
-                ))
-
-            for idx, fut in enumerate(futures, start=1):
-                try:
-                    result = fut.result()
-                    self.stats['languages_processed'] += 1
-                    st = result.get('status')
-                    lc = result.get('lang_code')
-                    if st == 'success':
-                        self.progress.mark_operation_completed(iso_code, lc)
-                        logger.info(f"  ✓ {lang_code} importiert")
-                    elif st in ('no_data', 'skipped'):
-                        self.progress.mark_operation_completed(iso_code, lc)
-                        logger.warning(f"  ⚠ {lang_code}: {st}")
-                    else:
-                        self.stats['errors'] += 1
-                        logger.error(f"  ✗ {lang_code}: {result.get('error', 'error')}")
-                except Exception as e:
-                    self.stats['errors'] += 1
-                    logger.error(f"  ✗ Unerwarteter Fehler: {e}")
-
-        # Land abschließen, wenn alle Sprachen erledigt
-        done = all(self.progress.is_operation_completed(iso_code, code) for code in SUPPORTED_LANGUAGES.keys())
-        if done:
-            self.progress.mark_country_completed(iso_code)
-            logger.info(f"Land {country_name} ({iso_code}) vollständig abgeschlossen")
+            return []
+
+        # In die Pipeline einreihen, ohne auf die Sprachen zu warten: Ergebnisse in
+        # _on_task_done, Abschluss des Landes in _on_country_done
+        self._country_names[iso_code] = country_name
+        return self.scheduler.submit_group(iso_code, [
+            LanguageTask(country_id, country_name, iso_code, lang_code, overview_type_id)
+            for lang_code, _ in remaining_languages
+        ])
+
+    def _on_task_done(self, task: LanguageTask):
+        """Ergebnis einer Länder-Sprache (im Pipeline-Thread, der sie abgeschlossen hat)"""
+        self._count('languages_processed')
+        result = task.result
+        st = result.get('status')
+        lc = result.get('lang_code', task.lang_code)
+        if st == 'success':
+            # als erledigt markiert erst nach dem Commit (_on_unit_written)
+            logger.info(f"  ✓ {task.iso_code}/{lc} {'eingereiht' if self.writer and self.writer.running else 'importiert'}")
+        elif st in ('no_data', 'skipped'):
+            self.progress.mark_operation_completed(task.iso_code, lc)
+            logger.warning(f"  ⚠ {task.iso_code}/{lc}: {st}")
+        else:
+            self._count('errors')
+            logger.error(f"  ✗ {task.iso_code}/{lc}: {result.get('error', 'error')}")
+
+    def _on_country_done(self, iso_code: str):
+        """Alle Sprachen eines Landes haben die Pipeline durchlaufen"""
+        # gepufferte sync_logs als Gruppe committen
+        self.db.flush_sync_logs()
+        # ohne Write-Behind sind jetzt alle Sprachen geschrieben; sonst schließt _on_unit_written ab
+        self._complete_country(iso_code)
+        done = self.scheduler.get_metrics()['groups_completed']
+        if done % 5 == 0:
+            logger.info(self.progress.get_progress_summary(*self._progress_totals))
+            logger.info(f"Pipeline: {self.pipeline.format_metrics(self._writer_stage_metrics())}")
 
     # ──────────────────────────────────────────────────────────────────────
     # Medien (wie zuvor)
     # ──────────────────────────────────────────────────────────────────────
-    def import_additional_images(self, country_id: int, country_name: str, lang_code: str):
-        try:
-            iso_code = self.get_iso_code_for_country(country_name)
-            if iso_code:
-                flag_url = f"https://flagcdn.com/w320/{iso_code.lower()}.png"
-                media_id = self.db.upsert_media_asset(
+    def additional_image_assets(self, country_id: int, country_name: str, lang_code: str) -> List[MediaWrite]:
+        """Flagge, Wappen und Fallback-Landschaftsbild als Schreib-Records"""
+        assets: List[MediaWrite] = []
+        iso_code = self.get_iso_code_for_country(country_name)
+        if iso_code:
+            flag_url = f"https://flagcdn.com/w320/{iso_code.lower()}.png"
+            assets.append(MediaWrite(
+                country_id=country_id, language_code=lang_code,
+                title=f"Flagge von {country_name}", asset_type='flag',
+                url=flag_url, attribution='FlagCDN', source_url=f"https://flagcdn.com/{iso_code.lower()}"
+            ))
+
+        coat_url = self.get_coat_of_arms_url(country_name, lang_code)
+        if coat_url:
+            assets.append(MediaWrite(
+                country_id=country_id, language_code=lang_code,
+                title=f"Wappen von {country_name}", asset_type='coat_of_arms',
+                url=coat_url, attribution='Wikipedia Commons', source_url="https://commons.wikimedia.org"
+            ))
+
+        if not self.has_scenic_images(country_id, lang_code):
+            fallback_url = self.get_fallback_scenic_image(country_name)
+            if fallback_url:
+                assets.append(MediaWrite(
                     country_id=country_id, language_code=lang_code,
-                    title=f"Flagge von {country_name}", asset_type='flag',
-                    url=flag_url, attribution='FlagCDN', source_url=f"https://flagcdn.com/{iso_code.lower()}"
-                )
-                if media_id:
-                    self.stats['media_imported'] += 1
-
-            coat_url = self.get_coat_of_arms_url(country_name, lang_code)
-            if coat_url:
-                media_id = self.db.upsert_media_asset(
-                    country_id=country_id, language_code=lang_code,
-                    title=f"Wappen von {country_name}", asset_type='coat_of_arms',
-                    url=coat_url, attribution='Wikipedia Commons', source_url="https://commons.wikimedia.org"
-                )
-                if media_id:
-                    self.stats['media_imported'] += 1
-
-            if not self.has_scenic_images(country_id, lang_code):
-                fallback_url = self.get_fallback_scenic_image(country_name)
-                if fallback_url:
-                    media_id = self.db.upsert_media_asset(
-                        country_id=country_id, language_code=lang_code,
-                        title=f"Landschaftsbild von {country_name}", asset_type='scenic',
-                        url=fallback_url, attribution='Unsplash', source_url="https://unsplash.com"
-                    )
-                    if media_id:
-                        self.stats['media_imported'] += 1
-
-        except Exception as e:
-            logger.debug(f"Fehler bei Zusatzbildern {country_name}: {e}")
+                    title=f"Landschaftsbild von {country_name}", asset_type='scenic',
+                    url=fallback_url, attribution='Unsplash', source_url="https://unsplash.com"
+                ))
+        return assets
 
     # (Mapping & Fallback-Bilder wie in deiner Version unverändert)
     def get_iso_code_for_country(self, country_name: str) -> str:
@@ -911,25 +1116,25 @@ class XNTOPImporter:
 
         logger.info(f"Importiere {total_countries} Länder in {len(SUPPORTED_LANGUAGES)} Sprachen (gesamt {total_operations} Operationen)")
         logger.info(self.progress.get_progress_summary(total_countries, total_operations))
+        self._progress_totals = (total_countries, total_operations)
 
-        processed = 0
+        # Alle Länder-Sprachen des Katalogs durch einen globalen Scheduler: blockiert nur,
+        # solange MAX_IN_FLIGHT Sprachen unterwegs sind – nie auf ein einzelnes Land
         for continent, countries in continents.items():
             logger.info(f"\n=== Importiere {continent} ({len(countries)} Länder) ===")
             for country_data in countries:
-                iso_code = country_data['iso']
-                if self.progress.is_country_completed(iso_code):
-                    processed += 1
+                if self.progress.is_country_completed(country_data['iso']):
                     continue
                 try:
-                    with self.db.connection:
-                        self.import_country_data(country_data, continent, overview_type_id)
-                    processed += 1
-                    if processed % 5 == 0:
-                        logger.info(self.progress.get_progress_summary(total_countries, total_operations))
+                    self.import_country_data(country_data, continent, overview_type_id)
                 except Exception as e:
                     logger.error(f"Fehler beim Import von {country_data.get('name', '?')}: {e}")
-                    self.stats['errors'] += 1
+                    self._count('errors')
 
+        self.scheduler.wait()     # alle eingereihten Länder-Sprachen abgeschlossen
+        self.pipeline.close()     # Stufen-Threads beenden
+        if self.writer:
+            self.writer.close()   # Queue leeren, alle Acks abwarten
         self.progress.save_progress()
         logger.info("\n=== Import abgeschlossen ===")
         logger.info(self.progress.get_progress_summary(total_countries, total_operations))
@@ -943,20 +1148,124 @@ class XNTOPImporter:
         logger.info(f"Länder verarbeitet: {self.stats['countries_processed']}")
         logger.info(f"Sprachen verarbeitet: {self.stats['languages_processed']}")
         logger.info(f"Inhalte importiert: {self.stats['contents_imported']}")
+        logger.info(f"Inhalte unverändert (nicht gesendet): {self.stats['contents_unchanged']}")
         logger.info(f"Medien importiert: {self.stats['media_imported']}")
+        logger.info(f"Fakten importiert: {self.stats['facts_imported']}")
         logger.info(f"Fehler: {self.stats['errors']}")
+        if self.writer:
+            w = self.writer.get_metrics()
+            logger.info(f"DB-Writer: {w['units_written']} Units in {w['batches']} Batches, {w['units_failed']} fehlgeschlagen, "
+                        f"Backpressure {w['submit_blocked_seconds']:.1f} s, Queue max. {w['queue_depth_max']}")
+        sched = self.scheduler.get_metrics()
+        logger.info(f"Scheduler: {sched['completed']}/{sched['submitted']} Länder-Sprachen abgeschlossen, "
+                    f"max. {sched['in_flight_max']}/{sched['max_in_flight']} gleichzeitig, "
+                    f"Wartezeit auf freie Plätze {sched['wait_seconds']:.1f} s")
+        for name, m in dict(self.pipeline.get_metrics(), **self._writer_stage_metrics()).items():
+            logger.info(f"Stufe {name}: {m['processed']} verarbeitet ({m['throughput']:.2f}/s, {m['failed']} Fehler), "
+                        f"{m['workers']} Worker zu {m['utilization']:.0%} ausgelastet, Queue max. {m['queue_depth_max']}")
+        pool = self.db.get_pool_metrics()
+        logger.info(f"DB-Pool: {pool['checkouts']} Checkouts, Wartezeit Ø {pool['wait_seconds_avg'] * 1000:.1f} ms / "
+                    f"max {pool['wait_seconds_max'] * 1000:.1f} ms, max. {pool['in_use_max']}/{pool['max_connections']} belegt, "
+                    f"{pool['timeouts']} Timeouts")
 
     # ──────────────────────────────────────────────────────────────────────
     # Run
     # ──────────────────────────────────────────────────────────────────────
+    def _prepare_language_loads(self, full_rebuild: bool = False) -> List[str]:
+        """
+        LOAD_LANGUAGES: Ladetabellen anlegen; bei neuer Ladetabelle startet die Sprache von vorn.
+        full_rebuild: alle Sprachen (UNLOGGED, Indexe erst am Ende) plus Schattentabelle der Medien.
+        """
+        requested = list(SUPPORTED_LANGUAGES) if full_rebuild else \
+            partition_storage.parse_languages(os.getenv('LOAD_LANGUAGES', ''))
+        languages = []
+        for code in requested:
+            if code not in SUPPORTED_LANGUAGES:
+                logger.warning(f"LOAD_LANGUAGES: {code} ist keine unterstützte Sprache – ignoriert")
+                continue
+            if self.db.prepare_language_load(code, bulk=full_rebuild):
+                self.progress.reset_language(code)
+            languages.append(code)
+        # Medien hängen an den Units aller Sprachen: fehlen sie, laufen alle Sprachen neu
+        if full_rebuild and self.db.prepare_media_shadow():
+            for code in languages:
+                self.progress.reset_language(code)
+        return languages
+
+    def rollback_run(self, run_id: int) -> Dict[str, int]:
+        """
+        Setzt alle Abschnitte eines Importlaufs auf ihre Version vor dem Lauf zurück
+        (aus section_revisions, ohne Wikipedia-Abruf) – in einer Transaktion inkl. Seiten
+        und Änderungs-Events. Abschnitte, die ein späterer Lauf geändert hat, bleiben.
+        """
+        self.content_type_ids = self._load_content_type_ids()
+        section_keys = {ctid: key for key, ctid in self.content_type_ids.items()}
+        self.db.start_import_run('rollback', rollback_of=run_id)
+        with self.db.transaction():
+            if not self.db.mark_run_rolled_back(run_id):
+                logger.warning(f"Lauf {run_id} unbekannt oder bereits zurückgesetzt")
+                return {'restored': 0, 'deleted': 0, 'skipped': 0}
+            targets = self.db.section_rollback_targets(run_id)
+            sections = [dict(t, text_stats=section_text_stats(t['content'], self.excerpt_length))
+                        for t in targets['restore']]
+            if sections:
+                self.db.bulk_upsert_localized_contents(sections)
+            self.db.delete_sections(targets['delete'])
+
+            changes: Dict[tuple, List[str]] = {}
+            for c, l, t in [(s['country_id'], s['language_code'], s['content_type_id']) for s in sections] + targets['delete']:
+                changes.setdefault((c, l), []).append(section_keys.get(t, str(t)))
+            for key in self.db.rebuild_country_pages(list(changes)):
+                changes[tuple(key)].append('page')
+            self.db.notify_changes(changes)
+        result = {'restored': len(sections), 'deleted': len(targets['delete']), 'skipped': len(targets['skipped'])}
+        logger.info(f"Lauf {run_id} zurückgesetzt: {result}")
+        return result
+
     def run(self):
+        rollback_run_id = os.getenv('ROLLBACK_RUN_ID', '').strip()
         try:
             self.db.connect()
+            if rollback_run_id:
+                self.rollback_run(int(rollback_run_id))
+                self.db.finish_import_run()
+                return
+            self.db.start_import_run('main')
+            full_rebuild = os.getenv('FULL_REBUILD', 'false').strip().lower() in ('1', 'true', 'yes')
+            load_languages = self._prepare_language_loads(full_rebuild)
+            if self.writer:
+                self.writer.start()
+            self.pipeline.start()
             self.import_all_countries()
+            if load_languages:
+                # erst wenn alle Units committet sind, die Partitionen tauschen
+                if self.writer:
+                    self.writer.close()
+                if full_rebuild:
+                    min_ratio = shadow_storage.parse_ratio(os.getenv('REBUILD_MIN_RATIO'))
+                    if not self.db.finish_full_rebuild(load_languages, min_ratio):
+                        raise RuntimeError("Neuaufbau verworfen (REBUILD_MIN_RATIO) – Live-Tabellen unverändert")
+                else:
+                    for code in load_languages:
+                        self.db.attach_language_load(code)
+            grace_hours = float(os.getenv('BLOB_GC_GRACE_HOURS', 24))
+            if grace_hours >= 0:
+                self.db.gc_content_blobs(grace_hours)
+            retention_days = float(os.getenv('SYNC_LOG_RETENTION_DAYS', 180))
+            if retention_days >= 0:
+                self.db.maintain_sync_logs(retention_days)
+            if self.writer:
+                self.writer.close()
+            self.db.finish_import_run()
         except Exception as e:
             logger.error(f"Kritischer Fehler: {e}")
+            self.db.finish_import_run('failed')
             raise
         finally:
+            self.pipeline.close()
+            if self.writer:
+                self.writer.close()
+                self.progress.save_progress()
             self.db.disconnect()
 
 
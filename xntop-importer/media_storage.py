@@ -0,0 +1,82 @@
+"""
+Mengenbasiertes Speichern von Medien (gemeinsam für main.py und import_full_article.py)
+- Dedup im Speicher über die normalisierte URL (= Schlüssel von ux_media_unique)
+- Ein INSERT … ON CONFLICT (country_id, language_code, url) für den ganzen Batch
+  statt SAVEPOINT/INSERT/RELEASE je Bild
+- target: Schattentabelle media_assets_shadow beim vollständigen Neuaufbau (shadow_storage)
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+import psycopg2.extras
+
+from html_processing import normalize_image_url
+
+# Bestehende Zeilen nur anfassen, wenn sich Metadaten geändert haben; der Typ des
+# zuerst gespeicherten Eintrags bleibt erhalten (wie beim bisherigen "duplicate skipped")
+UPSERT_MEDIA_TEMPLATE_SQL = """
+INSERT INTO {target} AS m (country_id, language_code, title, type, url, attribution, source_url, uploaded_at)
+VALUES %s
+ON CONFLICT (country_id, language_code, url) DO UPDATE SET
+  title       = EXCLUDED.title,
+  attribution = EXCLUDED.attribution,
+  source_url  = EXCLUDED.source_url,
+  uploaded_at = NOW()
+WHERE (m.title, m.attribution, m.source_url)
+      IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.attribution, EXCLUDED.source_url)
+RETURNING (m.xmax = 0) AS inserted
+"""
+
+UPSERT_MEDIA_SQL = UPSERT_MEDIA_TEMPLATE_SQL.format(target="media_assets")
+
+UPSERT_MEDIA_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, NOW())"
+
+_TARGET_RE = re.compile(r"^media_assets(_shadow)?$")
+
+
+def upsert_media_sql(target: Optional[str] = None) -> str:
+    """UPSERT_MEDIA_SQL für media_assets oder die Schattentabelle (nur bekannte Namen)"""
+    if not target or target == "media_assets":
+        return UPSERT_MEDIA_SQL
+    if not _TARGET_RE.match(target):
+        raise ValueError(f"Ungültige Zieltabelle: {target}")
+    return UPSERT_MEDIA_TEMPLATE_SQL.format(target=target)
+
+
+def dedup_media(rows: List[tuple], normalize: Callable[[str], str] = normalize_image_url) -> List[tuple]:
+    """
+    rows: (country_id, language_code, title, type, url, attribution, source_url).
+    Normalisiert die URL, verwirft leere und behält je (country_id, language_code, url)
+    den ersten Eintrag.
+    """
+    seen: Dict[tuple, tuple] = {}
+    for country_id, lang, title, media_type, url, attribution, source_url in rows:
+        normalized = normalize(url or "")
+        if not normalized:
+            continue
+        key = (country_id, lang, normalized)
+        if key not in seen:
+            seen[key] = (country_id, lang, title, media_type, normalized, attribution, source_url)
+    return list(seen.values())
+
+
+def bulk_upsert_media(cur, rows: List[tuple],
+                      normalize: Callable[[str], str] = normalize_image_url,
+                      target: Optional[str] = None) -> Dict[str, int]:
+    """
+    Schreibt alle Medien in einem Statement (im Transaktionskontext des Aufrufers).
+    target: Schattentabelle statt media_assets.
+    Liefert {'inserted', 'updated', 'unchanged', 'skipped'}.
+    """
+    unique = dedup_media(rows, normalize)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': len(rows) - len(unique)}
+    if not unique:
+        return counts
+    result = psycopg2.extras.execute_values(
+        cur, upsert_media_sql(target), unique, template=UPSERT_MEDIA_TEMPLATE, page_size=len(unique), fetch=True
+    )
+    counts['inserted'] = sum(1 for (inserted,) in result if inserted)
+    counts['updated'] = len(result) - counts['inserted']
+    counts['unchanged'] = len(unique) - len(result)
+    return counts
@@ -0,0 +1,147 @@
+"""
+Denormalisiertes Read-Model je Länderseite (gemeinsam für main.py und import_full_article.py)
+- country_pages: ein JSONB-Dokument je (slug, language_code) mit Länderdaten,
+  Abschnitts-Metadaten, Fakten, Medien und Versions-Hash; Zeilen für slug_en,
+  slug_de und den kanonischen Slug der Sprache (country_slugs)
+- page_versions: ein Versions-Hash je (country_id, language_code) für ETag/304,
+  in derselben Transaktion wie die Inhalte
+- Aufbau serverseitig in einem Statement für beliebig viele Länder-Sprachen,
+  im Transaktionskontext des Schreibvorgangs (Seite und Daten sind konsistent)
+- Die API liest die Seite mit einem Index-Lookup (Slug über country_slugs, auch Weiterleitungen)
+- Optional gzip/br-Varianten geänderter Seiten (compression_storage)
+"""
+
+from typing import Iterable, List, Tuple
+
+import compression_storage
+
+# Zeitstempel von Fakten/Medien bleiben draußen, damit version_hash nur bei
+# inhaltlichen Änderungen wechselt (Abschnitte: updated_at ändert sich nur mit dem Hash).
+# page_versions (ETag je Länder-Sprache) wird im selben Statement gepflegt. Zeilen der
+# neu gebauten Länder-Sprachen unter Slugs, die nicht mehr dazugehören (Weiterleitung,
+# geänderter slug_de), werden entfernt; Slugs, die ein anderes Land übernimmt, aktualisiert
+# das UPSERT
+BUILD_PAGES_SQL = """
+WITH keys (country_id, language_code) AS (
+  SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[])
+),
+docs AS (
+  SELECT k.country_id, k.language_code, c.slug_en, c.slug_de, cs.slug AS slug_local,
+         jsonb_build_object(
+           'country', jsonb_build_object(
+             'id', c.id, 'iso_code', c.iso_code, 'name_en', c.name_en, 'continent', c.continent,
+             'has_subregions', c.has_subregions, 'slug_en', c.slug_en, 'slug_de', c.slug_de
+           ),
+           'language_code', k.language_code,
+           'slug', COALESCE(cs.slug, c.slug_en),
+           'sections', COALESCE((
+             SELECT jsonb_agg(jsonb_build_object(
+                      'id', lc.id,
+                      'content_type', jsonb_build_object('id', ct.id, 'key', ct.key, 'name_en', ct.name_en),
+                      'storage_tier', lc.storage_tier, 'content_bytes', lc.content_bytes,
+                      'content_hash', lc.content_hash, 'excerpt', lc.excerpt,
+                      'word_count', lc.word_count, 'reading_time_minutes', lc.reading_time_minutes,
+                      'source_url', lc.source_url, 'updated_at', lc.updated_at
+                    ) ORDER BY ct.id)
+             FROM localized_contents lc
+             JOIN content_types ct ON ct.id = lc.content_type_id
+             WHERE lc.country_id = k.country_id AND lc.language_code = k.language_code
+               AND lc.subregion_id IS NULL
+           ), '[]'::JSONB),
+           'facts', COALESCE((
+             SELECT jsonb_agg(jsonb_build_object(
+                      'key', cf.key, 'value', cf.value, 'unit', cf.unit,
+                      'value_numeric', cf.value_numeric, 'value_date', cf.value_date,
+                      'value_entity', cf.value_entity
+                    ) ORDER BY cf.key)
+             FROM country_facts cf
+             WHERE cf.country_id = k.country_id AND cf.language_code = k.language_code
+           ), '[]'::JSONB),
+           'media', COALESCE((
+             SELECT jsonb_agg(jsonb_build_object(
+                      'title', ma.title, 'type', ma.type, 'url', ma.url,
+                      'attribution', ma.attribution, 'source_url', ma.source_url
+                    ) ORDER BY ma.type, ma.url)
+             FROM media_assets ma
+             WHERE ma.country_id = k.country_id AND ma.language_code = k.language_code
+           ), '[]'::JSONB)
+         ) AS doc
+  FROM keys k
+  JOIN countries c ON c.id = k.country_id
+  LEFT JOIN country_slugs cs
+    ON cs.country_id = k.country_id AND cs.language_code = k.language_code AND cs.is_canonical
+),
+versioned AS (
+  SELECT d.*, md5(d.doc::TEXT) AS version_hash FROM docs d
+),
+versions AS (
+  INSERT INTO page_versions AS v (country_id, language_code, version, changed_at)
+  SELECT country_id, language_code, version_hash, NOW() FROM versioned
+  ON CONFLICT (country_id, language_code) DO UPDATE SET
+    version    = EXCLUDED.version,
+    changed_at = NOW()
+  WHERE v.version IS DISTINCT FROM EXCLUDED.version
+),
+pages AS (
+  SELECT DISTINCT s.slug, d.language_code, d.country_id, d.doc, d.version_hash
+  FROM versioned d
+  CROSS JOIN LATERAL unnest(ARRAY[d.slug_en, d.slug_de, d.slug_local]) AS s (slug)
+  WHERE s.slug IS NOT NULL AND s.slug <> ''
+),
+stale AS (
+  DELETE FROM country_pages p
+  USING keys k
+  WHERE p.country_id = k.country_id AND p.language_code = k.language_code
+    AND NOT EXISTS (SELECT 1 FROM pages n WHERE n.slug = p.slug AND n.language_code = p.language_code)
+)
+INSERT INTO country_pages AS p (slug, language_code, country_id, document, version_hash, built_at)
+SELECT slug, language_code, country_id, doc || jsonb_build_object('version', version_hash), version_hash, NOW()
+FROM pages
+ON CONFLICT (slug, language_code) DO UPDATE SET
+  country_id   = EXCLUDED.country_id,
+  document     = EXCLUDED.document,
+  version_hash = EXCLUDED.version_hash,
+  built_at     = NOW(),
+  document_gzip = NULL,
+  document_br   = NULL
+WHERE p.version_hash IS DISTINCT FROM EXCLUDED.version_hash
+   OR p.country_id <> EXCLUDED.country_id
+RETURNING country_id, language_code
+"""
+
+
+# Ohne gültige Version liefert die API keinen ETag (nie ein falsches 304)
+DELETE_VERSIONS_SQL = """
+DELETE FROM page_versions
+WHERE (country_id, language_code) IN (SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[]))
+"""
+
+
+def page_keys(keys: Iterable[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """(country_id, language_code) normalisiert und ohne Duplikate"""
+    return sorted({(cid, (lang or "en").strip().lower()) for cid, lang in keys})
+
+
+def rebuild_pages(cur, keys: Iterable[Tuple[int, str]], encodings: Iterable[str] = ()) -> List[Tuple[int, str]]:
+    """
+    Baut die Seiten-Dokumente der angegebenen Länder-Sprachen neu (im Transaktionskontext
+    des Aufrufers). Unveränderte Dokumente werden nicht geschrieben. Liefert die
+    (country_id, language_code), deren Seite sich geändert hat; für diese werden die
+    vorkomprimierten Varianten (encodings) neu erzeugt.
+    """
+    unique = page_keys(keys)
+    if not unique:
+        return []
+    cur.execute(BUILD_PAGES_SQL, ([cid for cid, _ in unique], [lang for _, lang in unique]))
+    changed = sorted(set(cur.fetchall()))
+    compression_storage.compress_pages(cur, changed, encodings)
+    return changed
+
+
+def invalidate_versions(cur, keys: Iterable[Tuple[int, str]]) -> int:
+    """Verwirft die Seiten-Versionen, wenn der Neuaufbau nach einer Inhaltsänderung scheitert"""
+    unique = page_keys(keys)
+    if not unique:
+        return 0
+    cur.execute(DELETE_VERSIONS_SQL, ([cid for cid, _ in unique], [lang for _, lang in unique]))
+    return cur.rowcount
@@ -0,0 +1,82 @@
+"""
+Sprachpartitionen von localized_contents (Bulk-Load neuer oder neu zu ladender Sprachen)
+- localized_contents ist nach language_code listenpartitioniert (localized_contents_<code>)
+- Bulk-Load einer Sprache: Abschnitte gehen in die abgetrennte Ladetabelle
+  localized_contents_load_<code>; attach_load() ersetzt die Partition der Sprache atomar
+  und baut die Seiten-Dokumente der Sprache in derselben Transaktion neu
+- bulk=True (FULL_REBUILD): UNLOGGED-Ladetabelle nur mit dem Unique-Constraint für das
+  UPSERT; finalize_load() macht sie vor dem Anhängen WAL-sicher und baut die Indexe
+- Namen und Logik liegen in SQL (localized_contents_prepare_load/_attach_load/_abort_load),
+  hier nur die Aufrufe
+"""
+
+import re
+from typing import Iterable, List, Tuple
+
+import page_storage
+
+PREPARE_LOAD_SQL = "SELECT localized_contents_prepare_load(%s, %s, %s)"
+FINALIZE_LOAD_SQL = "SELECT localized_contents_finalize_load(%s)"
+ATTACH_LOAD_SQL = "SELECT localized_contents_attach_load(%s)"
+ABORT_LOAD_SQL = "SELECT localized_contents_abort_load(%s)"
+LOAD_COUNTRIES_SQL = "SELECT DISTINCT country_id FROM localized_contents WHERE language_code = %s"
+
+
+def partition_suffix(language_code: str) -> str:
+    """Wie localized_contents_suffix() in SQL: 'zh-Hans' → 'zh_hans'"""
+    return re.sub(r"[^A-Za-z0-9]", "_", language_code or "").lower()
+
+
+def load_table_name(language_code: str) -> str:
+    return f"localized_contents_load_{partition_suffix(language_code)}"
+
+
+def parse_languages(value: str) -> List[str]:
+    """'fr, it' → ['fr', 'it'] (normalisiert, ohne Duplikate, Reihenfolge bleibt)"""
+    codes = [c.strip().lower() for c in (value or "").split(",")]
+    return list(dict.fromkeys(c for c in codes if c))
+
+
+def load_exists(cur, language_code: str) -> bool:
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (load_table_name(language_code),))
+    return cur.fetchone()[0]
+
+
+def load_empty(cur, language_code: str) -> bool:
+    cur.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {load_table_name(language_code)})")
+    return cur.fetchone()[0]
+
+
+def prepare_load(cur, language_code: str, reset: bool = False, bulk: bool = False) -> Tuple[str, bool]:
+    """
+    Legt die Ladetabelle der Sprache an (oder übernimmt die eines abgebrochenen Laufs).
+    Liefert (Tabellenname, neu angelegt); eine leere übernommene Tabelle gilt als neu
+    (UNLOGGED-Ladetabellen sind nach einem Absturz des Servers leer).
+    """
+    created = reset or not load_exists(cur, language_code)
+    cur.execute(PREPARE_LOAD_SQL, (language_code, reset, bulk))
+    table = cur.fetchone()[0]
+    return table, created or load_empty(cur, language_code)
+
+
+def finalize_load(cur, language_code: str) -> int:
+    """SET LOGGED, fehlende Indexe der Elterntabelle, ANALYZE; liefert die Abschnitte"""
+    cur.execute(FINALIZE_LOAD_SQL, (language_code,))
+    return cur.fetchone()[0]
+
+
+def attach_load(cur, language_code: str, encodings: Iterable[str] = ()) -> Tuple[int, int]:
+    """
+    Hängt die Ladetabelle als Partition an (im Transaktionskontext des Aufrufers) und
+    baut die Seiten der Sprache neu (encodings: vorkomprimierte Seiten-Varianten).
+    Liefert (Abschnitte, geänderte Seiten).
+    """
+    cur.execute(ATTACH_LOAD_SQL, (language_code,))
+    sections = cur.fetchone()[0]
+    cur.execute(LOAD_COUNTRIES_SQL, (language_code,))
+    keys = [(country_id, language_code) for (country_id,) in cur.fetchall()]
+    return sections, len(page_storage.rebuild_pages(cur, keys, encodings))
+
+
+def abort_load(cur, language_code: str):
+    cur.execute(ABORT_LOAD_SQL, (language_code,))
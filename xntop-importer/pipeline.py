@@ -0,0 +1,291 @@
+"""
+Gestufte Verarbeitung mit begrenzten Queues zwischen den Stufen
+- Jede Stufe hat eigene Worker-Threads und eine eigene Queue (resolve → fetch → parse;
+  das Schreiben übernimmt der DatabaseWriter mit seiner Queue)
+- handler(item) → True: weiter zur nächsten Stufe; False: Item fertig (z. B. kein Titel)
+- Volle Queue → die vorige Stufe bzw. submit() blockiert (Backpressure); die blockierte
+  Zeit wird je Stufe gemessen
+- submit() liefert ein Future mit dem Item nach der letzten Stufe; Exceptions eines
+  Handlers gehen an on_error(item, exc) (Item gilt dann als fertig) bzw. ins Future
+- run_inline(): dieselben Stufen nacheinander im aufrufenden Thread (ohne start())
+- Metriken je Stufe: Queue-Tiefe, Durchsatz, Auslastung → die Stufe mit der höchsten
+  Auslastung ist der Engpass (Netz, CPU oder DB)
+- Scheduler: hält über den ganzen Katalog höchstens max_in_flight Items in der Pipeline
+  und meldet Gruppen (Länder) asynchron als fertig – kein Warten pro Gruppe
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_MAX_IN_FLIGHT = 16
+
+_STOP = object()
+
+
+class Stage:
+    """Eine Stufe: begrenzte Eingangs-Queue + Worker-Threads"""
+
+    def __init__(self, name: str, handler: Callable[[Any], bool], workers: int = 1,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.metrics = {
+            'processed': 0,
+            'finished': 0,          # in dieser Stufe beendet (handler → False)
+            'failed': 0,
+            'busy_seconds': 0.0,
+            'blocked_seconds': 0.0,  # Warten auf Platz in der nächsten Queue
+            'queue_depth_max': 0,
+        }
+
+    def put(self, entry) -> float:
+        """Reiht ein; liefert die Zeit, die auf einen freien Platz gewartet wurde"""
+        started = time.monotonic()
+        self.queue.put(entry)
+        waited = time.monotonic() - started
+        with self.lock:
+            self.metrics['queue_depth_max'] = max(self.metrics['queue_depth_max'], self.queue.qsize())
+        return waited
+
+
+class Pipeline:
+    """
+    Stufen in fester Reihenfolge. start() startet alle Worker, close() lässt die Queues
+    Stufe für Stufe leerlaufen und beendet die Threads.
+    """
+
+    def __init__(self, stages: List[Stage], on_error: Optional[Callable[[Any, Exception], None]] = None):
+        if not stages:
+            raise ValueError("Pipeline ohne Stufen")
+        self.stages = stages
+        self.on_error = on_error
+        self._started_at: Optional[float] = None
+        self._closed = False
+        self.submit_blocked_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._started_at is not None and not self._closed
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._run, args=(index,), name=f"{stage.name}-{i}", daemon=True)
+                stage.threads.append(t)
+                t.start()
+        logger.info("Pipeline gestartet: " + " → ".join(f"{s.name}×{s.workers}" for s in self.stages))
+
+    def submit(self, item) -> Future:
+        """Reiht ein Item in die erste Stufe ein; blockiert, solange deren Queue voll ist"""
+        if not self.running:
+            raise RuntimeError("Pipeline läuft nicht (start() fehlt oder bereits geschlossen)")
+        future: Future = Future()
+        waited = self.stages[0].put((item, future))
+        with self.stages[0].lock:
+            self.submit_blocked_seconds += waited
+        return future
+
+    def run_inline(self, item) -> Future:
+        """Alle Stufen sofort im aufrufenden Thread; liefert ein erledigtes Future"""
+        future: Future = Future()
+        for stage in self.stages:
+            if not self._handle(stage, item, future):
+                break
+        if not future.done():
+            future.set_result(item)
+        return future
+
+    def close(self):
+        """Wartet, bis alle Items alle Stufen durchlaufen haben, und beendet die Threads"""
+        if not self.running:
+            return
+        self._closed = True
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for t in stage.threads:
+                t.join()
+        logger.info(f"Pipeline beendet: {self.format_metrics()}")
+
+    def _run(self, index: int):
+        stage = self.stages[index]
+        nxt = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            entry = stage.queue.get()
+            if entry is _STOP:
+                return
+            item, future = entry
+            if not self._handle(stage, item, future):
+                continue
+            if nxt is not None:
+                waited = nxt.put(entry)
+                with stage.lock:
+                    stage.metrics['blocked_seconds'] += waited
+            else:
+                future.set_result(item)
+
+    def _handle(self, stage: Stage, item, future: Future) -> bool:
+        """Führt den Handler aus; False = Item ist fertig (Future bereits gesetzt)"""
+        started = time.monotonic()
+        try:
+            proceed = stage.handler(item)
+            error = None
+        except Exception as e:
+            proceed, error = False, e
+        with stage.lock:
+            stage.metrics['processed'] += 1
+            stage.metrics['busy_seconds'] += time.monotonic() - started
+            if error is not None:
+                stage.metrics['failed'] += 1
+            elif not proceed:
+                stage.metrics['finished'] += 1
+        if error is None:
+            if not proceed:
+                future.set_result(item)
+            return proceed
+        if self.on_error is None:
+            future.set_exception(error)
+            return False
+        try:
+            self.on_error(item, error)
+        except Exception as e:
+            logger.error(f"Pipeline: Fehlerbehandlung in Stufe {stage.name} fehlgeschlagen: {e}")
+        future.set_result(item)
+        return False
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Je Stufe: Zähler, Queue-Tiefe, Durchsatz (Items/s) und Auslastung (0…1)"""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9) if self._started_at else 0.0
+        result = {}
+        for stage in self.stages:
+            with stage.lock:
+                m = dict(stage.metrics)
+            m['workers'] = stage.workers
+            m['queue_depth'] = stage.queue.qsize()
+            m['throughput'] = m['processed'] / elapsed if elapsed else 0.0
+            m['utilization'] = m['busy_seconds'] / (elapsed * stage.workers) if elapsed else 0.0
+            result[stage.name] = m
+        return result
+
+    def format_metrics(self, extra: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Eine Logzeile: Queue-Tiefe, Durchsatz und Auslastung je Stufe, Engpass"""
+        metrics = dict(self.get_metrics(), **(extra or {}))
+        parts = [
+            f"{name}: q={m.get('queue_depth', 0)}/{m.get('queue_depth_max', 0)} "
+            f"{m.get('throughput', 0.0):.2f}/s {m.get('utilization', 0.0):.0%}"
+            for name, m in metrics.items()
+        ]
+        return " | ".join(parts) + f" | Engpass: {bottleneck(metrics) or '-'}"
+
+
+def bottleneck(metrics: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """Stufe mit der höchsten Auslastung (None, solange nichts verarbeitet wurde)"""
+    busy = {name: m.get('utilization', 0.0) for name, m in metrics.items() if m.get('utilization', 0.0) > 0}
+    return max(busy, key=busy.get) if busy else None
+
+
+class Scheduler:
+    """
+    Globale Steuerung über alle Gruppen: submit_group() reiht die Items einer Gruppe ein
+    und blockiert nur, solange max_in_flight Items unterwegs sind. Callbacks laufen im
+    Thread, der das Item abschließt: on_done(item) je Item, on_group_done(group) nach dem
+    letzten Item einer Gruppe. wait() wartet auf alle Items.
+    """
+
+    def __init__(self, pipeline: Pipeline, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_group_done: Optional[Callable[[Hashable], None]] = None):
+        self.pipeline = pipeline
+        self.max_in_flight = max(1, max_in_flight)
+        self.on_done = on_done
+        self.on_group_done = on_group_done
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._cond = threading.Condition()
+        self._pending: Dict[Hashable, int] = {}
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'groups_completed': 0,
+            'in_flight': 0,
+            'in_flight_max': 0,
+            'wait_seconds': 0.0,   # Warten auf einen freien Platz
+        }
+
+    def submit_group(self, group: Hashable, items: List[Any]) -> List[Future]:
+        """Reiht alle Items der Gruppe ein (Pipeline bzw. run_inline, wenn sie nicht läuft)"""
+        if not items:
+            return []
+        with self._cond:
+            self._pending[group] = self._pending.get(group, 0) + len(items)
+        futures = []
+        for item in items:
+            started = time.monotonic()
+            self._slots.acquire()
+            with self._cond:
+                self.metrics['wait_seconds'] += time.monotonic() - started
+                self.metrics['submitted'] += 1
+                self.metrics['in_flight'] += 1
+                self.metrics['in_flight_max'] = max(self.metrics['in_flight_max'], self.metrics['in_flight'])
+            try:
+                future = self.pipeline.submit(item) if self.pipeline.running else self.pipeline.run_inline(item)
+            except Exception:
+                # nicht mehr eingereihte Items zählen nicht als offen
+                with self._cond:
+                    self._pending[group] -= len(items) - len(futures) - 1
+                self._release(group)
+                raise
+            future.add_done_callback(lambda f, g=group: self._completed(g, f))
+            futures.append(future)
+        return futures
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wartet, bis keine Items mehr unterwegs sind; False bei Timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.metrics['in_flight'] == 0, timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            m = dict(self.metrics)
+            m['groups_open'] = len(self._pending)
+        m['max_in_flight'] = self.max_in_flight
+        return m
+
+    def _completed(self, group: Hashable, future: Future):
+        if self.on_done is not None and future.exception() is None:
+            try:
+                self.on_done(future.result())
+            except Exception as e:
+                logger.error(f"Scheduler: Abschluss eines Items in {group} fehlgeschlagen: {e}")
+        elif future.exception() is not None:
+            logger.error(f"Scheduler: Item in {group} fehlgeschlagen: {future.exception()}")
+        if self._release(group) and self.on_group_done is not None:
+            try:
+                self.on_group_done(group)
+            except Exception as e:
+                logger.error(f"Scheduler: Abschluss von {group} fehlgeschlagen: {e}")
+
+    def _release(self, group: Hashable) -> bool:
+        """Gibt den Platz frei; True, wenn das letzte Item der Gruppe fertig ist"""
+        with self._cond:
+            self.metrics['in_flight'] -= 1
+            self.metrics['completed'] += 1
+            self._pending[group] -= 1
+            group_done = self._pending[group] == 0
+            if group_done:
+                del self._pending[group]
+                self.metrics['groups_completed'] += 1
+            self._cond.notify_all()
+        self._slots.release()
+        return group_done
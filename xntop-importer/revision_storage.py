@@ -0,0 +1,349 @@
+"""
+Append-only Versionshistorie der Abschnitte (Audit, Rollback ohne erneuten Abruf)
+- section_revisions: je (country_id, language_code, content_type_id) fortlaufende seq mit
+  content_hash, Wikipedia-Revision (wiki_revision) und Importlauf (import_runs)
+- Speicherformat: zlib; "full" = komplettes HTML, "delta" = Zeilen-Delta gegen die
+  vorherige Version (Kopierbereiche + neue Zeilen), "delete" = Abschnitt entfernt
+- Spätestens alle KEYFRAME_INTERVAL Versionen ein Vollstand → Rekonstruktion liest und
+  wendet höchstens so viele Deltas an
+- Basis des Deltas ist der bisherige Live-Inhalt (vor dem UPSERT gelesen); fehlt er in
+  der Historie (Bestand von vor der Historie), wird er zuerst als Vollstand übernommen
+- Rollback eines Laufs: je berührtem Abschnitt die Version vor dem Lauf, sofern der Lauf
+  noch die letzte Änderung ist (spätere Läufe gewinnen)
+"""
+
+import re
+import json
+import zlib
+import difflib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+KEYFRAME_INTERVAL = 20
+
+START_RUN_SQL = "INSERT INTO import_runs (source, rollback_of) VALUES (%s, %s) RETURNING id"
+
+FINISH_RUN_SQL = """
+UPDATE import_runs SET status = %s, finished_at = NOW()
+WHERE id = %s AND status = 'running'
+"""
+
+MARK_ROLLED_BACK_SQL = """
+UPDATE import_runs SET status = 'rolled_back', rolled_back_at = NOW()
+WHERE id = %s AND rolled_back_at IS NULL
+RETURNING id
+"""
+
+# Live-Inhalt nur für Abschnitte, deren Hash sich ändert (Basis des Deltas)
+HEADS_SQL = """
+WITH k (country_id, language_code, content_type_id, content_hash) AS (
+  SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[], %s::INTEGER[], %s::TEXT[])
+)
+SELECT k.country_id, k.language_code, k.content_type_id,
+       lc.content_hash,
+       CASE WHEN lc.content_hash IS DISTINCT FROM k.content_hash THEN COALESCE(lc.content, b.content) END,
+       CASE WHEN lc.content_hash IS DISTINCT FROM k.content_hash THEN cold.content_compressed END,
+       h.seq, h.content_hash, h.keyframe_seq
+FROM k
+LEFT JOIN localized_contents lc
+  ON lc.country_id = k.country_id AND lc.language_code = k.language_code
+ AND lc.content_type_id = k.content_type_id AND lc.subregion_id IS NULL
+LEFT JOIN content_blobs b ON b.hash = lc.blob_hash
+LEFT JOIN localized_content_cold cold ON cold.localized_content_id = lc.id
+LEFT JOIN LATERAL (
+  SELECT r.seq, r.content_hash,
+         (SELECT max(f.seq) FROM section_revisions f
+          WHERE f.country_id = k.country_id AND f.language_code = k.language_code
+            AND f.content_type_id = k.content_type_id AND f.kind <> 'delta') AS keyframe_seq
+  FROM section_revisions r
+  WHERE r.country_id = k.country_id AND r.language_code = k.language_code
+    AND r.content_type_id = k.content_type_id
+  ORDER BY r.seq DESC
+  LIMIT 1
+) h ON TRUE
+"""
+
+INSERT_REVISIONS_SQL = """
+INSERT INTO section_revisions (
+  country_id, language_code, content_type_id, seq, kind, content_hash,
+  wiki_revision, run_id, payload, raw_bytes, stored_bytes
+) VALUES %s
+"""
+
+# Kette je Ziel: letzter Vollstand (oder delete) bis zur gewünschten seq
+CHAINS_SQL = """
+WITH t (country_id, language_code, content_type_id, seq) AS (
+  SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[], %s::INTEGER[], %s::INTEGER[])
+)
+SELECT t.country_id, t.language_code, t.content_type_id, r.kind, r.payload
+FROM t
+CROSS JOIN LATERAL (
+  SELECT max(f.seq) AS seq FROM section_revisions f
+  WHERE f.country_id = t.country_id AND f.language_code = t.language_code
+    AND f.content_type_id = t.content_type_id AND f.kind <> 'delta' AND f.seq <= t.seq
+) k
+JOIN section_revisions r
+  ON r.country_id = t.country_id AND r.language_code = t.language_code
+ AND r.content_type_id = t.content_type_id AND r.seq BETWEEN k.seq AND t.seq
+ORDER BY 1, 2, 3, r.seq
+"""
+
+FIND_REVISION_SQL = """
+SELECT max(seq) FROM section_revisions
+WHERE country_id = %s AND language_code = %s AND content_type_id = %s
+  AND (%s::TEXT IS NULL OR content_hash = %s)
+  AND (%s::BIGINT IS NULL OR wiki_revision = %s)
+"""
+
+# Version vor dem Lauf; is_head: der Lauf hat die letzte Änderung geschrieben
+ROLLBACK_TARGETS_SQL = """
+WITH touched AS (
+  SELECT country_id, language_code, content_type_id, min(seq) AS first_seq, max(seq) AS last_seq
+  FROM section_revisions
+  WHERE run_id = %s
+  GROUP BY 1, 2, 3
+)
+SELECT t.country_id, t.language_code, t.content_type_id,
+       (SELECT max(p.seq) FROM section_revisions p
+        WHERE p.country_id = t.country_id AND p.language_code = t.language_code
+          AND p.content_type_id = t.content_type_id AND p.seq < t.first_seq) AS restore_seq,
+       t.last_seq = (SELECT max(h.seq) FROM section_revisions h
+                     WHERE h.country_id = t.country_id AND h.language_code = t.language_code
+                       AND h.content_type_id = t.content_type_id) AS is_head,
+       lc.storage_tier, lc.source_url
+FROM touched t
+LEFT JOIN localized_contents lc
+  ON lc.country_id = t.country_id AND lc.language_code = t.language_code
+ AND lc.content_type_id = t.content_type_id AND lc.subregion_id IS NULL
+ORDER BY 1, 2, 3
+"""
+
+DELETE_SECTIONS_SQL = """
+DELETE FROM localized_contents
+WHERE subregion_id IS NULL
+  AND (country_id, language_code, content_type_id) IN (
+    SELECT * FROM unnest(%s::INTEGER[], %s::TEXT[], %s::INTEGER[])
+  )
+"""
+
+_REVISION_RE = re.compile(r"Special:Redirect/revision/(\d+)")
+
+SectionKey = Tuple[int, str, int]
+
+
+@dataclass
+class Head:
+    """Stand eines Abschnitts vor dem Schreiben (Live-Zeile + letzte Historienversion)"""
+    live_hash: Optional[str] = None
+    live_content: Optional[str] = None  # nur bei geändertem Hash gelesen
+    seq: int = 0
+    content_hash: Optional[str] = None
+    keyframe_seq: Optional[int] = None
+
+
+def wikipedia_revision(html: Optional[str]) -> Optional[int]:
+    """Revisions-ID aus Parsoid-HTML (<html about="…/Special:Redirect/revision/123">)"""
+    match = _REVISION_RE.search(html or "")
+    return int(match.group(1)) if match else None
+
+
+def _lines(text: str) -> List[str]:
+    return (text or "").splitlines(keepends=True)
+
+
+def encode_delta(base: str, new: str) -> List[Any]:
+    """Zeilen-Delta: [i, j] = Zeilen base[i:j] übernehmen, str = neue Zeilen"""
+    old_lines, new_lines = _lines(base), _lines(new)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: List[Any]) -> str:
+    old_lines = _lines(base)
+    return "".join("".join(old_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def pack(kind: str, content: Optional[str], base: Optional[str] = None) -> Optional[bytes]:
+    """Payload für kind (full/delta/delete)"""
+    if kind == "delete":
+        return None
+    if kind == "delta":
+        data = json.dumps(encode_delta(base, content), ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(data.encode("utf-8"), 9)
+    return zlib.compress((content or "").encode("utf-8"), 9)
+
+
+def unpack(kind: str, payload: Optional[bytes], base: Optional[str] = None) -> Optional[str]:
+    if kind == "delete":
+        return None
+    data = zlib.decompress(bytes(payload)).decode("utf-8")
+    return apply_delta(base or "", json.loads(data)) if kind == "delta" else data
+
+
+def encode_revision(content: str, base: Optional[str], since_keyframe: Optional[int]) -> Tuple[str, bytes]:
+    """
+    (kind, payload): Delta gegen base, solange die Kette kürzer als KEYFRAME_INTERVAL
+    ist und das Delta kleiner als der Vollstand ausfällt
+    """
+    full = pack("full", content)
+    if base is None or since_keyframe is None or since_keyframe + 1 >= KEYFRAME_INTERVAL:
+        return "full", full
+    delta = pack("delta", content, base)
+    return ("delta", delta) if len(delta) < len(full) else ("full", full)
+
+
+def _unnest(keys: Iterable[tuple], width: int) -> List[list]:
+    keys = list(keys)
+    return [[k[i] for k in keys] for i in range(width)]
+
+
+def start_run(cur, source: str, rollback_of: Optional[int] = None) -> int:
+    cur.execute(START_RUN_SQL, (source, rollback_of))
+    return cur.fetchone()[0]
+
+
+def finish_run(cur, run_id: int, status: str = "finished"):
+    cur.execute(FINISH_RUN_SQL, (status, run_id))
+
+
+def fetch_heads(cur, sections: List[Dict[str, Any]]) -> Dict[SectionKey, Head]:
+    """
+    sections: [{country_id, language_code, content_type_id, content_hash}] – vor dem UPSERT
+    lesen (im Transaktionskontext des Aufrufers)
+    """
+    keys = sorted({(s["country_id"], s["language_code"], s["content_type_id"], s["content_hash"])
+                   for s in sections})
+    if not keys:
+        return {}
+    cur.execute(HEADS_SQL, _unnest(keys, 4))
+    heads = {}
+    for cid, lang, ctid, live_hash, live, cold, seq, head_hash, keyframe_seq in cur.fetchall():
+        if live is None and cold is not None:
+            live = zlib.decompress(bytes(cold)).decode("utf-8")
+        heads[(cid, lang, ctid)] = Head(live_hash, live, seq or 0, head_hash, keyframe_seq)
+    return heads
+
+
+def revision_rows(sections: List[Dict[str, Any]], heads: Dict[SectionKey, Head],
+                  run_id: Optional[int]) -> List[tuple]:
+    """
+    Zeilen für INSERT_REVISIONS_SQL zu geschriebenen Abschnitten ({…, content, content_hash,
+    wiki_revision}). Ein Bestand, der noch nicht in der Historie steht, wird zuerst als
+    Vollstand ohne Lauf übernommen – so bleibt er per Rollback wiederherstellbar.
+    """
+    rows = []
+    for s in sections:
+        key = (s["country_id"], s["language_code"], s["content_type_id"])
+        head = heads.get(key) or Head()
+        if head.content_hash == s["content_hash"]:
+            continue  # steht bereits als letzte Version in der Historie (z. B. nur Tier-Wechsel)
+        seq, keyframe_seq, base = head.seq, head.keyframe_seq, None
+        run = run_id
+        if head.live_hash == s["content_hash"]:
+            run = None  # Inhalt unverändert, nur erstmals erfasst
+        elif head.live_content is not None:
+            if head.content_hash != head.live_hash:
+                seq += 1
+                keyframe_seq = seq
+                rows.append(key + (seq, "full", head.live_hash, None, None)
+                            + _payload_cols(pack("full", head.live_content), head.live_content))
+            base = head.live_content
+        seq += 1
+        kind, payload = encode_revision(s["content"], base,
+                                        None if keyframe_seq is None else seq - 1 - keyframe_seq)
+        rows.append(key + (seq, kind, s["content_hash"], s.get("wiki_revision"), run)
+                    + _payload_cols(payload, s["content"]))
+    return rows
+
+
+def _payload_cols(payload: Optional[bytes], content: Optional[str]) -> tuple:
+    raw = len((content or "").encode("utf-8")) if content is not None else 0
+    return (psycopg2.Binary(payload) if payload is not None else None, raw, len(payload or b""))
+
+
+def record_revisions(cur, sections: List[Dict[str, Any]], heads: Dict[SectionKey, Head],
+                     run_id: Optional[int]) -> int:
+    """Hängt die neuen Versionen an (im Transaktionskontext des Aufrufers)"""
+    rows = revision_rows(sections, heads, run_id)
+    if rows:
+        psycopg2.extras.execute_values(cur, INSERT_REVISIONS_SQL, rows, page_size=len(rows))
+    return len(rows)
+
+
+def record_deletes(cur, keys: List[SectionKey], heads: Dict[SectionKey, Head], run_id: Optional[int]) -> int:
+    rows = [
+        key + ((heads.get(key) or Head()).seq + 1, "delete", None, None, run_id, None, 0, 0)
+        for key in keys
+    ]
+    if rows:
+        psycopg2.extras.execute_values(cur, INSERT_REVISIONS_SQL, rows, page_size=len(rows))
+    return len(rows)
+
+
+def reconstruct_many(cur, targets: List[Tuple[int, str, int, int]]) -> Dict[SectionKey, Optional[str]]:
+    """(country_id, language_code, content_type_id, seq) → HTML der Version (None = gelöscht)"""
+    if not targets:
+        return {}
+    cur.execute(CHAINS_SQL, _unnest(targets, 4))
+    contents: Dict[SectionKey, Optional[str]] = {}
+    for cid, lang, ctid, kind, payload in cur.fetchall():
+        key = (cid, lang, ctid)
+        contents[key] = unpack(kind, payload, contents.get(key))
+    return contents
+
+
+def reconstruct(cur, key: SectionKey, seq: int) -> Optional[str]:
+    return reconstruct_many(cur, [key + (seq,)]).get(key)
+
+
+def find_revision(cur, key: SectionKey, content_hash: Optional[str] = None,
+                  wiki_revision: Optional[int] = None) -> Optional[int]:
+    """Letzte seq mit diesem content_hash und/oder dieser Wikipedia-Revision"""
+    cur.execute(FIND_REVISION_SQL, key + (content_hash, content_hash, wiki_revision, wiki_revision))
+    return cur.fetchone()[0]
+
+
+def rollback_targets(cur, run_id: int) -> Dict[str, Any]:
+    """
+    Abschnitte des Laufs → {'restore': [{country_id, language_code, content_type_id, content,
+    cold, source_url}], 'delete': [key], 'skipped': [key]} (skipped: später erneut geändert)
+    """
+    cur.execute(ROLLBACK_TARGETS_SQL, (run_id,))
+    rows = cur.fetchall()
+    targets = [(c, l, t, seq) for c, l, t, seq, head, _, _ in rows if head and seq is not None]
+    contents = reconstruct_many(cur, targets)
+    result: Dict[str, Any] = {"restore": [], "delete": [], "skipped": []}
+    for cid, lang, ctid, seq, head, tier, source_url in rows:
+        key = (cid, lang, ctid)
+        if not head:
+            result["skipped"].append(key)
+        elif seq is None or contents.get(key) is None:
+            result["delete"].append(key)
+        else:
+            result["restore"].append({
+                "country_id": cid, "language_code": lang, "content_type_id": ctid,
+                "content": contents[key], "cold": tier == "cold", "source_url": source_url,
+            })
+    return result
+
+
+def delete_sections(cur, keys: List[SectionKey]) -> int:
+    """Löscht Abschnitte, die der Lauf neu angelegt hat (Trigger räumen Blobs/Cold-Kopien)"""
+    if not keys:
+        return 0
+    cur.execute(DELETE_SECTIONS_SQL, _unnest(keys, 3))
+    return cur.rowcount
+
+
+def mark_rolled_back(cur, run_id: int) -> bool:
+    cur.execute(MARK_ROLLED_BACK_SQL, (run_id,))
+    return cur.fetchone() is not None
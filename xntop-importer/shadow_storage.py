@@ -0,0 +1,123 @@
+"""
+Vollständiger Neuaufbau über Schattentabellen (FULL_REBUILD)
+- localized_contents: alle Sprachen in UNLOGGED-Ladetabellen (partition_storage, bulk=True)
+- media_assets: Schattentabelle media_assets_shadow (UNLOGGED, nur Unique-Indexe für ON CONFLICT)
+- Abschluss außerhalb des Tauschs: SET LOGGED, übrige Indexe/Fremdschlüssel nachbauen,
+  ANALYZE (localized_contents_finalize_load / shadow_table_finalize)
+- Zeilenzahlen gegen die Live-Tabellen prüfen (check_counts), erst dann tauschen
+- Tausch in einer kurzen Transaktion: alle Partitionen anhängen, media_assets umbenennen,
+  page_versions der Länder-Sprachen entfernen; die Seiten baut der Aufrufer danach neu
+- Namen und DDL liegen in SQL (shadow_table_prepare/_finalize/_swap), hier nur die Aufrufe
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import page_storage
+import partition_storage
+
+logger = logging.getLogger(__name__)
+
+# Tabellen mit Schattentabelle (neben den Sprachpartitionen von localized_contents)
+SHADOW_TABLES = ("media_assets",)
+
+PREPARE_SHADOW_SQL = "SELECT shadow_table_prepare(%s, %s)"
+FINALIZE_SHADOW_SQL = "SELECT shadow_table_finalize(%s)"
+SWAP_SHADOW_SQL = "SELECT shadow_table_swap(%s)"
+SHADOW_EMPTY_SQL = "SELECT NOT EXISTS (SELECT 1 FROM {table})"
+SECTION_COUNTS_SQL = """
+SELECT language_code, count(*) FROM localized_contents
+WHERE language_code = ANY(%s) GROUP BY language_code
+"""
+MEDIA_COUNT_SQL = "SELECT count(*) FROM media_assets"
+PAGE_KEYS_SQL = """
+SELECT c.id, l.code FROM countries c CROSS JOIN unnest(%s::TEXT[]) AS l (code)
+ORDER BY c.id, l.code
+"""
+
+# Neuer Stand muss mindestens diesen Anteil der Live-Zeilen haben (0 = nicht prüfen)
+DEFAULT_MIN_RATIO = 0.9
+
+
+def shadow_table_name(table: str) -> str:
+    return f"{table}_shadow"
+
+
+def _check_table(table: str):
+    if table not in SHADOW_TABLES:
+        raise ValueError(f"Keine Schattentabelle für {table}")
+
+
+def prepare_shadow(cur, table: str, reset: bool = False) -> Tuple[str, bool]:
+    """
+    Legt die Schattentabelle an (oder übernimmt die eines abgebrochenen Laufs).
+    Liefert (Tabellenname, neu): auch eine leere übernommene Tabelle gilt als neu –
+    UNLOGGED-Tabellen sind nach einem Absturz des Servers leer.
+    """
+    _check_table(table)
+    cur.execute(PREPARE_SHADOW_SQL, (table, reset))
+    name = cur.fetchone()[0]
+    cur.execute(SHADOW_EMPTY_SQL.format(table=name))
+    return name, reset or cur.fetchone()[0]
+
+
+def finalize_shadow(cur, table: str) -> int:
+    """SET LOGGED, Indexe und Fremdschlüssel der Live-Tabelle; liefert die Zeilen"""
+    _check_table(table)
+    cur.execute(FINALIZE_SHADOW_SQL, (table,))
+    return cur.fetchone()[0]
+
+
+def live_counts(cur, languages: Iterable[str]) -> Dict[str, int]:
+    """Zeilen der Live-Tabellen: je Sprache (localized_contents) und je Schattentabelle"""
+    languages = list(languages)
+    cur.execute(SECTION_COUNTS_SQL, (languages,))
+    counts = {lang: 0 for lang in languages}
+    counts.update({lang: n for lang, n in cur.fetchall()})
+    cur.execute(MEDIA_COUNT_SQL)
+    counts["media_assets"] = cur.fetchone()[0]
+    return counts
+
+
+def check_counts(loaded: Dict[str, int], live: Dict[str, int],
+                 min_ratio: float = DEFAULT_MIN_RATIO) -> List[str]:
+    """
+    Vergleicht die neu geladenen Zeilen mit den Live-Tabellen (gleiche Schlüssel: Sprache
+    bzw. Tabellenname). Liefert die Beanstandungen; leer = Tausch erlaubt.
+    Ein leerer neuer Stand wird immer beanstandet, sofern live Zeilen hat.
+    """
+    problems = []
+    for name in sorted(loaded):
+        new, old = loaded[name], live.get(name, 0)
+        if old and (new == 0 or new < old * min_ratio):
+            problems.append(f"{name}: {new} statt bisher {old} Zeilen (Minimum {min_ratio:.0%})")
+    return problems
+
+
+def swap(cur, languages: Iterable[str], tables: Iterable[str] = SHADOW_TABLES) -> List[Tuple[int, str]]:
+    """
+    Tauscht alle Ladetabellen und Schattentabellen in der Transaktion des Aufrufers und
+    entfernt die page_versions der betroffenen Länder-Sprachen (kein ETag, bis die Seiten
+    neu gebaut sind). Liefert die neu zu bauenden (country_id, language_code).
+    """
+    languages = list(languages)
+    for lang in languages:
+        cur.execute(partition_storage.ATTACH_LOAD_SQL, (lang,))
+    for table in tables:
+        _check_table(table)
+        cur.execute(SWAP_SHADOW_SQL, (table,))
+    cur.execute(PAGE_KEYS_SQL, (languages,))
+    keys = [tuple(row) for row in cur.fetchall()]
+    page_storage.invalidate_versions(cur, keys)
+    return keys
+
+
+def parse_ratio(value: Optional[str]) -> float:
+    """REBUILD_MIN_RATIO: '0.9' → 0.9; ungültig → DEFAULT_MIN_RATIO"""
+    try:
+        ratio = float(value)
+    except (TypeError, ValueError):
+        if value:
+            logger.warning(f"Ungültiges REBUILD_MIN_RATIO '{value}' – verwende {DEFAULT_MIN_RATIO}")
+        return DEFAULT_MIN_RATIO
+    return min(max(ratio, 0.0), 1.0)
@@ -0,0 +1,97 @@
+"""
+Mehrsprachige Slugs (gemeinsam für main.py und import_full_article.py)
+- country_slugs: (slug, language_code) → country_id, eindeutiger Index
+- Slug aus dem lokalisierten Wikipedia-Titel; lateinische Diakritika werden entfernt,
+  andere Schriften (zh, hi, …) bleiben erhalten
+- Je Land und Sprache genau ein kanonischer Slug; ein geänderter Titel macht den
+  alten Slug zur Weiterleitung (is_canonical = FALSE) statt ihn zu löschen
+"""
+
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+import psycopg2.extras
+
+# Zeichen ohne NFKD-Zerlegung
+_TRANSLITERATION = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "þ": "th", "ı": "i",
+})
+
+_SEPARATORS = re.compile(r"-{2,}")
+
+# Alten kanonischen Slug zur Weiterleitung machen – nur wenn der neue Slug nicht
+# bereits kanonisch einem anderen Land gehört (sonst bliebe das Land ohne Slug)
+DEMOTE_SLUG_SQL = """
+UPDATE country_slugs SET is_canonical = FALSE, updated_at = NOW()
+WHERE country_id = %(country_id)s AND language_code = %(language_code)s
+  AND is_canonical AND slug <> %(slug)s
+  AND NOT EXISTS (
+    SELECT 1 FROM country_slugs o
+    WHERE o.slug = %(slug)s AND o.language_code = %(language_code)s
+      AND o.country_id <> %(country_id)s AND o.is_canonical
+  )
+"""
+
+# Kanonische Slugs anderer Länder werden nie übernommen, Weiterleitungen schon
+CLAIM_SLUG_SQL = """
+INSERT INTO country_slugs AS s (slug, language_code, country_id, is_canonical)
+VALUES (%(slug)s, %(language_code)s, %(country_id)s, TRUE)
+ON CONFLICT (slug, language_code) DO UPDATE SET
+  country_id   = EXCLUDED.country_id,
+  is_canonical = TRUE,
+  updated_at   = NOW()
+WHERE NOT s.is_canonical
+"""
+
+# countries.slug_de folgt dem kanonischen deutschen Slug (aus dem deutschen Titel)
+SYNC_SLUG_DE_SQL = """
+UPDATE countries c SET slug_de = s.slug, updated_at = CURRENT_TIMESTAMP
+FROM country_slugs s
+WHERE s.country_id = c.id AND s.language_code = 'de' AND s.is_canonical
+  AND c.id = ANY(%s) AND c.slug_de IS DISTINCT FROM s.slug
+"""
+
+
+def slugify(title: Optional[str]) -> str:
+    """'Côte d'Ivoire' → 'cote-d-ivoire', 'Österreich' → 'osterreich', '德国' → '德国'"""
+    text = unicodedata.normalize("NFKD", (title or "").strip().lower().translate(_TRANSLITERATION))
+    out = []
+    prev_ascii = False
+    for ch in text:
+        if unicodedata.category(ch).startswith("M"):
+            # Diakritika nur an lateinischen Buchstaben entfernen (Devanagari-Vokalzeichen bleiben)
+            if not prev_ascii:
+                out.append(ch)
+            continue
+        prev_ascii = ch.isascii()
+        out.append(ch if ch.isalnum() else "-")
+    slug = _SEPARATORS.sub("-", unicodedata.normalize("NFC", "".join(out))).strip("-")
+    return slug
+
+
+def slug_rows(rows: Iterable[Tuple[int, str, Optional[str]]]) -> List[dict]:
+    """(country_id, language_code, title) → Parameter für claim_slugs, ohne leere/doppelte"""
+    seen = {}
+    for country_id, lang, title in rows:
+        slug = slugify(title)
+        if slug:
+            key = (country_id, (lang or "en").strip().lower())
+            seen[key] = {"country_id": key[0], "language_code": key[1], "slug": slug}
+    return list(seen.values())
+
+
+def claim_slugs(cur, rows: Iterable[Tuple[int, str, Optional[str]]]) -> int:
+    """
+    Trägt den kanonischen Slug je (country_id, language_code, title) ein (im
+    Transaktionskontext des Aufrufers). Liefert die Zahl der verarbeiteten Slugs.
+    Deutsche Slugs werden zusätzlich als countries.slug_de übernommen.
+    """
+    params = slug_rows(rows)
+    if not params:
+        return 0
+    psycopg2.extras.execute_batch(cur, DEMOTE_SLUG_SQL + ";" + CLAIM_SLUG_SQL, params)
+    de_ids = sorted({p["country_id"] for p in params if p["language_code"] == "de"})
+    if de_ids:
+        cur.execute(SYNC_SLUG_DE_SQL, (de_ids,))
+    return len(params)
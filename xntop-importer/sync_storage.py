@@ -0,0 +1,94 @@
+"""
+Sync-Protokoll und kompakter Sync-Status (gemeinsam für main.py und import_full_article.py)
+- sync_logs: Rohprotokoll, monatlich nach synced_at partitioniert (Default-Partition fängt
+  Monate ohne eigene Partition auf)
+- sync_state: eine Zeile je (country_id, language_code) mit letztem Status, Zeitpunkten,
+  Revision, Dauer und Fehler; per UPSERT in derselben Transaktion wie die Logs
+- Retention: abgelaufene Monate werden in sync_logs_daily verdichtet und als ganze
+  Partition gelöscht (kein DELETE über die Rohdaten)
+"""
+
+from typing import List
+
+import psycopg2.extras
+
+SUCCESS_STATUSES = {"success"}
+
+INSERT_LOGS_SQL = """
+INSERT INTO sync_logs (country_id, language_code, source, status, duration_ms, error)
+VALUES %s
+"""
+
+# revision steigt mit jedem geschriebenen Stand (Listener erkennen daran Änderungen);
+# consecutive_failures wird bei Erfolg zurückgesetzt
+UPSERT_STATE_SQL = """
+INSERT INTO sync_state AS s (
+  country_id, language_code, source, status, last_attempt_at, last_success_at,
+  revision, duration_ms, error, consecutive_failures
+)
+VALUES %s
+ON CONFLICT (country_id, language_code) DO UPDATE SET
+  source               = EXCLUDED.source,
+  status               = EXCLUDED.status,
+  last_attempt_at      = EXCLUDED.last_attempt_at,
+  last_success_at      = COALESCE(EXCLUDED.last_success_at, s.last_success_at),
+  revision             = s.revision + 1,
+  duration_ms          = EXCLUDED.duration_ms,
+  error                = EXCLUDED.error,
+  consecutive_failures = CASE WHEN EXCLUDED.last_success_at IS NULL
+                              THEN s.consecutive_failures + 1 ELSE 0 END
+"""
+
+STATE_TEMPLATE = "(%s, %s, %s, %s, NOW(), CASE WHEN %s THEN NOW() END, 1, %s, %s, CASE WHEN %s THEN 0 ELSE 1 END)"
+
+ENSURE_PARTITIONS_SQL = "SELECT sync_logs_ensure_partitions(CURRENT_DATE, %s)"
+ROLLUP_AND_PRUNE_SQL = "SELECT sync_logs_rollup_and_prune(%s * INTERVAL '1 day')"
+
+# Fehlertexte gekürzt speichern (Tracebacks gehören ins Log, nicht in die Tabelle)
+MAX_ERROR_LENGTH = 2000
+
+
+def log_row(country_id: int, language_code: str, source: str, status: str,
+            duration_ms=None, error=None) -> tuple:
+    """Eine Zeile in INSERT_LOGS_SQL-Reihenfolge"""
+    if error is not None:
+        error = str(error)[:MAX_ERROR_LENGTH]
+    return (country_id, language_code, source, status,
+            int(duration_ms) if duration_ms is not None else None, error)
+
+
+def state_rows(rows: List[tuple]) -> List[tuple]:
+    """Letzte Zeile je (country_id, language_code) in STATE_TEMPLATE-Reihenfolge"""
+    latest = {}
+    for r in rows:
+        country_id, language_code, source, status, duration_ms, error = log_row(*r)
+        if country_id is None or not language_code:
+            continue
+        ok = status in SUCCESS_STATUSES
+        latest[(country_id, language_code)] = (
+            country_id, language_code, source, status, ok, duration_ms, None if ok else error, ok
+        )
+    return list(latest.values())
+
+
+def record_syncs(cur, rows: List[tuple]) -> int:
+    """
+    rows: (country_id, language_code, source, status[, duration_ms[, error]]). Schreibt die
+    Rohlogs und aktualisiert sync_state in einem Rutsch (im Transaktionskontext des Aufrufers).
+    """
+    if not rows:
+        return 0
+    logs = [log_row(*r) for r in rows]
+    psycopg2.extras.execute_values(cur, INSERT_LOGS_SQL, logs, page_size=len(logs))
+    states = state_rows(logs)
+    if states:
+        psycopg2.extras.execute_values(cur, UPSERT_STATE_SQL, states,
+                                       template=STATE_TEMPLATE, page_size=len(states))
+    return len(logs)
+
+
+def maintain_logs(cur, retention_days: float, months_ahead: int = 2) -> int:
+    """Legt kommende Monatspartitionen an und verdichtet/löscht abgelaufene; liefert gelöschte Partitionen"""
+    cur.execute(ENSURE_PARTITIONS_SQL, (months_ahead,))
+    cur.execute(ROLLUP_AND_PRUNE_SQL, (retention_days,))
+    return cur.fetchone()[0]
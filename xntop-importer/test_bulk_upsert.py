@@ -0,0 +1,29 @@
+"""
+Offline-Tests für den Bulk-UPSERT der Abschnitte (COPY-Staging)
+"""
+
+import content_storage
+
+
+def test_bulk_stage_rows():
+    """COPY-Payload für den Bulk-UPSERT (Escaping, NULL, Cold-Blob, Blob-Hash)"""
+    hot = content_storage.stage_row(1, " DE ", 2, "<p>a\tb\\c\nd</p>", "https://x", {"word_count": 3})
+    cold = content_storage.stage_row(1, "de", 3, "<ol>refs</ol>", cold=True)
+    blob = content_storage.STAGE_COLUMNS.index("content_compressed")
+    assert hot[1] == "de" and hot[6] == "hot" and hot[blob] is None
+    assert cold[3] is None and cold[6] == "cold"
+    assert content_storage.decompress_content(cold[blob]) == "<ol>refs</ol>"
+    # Hot-HTML content-adressiert (sha256), Cold-Abschnitte ohne Blob
+    assert hot[-1] == content_storage.blob_hash("<p>a\tb\\c\nd</p>") and len(hot[-1]) == 64
+    assert cold[-1] is None
+
+    lines = content_storage.copy_payload([hot, cold]).getvalue().split("\n")
+    fields = lines[0].split("\t")
+    assert len(fields) == len(content_storage.STAGE_COLUMNS)
+    assert fields[3] == "<p>a\\tb\\\\c\\nd</p>"
+    assert fields[8] == "\\N"
+    assert lines[1].split("\t")[blob].startswith("\\\\x")
+
+
+if __name__ == "__main__":
+    test_bulk_stage_rows()
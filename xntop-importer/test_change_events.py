@@ -0,0 +1,193 @@
+"""
+Offline-Tests für die Änderungs-Events (NOTIFY/LISTEN)
+"""
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+import psycopg2
+
+import change_events
+from change_events import ChangeEvent, ChangeListener
+import import_full_article
+
+
+class ScriptedCursor:
+    """Antwortet je nach Statement (erster passender Teilstring in conn.responses)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.connection = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, query, params=None):
+        return query.encode("utf-8") if isinstance(query, str) else query
+
+    def execute(self, query, params=None):
+        query = query.decode("utf-8") if isinstance(query, bytes) else query
+        self.conn.executed.append((" ".join(query.split()), params))
+        self.rows = next((rows for part, rows in self.conn.responses if part in query), [])
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class ScriptedConnection:
+    encoding = "UTF8"
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.executed = []
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_change_events():
+    """Änderungs-Events: Payload je Länder-Sprache, ungültige Payloads werden verworfen"""
+    payloads = change_events.event_payloads({
+        (2, "en"): ["page", "overview", "page"],
+        (1, "de"): [],
+    })
+    assert payloads == [{"country_id": 2, "lang": "en", "keys": ["overview", "page"]}]
+    assert change_events.notify_changes(None, {(1, "de"): []}) == 0
+
+    event = change_events.parse_payload(
+        '{"country_id": 2, "lang": "en", "keys": ["page"], "version": "abc", "revision": 7}')
+    assert (event.country_id, event.language_code, event.keys, event.revision) == (2, "en", ["page"], 7)
+    assert not event.reconciled
+    assert change_events.parse_payload("kein json") is None
+    assert change_events.parse_payload('{"lang": "en"}') is None
+
+
+def import_article(upsert_rows):
+    """Ein Länder-Sprach-Import über import_full_article ohne Netz; liefert die Statements"""
+    conn = ScriptedConnection([
+        ("FROM wikipedia_titles", [("Deutschland",)]),
+        ("ON CONFLICT ON CONSTRAINT uq_localized_content", upsert_rows),
+        ("SELECT id FROM localized_contents", [(11,)]),
+    ])
+    html = "<p>Deutschland ist ein Bundesstaat in Mitteleuropa.</p>"
+    with mock.patch.multiple(import_full_article, SECTION_HISTORY=False, PRECOMPRESS_ENCODINGS=(),
+                             REQUEST_DELAY=0, CHANGE_EVENTS_CHANNEL="xntop_changes",
+                             fetch_parsoid_html=lambda title, lang: html,
+                             fetch_summary_plain=lambda title, lang: (None, "https://de.wikipedia.org/wiki/Deutschland"),
+                             wikidata_facts=lambda qid, lang: {}):
+        import_full_article.import_one_country_language(
+            conn, {"id": 1, "name_en": "Germany", "wikidata_id": "Q183"}, "de", {"overview": 3})
+    return conn.executed
+
+
+def test_import_full_article_unchanged_section():
+    """Unveränderter Abschnitt (UPSERT ohne Zeile) → 'no_change', kein NOTIFY"""
+    executed = import_article([])
+    assert any(query.startswith("SELECT id FROM localized_contents") for query, _ in executed)
+    assert not any("pg_notify" in query for query, _ in executed)
+
+    # geänderter Abschnitt → ein Event mit genau diesem Key
+    executed = import_article([(11, False)])
+    notify = [params for query, params in executed if "pg_notify" in query]
+    assert notify == [("xntop_changes", '[{"country_id": 1, "lang": "de", "keys": ["overview"]}]')]
+
+
+def test_listener_suppresses_duplicates():
+    """Event und Abgleich für denselben Stand → nur eine Meldung"""
+    listener = ChangeListener("dbname=xntop", handler=lambda event: None)
+    assert listener._is_new(ChangeEvent(1, "de", ["overview"], "v1", 7))
+    assert not listener._is_new(ChangeEvent(1, "de", ["overview"], "v1", 7))
+    # Abgleich: andere revision (z. B. Sync ohne Änderung), gleiche version → schon bekannt
+    assert not listener._is_new(ChangeEvent(1, "de", None, "v1", 8, reconciled=True))
+    assert listener._is_new(ChangeEvent(1, "de", None, "v2", 8, reconciled=True))
+    # Events vergleichen revision und version
+    assert listener._is_new(ChangeEvent(1, "de", ["facts"], "v2", 9))
+    assert listener._is_new(ChangeEvent(1, "en", ["page"], "v2", 9))
+
+    handled = []
+    listener = ChangeListener("dbname=xntop", handler=handled.append)
+    for event in (ChangeEvent(1, "de", ["page"], "v1", 1), ChangeEvent(1, "de", ["page"], "v1", 1)):
+        listener._dispatch(event)
+    assert len(handled) == 1
+
+
+def test_listener_reconcile():
+    """Erster Abgleich ohne since = nur Basis; danach verpasste Änderungen melden, since nachziehen"""
+    now = datetime(2026, 10, 19, 12, 0)
+    rows = [(1, "de", 3, "v1", now - timedelta(minutes=5)), (2, "en", 1, "w1", now - timedelta(minutes=2))]
+    handled = []
+    listener = ChangeListener("dbname=xntop", handler=handled.append)
+    listener.conn = ScriptedConnection([("LOCALTIMESTAMP", [(now,)]), ("FROM sync_state s", rows)])
+    assert listener.reconcile() == 0 and handled == []
+    assert listener.conn.executed[-1][1] == {"since": datetime.min}
+    assert listener.since == now - timedelta(minutes=2)
+
+    # neue Verbindung: (1, de) unverändert, (2, en) mit neuer Seiten-Version verpasst
+    since = listener.since
+    rows = [(1, "de", 4, "v1", now + timedelta(minutes=1)), (2, "en", 2, "w2", now + timedelta(minutes=3))]
+    listener.conn = ScriptedConnection([("LOCALTIMESTAMP", [(now,)]), ("FROM sync_state s", rows)])
+    assert listener.reconcile() == 1
+    assert listener.conn.executed[-1][1] == {"since": since - change_events.RECONCILE_OVERLAP}
+    assert [(e.country_id, e.language_code, e.keys, e.version, e.reconciled) for e in handled] == [
+        (2, "en", None, "w2", True)]
+    assert listener.since == now + timedelta(minutes=3)
+
+    # ohne Zeilen: since bleibt bzw. wird beim ersten Abgleich der Serverzeitpunkt
+    listener.conn = ScriptedConnection([("LOCALTIMESTAMP", [(now,)])])
+    assert listener.reconcile() == 0 and listener.since == now + timedelta(minutes=3)
+    listener = ChangeListener("dbname=xntop", handler=handled.append)
+    listener.conn = ScriptedConnection([("LOCALTIMESTAMP", [(now,)])])
+    listener.reconcile()
+    assert listener.since == now
+
+
+def test_listener_reconnect_backoff():
+    """Verbindungsfehler → Backoff verdoppelt bis max_reconnect_delay, nach Connect wieder von vorn"""
+    listener = ChangeListener("dbname=xntop", handler=lambda event: None,
+                              reconnect_delay=1.0, max_reconnect_delay=3.0)
+    now = datetime(2026, 10, 19, 12, 0)
+    connects, polls, sleeps = [], [], []
+
+    def connect():
+        connects.append(len(sleeps))
+        if len(connects) <= 3:
+            raise psycopg2.OperationalError("connection refused")
+        listener.conn = ScriptedConnection([("LOCALTIMESTAMP", [(now,)])])
+
+    def poll():
+        polls.append(listener.since)
+        if len(polls) == 1:
+            raise psycopg2.OperationalError("server closed the connection")
+        listener.stop()
+        return 0
+
+    with mock.patch.object(listener, "_connect", connect), mock.patch.object(listener, "poll", poll), \
+            mock.patch.object(change_events.time, "sleep", sleeps.append):
+        listener.run()
+    assert sleeps == [1.0, 2.0, 3.0, 1.0]
+    assert len(connects) == 5 and polls == [now, now]
+    assert listener.conn is None
+
+
+if __name__ == "__main__":
+    test_change_events()
+    test_import_full_article_unchanged_section()
+    test_listener_suppresses_duplicates()
+    test_listener_reconcile()
+    test_listener_reconnect_backoff()
@@ -0,0 +1,31 @@
+"""
+Offline-Tests für die vorkomprimierten gzip/br-Varianten
+"""
+
+import compression_storage
+
+
+def test_precompressed_variants():
+    """gzip/br-Varianten: nur verfügbare Encodings, deterministische und verlustfreie Bytes"""
+    import gzip
+
+    expected = ["br", "gzip"] if compression_storage.brotli else ["gzip"]
+    assert compression_storage.parse_encodings(" gzip, BR, zstd ") == expected
+    assert compression_storage.parse_encodings("") == []
+
+    html = "<p>Zürich liegt in der Schweiz.</p>" * 50
+    gz, br = compression_storage.variants(html, ["gzip"])
+    assert br is None
+    assert gzip.decompress(gz).decode("utf-8") == html
+    assert compression_storage.variants(html, ["gzip"])[0] == gz
+    assert len(gz) < len(html.encode("utf-8")) // 5
+    if compression_storage.brotli:
+        _, br = compression_storage.variants(html, ["br"])
+        assert compression_storage.brotli.decompress(br).decode("utf-8") == html
+
+    assert compression_storage.compress_blobs(None, {}, ["gzip"]) == 0
+    assert compression_storage.compress_pages(None, [(1, "de")], []) == 0
+
+
+if __name__ == "__main__":
+    test_precompressed_variants()
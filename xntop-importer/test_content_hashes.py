@@ -0,0 +1,51 @@
+"""
+Offline-Tests für den clientseitigen Content-Hash-Index (SKIP_UNCHANGED_SECTIONS)
+"""
+
+import content_storage
+from db_writer import SectionWrite
+from main import XNTOPImporter
+from test_database import fake_db
+
+
+def test_load_content_hashes():
+    """Eine Abfrage für alle Länder-Abschnitte, optional auf Sprachen gefiltert"""
+    db = fake_db(results=[[(1, "de", 3, "h1", "hot"), (1, "de", 4, "h2", "cold")]])
+    hashes = db.load_content_hashes()
+    assert hashes == {(1, "de", 3): ("h1", "hot"), (1, "de", 4): ("h2", "cold")}
+    query, params = db.pool.connections[-1].executed[0]
+    assert "word_count IS NOT NULL" in query and "ANY" not in query and params is None
+
+    db.load_content_hashes(["de", "en"])
+    query, params = db.pool.connections[-1].executed[0]
+    assert query.endswith("AND language_code = ANY(%s)") and params == (["de", "en"],)
+
+    # alle Sprachen im Bulk-Load (FULL_REBUILD): leere Liste heißt keine, nicht alle
+    checkouts = db.get_pool_metrics()["checkouts"]
+    assert db.load_content_hashes([]) == {}
+    assert db.get_pool_metrics()["checkouts"] == checkouts
+
+
+def test_skip_unchanged_sections():
+    """Gleicher Hash und gleiche Ablage → überspringen; Index erst nach dem Commit nachziehen"""
+    importer = XNTOPImporter()
+    importer.skip_unchanged = True
+    html = "<p>Berlin ist die Hauptstadt Deutschlands.</p>"
+    digest = content_storage.content_hash(html)
+    importer.content_hashes = {(1, "de", 3): (digest, "hot")}
+
+    assert importer._section_unchanged(1, "de", 3, digest, "hot")
+    assert not importer._section_unchanged(1, "de", 3, content_storage.content_hash(html + " "), "hot")
+    assert not importer._section_unchanged(1, "de", 3, digest, "cold")  # Ablage gewechselt
+    assert not importer._section_unchanged(1, "en", 3, digest, "hot")
+
+    importer._remember_hashes([SectionWrite(1, "en", 3, "overview", html, None, digest, cold=True)])
+    assert importer._section_unchanged(1, "en", 3, digest, "cold")
+
+    importer.skip_unchanged = False
+    assert not importer._section_unchanged(1, "de", 3, digest, "hot")
+
+
+if __name__ == "__main__":
+    test_load_content_hashes()
+    test_skip_unchanged_sections()
@@ -0,0 +1,242 @@
+"""
+Offline-Tests für den DatabaseManager (Pool, Transaktionen) mit Fake-Verbindungen
+"""
+
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+from database import DatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((" ".join(query.split()), params))
+        self.rows = self.conn.results.pop(0) if self.conn.results else []
+        self.rowcount = len(self.rows)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeInfo:
+    transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    def __init__(self, results=None):
+        self.info = FakeInfo()
+        self.autocommit = True
+        self.closed = 0
+        self.executed = []
+        self.results = list(results or [])
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        self.executed.append(("COMMIT", None))
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.executed.append(("ROLLBACK", None))
+
+
+class FakePool:
+    """Wie ThreadedConnectionPool, zählt aber nur die ausgegebenen Verbindungen"""
+
+    def __init__(self, results=None):
+        self.results = results
+        self.connections = []
+        self.out = 0
+        self.out_max = 0
+        self.returned = []
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            self.out += 1
+            self.out_max = max(self.out_max, self.out)
+            conn = FakeConnection(self.results)
+            self.connections.append(conn)
+            return conn
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.out -= 1
+            self.returned.append((conn, close))
+
+    def closeall(self):
+        pass
+
+
+def fake_db(max_connections: int = 2, pool_timeout: float = 5.0, results=None) -> DatabaseManager:
+    db = DatabaseManager("localhost", 5432, "xntop", "xntop", "", min_connections=0,
+                         max_connections=max_connections, pool_timeout=pool_timeout)
+    db.pool = FakePool(results)
+    return db
+
+
+def test_pool_bounds_checkouts():
+    """Semaphor: nie mehr als max_connections gleichzeitig, Wartende bekommen frei werdende Verbindungen"""
+    db = fake_db(max_connections=2)
+    started = threading.Barrier(6)
+
+    def task():
+        started.wait()
+        with db.transaction():
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=task) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    metrics = db.get_pool_metrics()
+    assert db.pool.out_max == 2 and db.pool.out == 0
+    assert metrics["checkouts"] == 6 and metrics["in_use"] == 0 and metrics["in_use_max"] == 2
+    assert metrics["wait_seconds_max"] > 0
+    assert all(conn.commits == 1 and conn.autocommit is False for conn in db.pool.connections)
+
+
+def test_pool_timeout():
+    """Erschöpfter Pool: PoolError nach pool_timeout statt sofort, Slot wird wieder frei"""
+    db = fake_db(max_connections=1, pool_timeout=0.1)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        with db.transaction():
+            holding.set()
+            release.wait(5)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    holding.wait(5)
+    try:
+        with db.transaction():
+            assert False, "zweite Verbindung trotz max_connections=1"
+    except psycopg2.pool.PoolError:
+        pass
+    release.set()
+    t.join(5)
+    assert db.get_pool_metrics()["timeouts"] == 1
+    with db.transaction():
+        pass
+    assert db.get_pool_metrics()["checkouts"] == 2
+
+    # ohne connect() keine Verbindung
+    db.pool = None
+    try:
+        with db.transaction():
+            pass
+        assert False, "Transaktion ohne Pool"
+    except psycopg2.InterfaceError:
+        pass
+
+
+def test_transaction_commit_and_rollback():
+    """Commit beim Verlassen, Rollback bei Exception; verschachtelt = dieselbe Verbindung"""
+    db = fake_db()
+    with db.transaction() as conn:
+        with db.transaction() as inner:
+            assert inner is conn and db.connection is conn
+    assert conn.commits == 1 and db.connection is None
+
+    try:
+        with db.transaction() as conn:
+            raise ValueError("kaputt")
+    except ValueError:
+        pass
+    assert conn.commits == 0 and conn.rollbacks == 1
+    assert db.get_pool_metrics()["in_use"] == 0
+
+
+def test_transaction_refuses_aborted_commit():
+    """Abgebrochene Transaktion (Fehler geschluckt): kein stilles COMMIT, sondern Rollback + Fehler"""
+    db = fake_db()
+    try:
+        with db.transaction() as conn:
+            conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+        assert False, "Commit einer abgebrochenen Transaktion"
+    except psycopg2.InternalError:
+        pass
+    assert conn.commits == 0 and conn.rollbacks == 1
+    assert db.pool.returned[-1] == (conn, False)
+
+
+def test_commit_every():
+    """commit_every: Zwischen-Commit alle N Schreiboperationen, nie innerhalb eines Savepoints"""
+    db = fake_db()
+    with db.transaction(commit_every=2) as conn:
+        for _ in range(5):
+            db._count_write()
+        assert conn.commits == 2
+        with db.savepoint():
+            db._count_write()
+            db._count_write()
+        assert conn.commits == 2
+        db._count_write()
+        assert conn.commits == 3
+    assert conn.commits == 4
+
+    # ohne commit_every zählt nichts
+    with db.transaction() as conn:
+        for _ in range(5):
+            db._count_write()
+    assert conn.commits == 1
+
+
+def test_savepoint():
+    """Savepoint: Fehler im Block wird zurückgerollt, die umgebende Transaktion committet trotzdem"""
+    db = fake_db()
+    with db.transaction() as conn:
+        with db.savepoint():
+            with db.savepoint():
+                pass
+        try:
+            with db.savepoint():
+                raise psycopg2.DatabaseError("Constraint verletzt")
+        except psycopg2.DatabaseError:
+            pass
+    assert [q for q, _ in conn.executed] == [
+        "SAVEPOINT xntop_sp_1", "SAVEPOINT xntop_sp_2", "RELEASE SAVEPOINT xntop_sp_2",
+        "RELEASE SAVEPOINT xntop_sp_1",
+        "SAVEPOINT xntop_sp_1", "ROLLBACK TO SAVEPOINT xntop_sp_1",
+        "COMMIT",
+    ]
+
+    # ohne laufende Transaktion wie transaction()
+    with db.savepoint() as conn:
+        pass
+    assert conn.commits == 1 and conn.executed == [("COMMIT", None)]
+
+
+if __name__ == "__main__":
+    test_pool_bounds_checkouts()
+    test_pool_timeout()
+    test_transaction_commit_and_rollback()
+    test_transaction_refuses_aborted_commit()
+    test_commit_every()
+    test_savepoint()
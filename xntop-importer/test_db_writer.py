@@ -0,0 +1,120 @@
+"""
+Offline-Tests für den Write-Behind-Writer (DatabaseWriter) mit Fake-Datenbank
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+from db_writer import DatabaseWriter, SyncLogWrite, WriteUnit
+
+
+class FakeDB:
+    """Protokolliert Transaktionen; insert_sync_logs scheitert für Länder in broken"""
+
+    def __init__(self, broken=(), gate: threading.Event = None):
+        self.events = []
+        self.broken = set(broken)
+        self.gate = gate
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        pending = []
+        self._pending = pending
+        try:
+            yield self
+        except BaseException:
+            self._log("rollback")
+            raise
+        self._log("commit", pending)
+
+    @contextmanager
+    def savepoint(self):
+        yield self
+
+    def insert_sync_logs(self, rows):
+        if any(row[0] in self.broken for row in rows):
+            raise psycopg2.DatabaseError("kaputte Unit")
+        self._pending.extend(row[0] for row in rows)
+
+    def _log(self, event, countries=None):
+        with self.lock:
+            self.events.append((event, sorted(countries or [])))
+
+
+def unit(country_id: int) -> WriteUnit:
+    return WriteUnit(iso_code=f"C{country_id}", country_id=country_id, language_code="de", status="no_data",
+                     sync_logs=[SyncLogWrite(country_id, "de", "wikipedia", "no_data")])
+
+
+def test_batch_split_on_failure():
+    """Fehlgeschlagener Batch → jede Unit einzeln; nur die kaputte Unit scheitert"""
+    db = FakeDB(broken={2})
+    acks = []
+    writer = DatabaseWriter(db, lambda u, outcome: acks.append((u.country_id, outcome["ok"])),
+                            queue_size=8, batch_size=3)
+    for country_id in (1, 2, 3):
+        writer._queue.put(unit(country_id))
+    writer._queue.put(None)
+    writer._run()
+
+    assert db.events == [("rollback", []), ("commit", [1]), ("rollback", []), ("commit", [3])]
+    assert acks == [(1, True), (2, False), (3, True)]
+    metrics = writer.get_metrics()
+    assert metrics["batches"] == 1 and metrics["units_written"] == 2 and metrics["units_failed"] == 1
+
+
+def test_ack_after_commit():
+    """on_ack erst, wenn der Commit der Unit protokolliert ist"""
+    db = FakeDB()
+    seen = []
+
+    def on_ack(u, outcome):
+        with db.lock:
+            committed = [c for event, countries in db.events if event == "commit" for c in countries]
+        seen.append(u.country_id in committed and outcome["ok"])
+
+    writer = DatabaseWriter(db, on_ack, queue_size=4, batch_size=2)
+    writer.start()
+    for country_id in range(1, 6):
+        writer.submit(unit(country_id))
+    writer.close()
+    assert seen == [True] * 5
+    assert writer.get_metrics()["units_written"] == 5
+    try:
+        writer.submit(unit(6))
+        assert False, "submit nach close()"
+    except RuntimeError:
+        pass
+
+
+def test_backpressure():
+    """Volle Queue → submit() blockiert, bis der Writer wieder Platz macht"""
+    gate = threading.Event()
+    writer = DatabaseWriter(FakeDB(gate=gate), lambda u, outcome: None, queue_size=1, batch_size=1)
+    writer.start()
+    writer.submit(unit(1))        # der Writer hängt in der Transaktion
+    time.sleep(0.05)
+    writer.submit(unit(2))        # füllt die Queue
+    blocked = threading.Thread(target=writer.submit, args=(unit(3),))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+    gate.set()
+    blocked.join(5)
+    assert not blocked.is_alive()
+    writer.close()
+    metrics = writer.get_metrics()
+    assert metrics["units_written"] == 3 and metrics["submit_blocked_seconds"] >= 0.1
+    assert metrics["queue_depth_max"] == 1
+
+
+if __name__ == "__main__":
+    test_batch_split_on_failure()
+    test_ack_after_commit()
+    test_backpressure()
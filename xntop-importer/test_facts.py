@@ -0,0 +1,29 @@
+"""
+Offline-Tests für die typisierten Faktenwerte
+"""
+
+import fact_storage
+
+
+def test_typed_facts():
+    """Fakten: Zahlen je Sprache normalisiert (kanonische Einheit), Datum, Entität"""
+    def num(key, value, lang="en"):
+        return fact_storage.typed_values(key, value, lang)["value_numeric"]
+
+    assert num("population", "84,358,845 [3] (2023)") == 84358845
+    assert num("population", "84.358.845 (2023)", "de") == 84358845
+    assert num("area_km2", "357.588,02 km²", "de") == fact_storage.Decimal("357588.02")
+    assert num("gdp_nominal", "$4.3 trillion") == 4300000000000
+    assert num("gdp_nominal", "4,26 Billionen US-Dollar", "de") == 4260000000000
+    assert num("gdp_nominal", "4,1 billones €", "es") is None  # keine USD
+    assert num("hdi", "0,942 (sehr hoch)", "de") == fact_storage.Decimal("0.942")
+    assert num("population", "140 करोड़", "hi") == 1400000000
+    assert num("capital", "Berlin") is None
+
+    row = fact_storage.fact_row(1, "en", "capital", "Berlin", entity="http://www.wikidata.org/entity/Q64")
+    assert row[-1] == "Q64"
+    assert fact_storage.typed_values("founded", "1949-05-23")["value_date"].year == 1949
+
+
+if __name__ == "__main__":
+    test_typed_facts()
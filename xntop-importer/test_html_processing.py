@@ -0,0 +1,82 @@
+"""
+Offline-Tests für die HTML-Nachbearbeitung (Parse-Stage)
+"""
+
+from html_processing import optimize_images, parse_widths, section_text_stats
+from infobox import extract_infobox_facts
+
+SAMPLE_IMG = (
+    '<figure><img src="//upload.wikimedia.org/wikipedia/commons/thumb/a/ab/Alps.jpg/250px-Alps.jpg" '
+    'srcset="//upload.wikimedia.org/wikipedia/commons/thumb/a/ab/Alps.jpg/500px-Alps.jpg 2x" '
+    'width="250" height="167" resource="./File:Alps.jpg" data-file-width="800" data-file-height="534"/></figure>'
+)
+
+
+def test_image_optimization():
+    """Testet URL-Normalisierung, Lazy-Loading und srcset"""
+    html = optimize_images(SAMPLE_IMG + SAMPLE_IMG, widths=[320, 640, 1024], hero=True)
+
+    assert "//upload" not in html.replace("https://upload", "")
+    assert html.count('loading="lazy"') == 1
+    assert 'fetchpriority="high"' in html
+    assert 'width="250"' in html and 'height="167"' in html
+    assert "640px-Alps.jpg 640w" in html
+    assert "1024px-Alps.jpg" not in html  # Original ist nur 800px breit
+    assert "resource=" not in html
+
+
+def test_parse_widths():
+    assert parse_widths("1024, 320,abc,640") == [320, 640, 1024]
+    assert parse_widths("") == [320, 640, 1024]
+
+
+SAMPLE_INFOBOX = '''<table class="infobox ib-country vcard"><tbody>
+<tr><th class="infobox-label">Capital</th><td class="infobox-data"><a>Berlin</a><sup class="reference">[1]</sup></td></tr>
+<tr><th class="infobox-header" colspan="2">Area</th></tr>
+<tr><th class="infobox-label">• Total</th><td class="infobox-data">357,596 km<sup>2</sup> (138,067 sq mi)</td></tr>
+<tr><th class="infobox-label">• Water (%)</th><td class="infobox-data">1.27</td></tr>
+<tr><th class="infobox-header" colspan="2">Population</th></tr>
+<tr><th class="infobox-label">• 2023 estimate</th><td class="infobox-data">84,482,267<sup class="reference">[3]</sup></td></tr>
+<tr><th class="infobox-label">• Density</th><td class="infobox-data">236/km<sup>2</sup></td></tr>
+</tbody></table>'''
+
+
+def test_infobox_extraction():
+    """Testet Label-Mapping, Gruppenzeilen und Einheiten"""
+    facts = {f["key"]: f for f in extract_infobox_facts(SAMPLE_INFOBOX, "en")}
+
+    assert facts["capital"]["value"] == "Berlin"
+    assert facts["area_km2"]["value"].startswith("357,596 km²")
+    assert facts["area_km2"]["unit"] == "km²"
+    assert facts["population"]["value"] == "84,482,267"
+    assert facts["population_density"]["value"] == "236/km²"
+    assert extract_infobox_facts("<p>kein Infobox</p>", "en") == []
+
+    # Kfz-Kennzeichen ist keine Top-Level-Domain
+    de = extract_infobox_facts(
+        '<table class="infobox"><tr><th>Kfz-Kennzeichen</th><td>D</td></tr>'
+        '<tr><th>Internet-TLD</th><td>.de</td></tr></table>', "de")
+    assert de == [{"key": "internet_tld", "value": ".de", "unit": None}]
+
+
+def test_section_text_stats():
+    """Testet Klartext, Excerpt-Kürzung und Wortzahl (inkl. CJK)"""
+    stats = section_text_stats(
+        '<p>Berlin ist die Hauptstadt<sup class="reference">[1]</sup> Deutschlands.</p><table><tr><td>3,7 Mio.</td></tr></table>',
+        excerpt_length=20,
+    )
+    assert stats["plain_text"] == "Berlin ist die Hauptstadt Deutschlands. 3,7 Mio."
+    assert stats["excerpt"] == "Berlin ist die…"
+    assert stats["word_count"] == 7
+    assert stats["reading_time_minutes"] == 1
+
+    zh = section_text_stats("<p>柏林是德国首都</p>")
+    assert zh["word_count"] == 7
+    assert section_text_stats("")["word_count"] == 0
+
+
+if __name__ == "__main__":
+    test_image_optimization()
+    test_parse_widths()
+    test_infobox_extraction()
+    test_section_text_stats()
@@ -0,0 +1,30 @@
+"""
+Offline-Tests für die Extraktion großer Tabellen (Parse-Stage)
+"""
+
+from html_processing import extract_large_tables
+
+
+def test_large_table_extraction():
+    """Testet Platzhalter, rowspan/colspan-Expansion und Schwellwert"""
+    body = "".join(f"<tr><td>P{i}</td><td>{i}</td><td>{i * 2}</td></tr>" for i in range(30))
+    html = (
+        '<p>Provinzen</p><table class="wikitable"><caption>Provinzen</caption>'
+        '<tr><th rowspan="2">Name</th><th colspan="2">Einwohner</th></tr><tr><th>2010</th><th>2020</th></tr>'
+        '<tr><td rowspan="2">A</td><td>1</td><td>2</td></tr><tr><td>3</td><td>4</td></tr>'
+        f'{body}</table><table class="wikitable"><tr><td>klein</td></tr></table>'
+    )
+    out, tables = extract_large_tables(html, min_rows=25)
+
+    assert len(tables) == 1
+    table = tables[0]
+    assert table["columns"] == ["Name", "Einwohner / 2010", "Einwohner / 2020"]
+    assert table["rows"][:2] == [["A", "1", "2"], ["A", "3", "4"]]
+    assert table["row_count"] == 32
+    assert f'data-table-hash="{table["table_hash"]}"' in out
+    assert "klein" in out  # kleine Tabellen bleiben HTML
+    assert extract_large_tables(html, min_rows=100) == (html, [])
+
+
+if __name__ == "__main__":
+    test_large_table_extraction()
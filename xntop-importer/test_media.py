@@ -0,0 +1,24 @@
+"""
+Offline-Tests für das mengenbasierte Schreiben der Medien
+"""
+
+import media_storage
+
+
+def test_media_dedup():
+    """Medien-Batch: Dedup über die normalisierte URL, erster Eintrag gewinnt"""
+    rows = [
+        (1, "de", "Flagge", "flag", "//upload.wikimedia.org/flag.svg", "Wikipedia", None),
+        (1, "de", "Bild", "image", "https://upload.wikimedia.org/flag.svg ", "Wikipedia", None),
+        (1, "en", "Flag", "flag", "https://upload.wikimedia.org/flag.svg", "Wikipedia", None),
+        (1, "de", "Leer", "image", "", "Wikipedia", None),
+    ]
+    unique = media_storage.dedup_media(rows)
+    assert [(r[1], r[2], r[4]) for r in unique] == [
+        ("de", "Flagge", "https://upload.wikimedia.org/flag.svg"),
+        ("en", "Flag", "https://upload.wikimedia.org/flag.svg"),
+    ]
+
+
+if __name__ == "__main__":
+    test_media_dedup()
@@ -0,0 +1,80 @@
+"""
+Offline-Tests für die materialisierten Seitendokumente
+"""
+
+import gzip
+
+import page_storage
+
+
+class RecordingCursor:
+    """Protokolliert Statements (auch execute_values/COPY); Ergebnisse der Reihe nach aus results"""
+
+    encoding = "UTF8"
+
+    def __init__(self, results=None):
+        self.connection = self
+        self.results = list(results or [])
+        self.executed = []
+        self.mogrified = []
+        self.copied = []
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        query = query.decode("utf-8") if isinstance(query, bytes) else query
+        self.executed.append((" ".join(query.split()), params))
+        self.rows = self.results.pop(0) if self.results else []
+        self.rowcount = len(self.rows)
+
+    def mogrify(self, query, params=None):
+        self.mogrified.append(params)
+        return b"(...)"
+
+    def copy_expert(self, query, payload):
+        self.copied.append((query, payload.getvalue()))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+def test_page_keys():
+    """Seiten-Neuaufbau: Sprachcodes normalisiert, jede Länder-Sprache nur einmal"""
+    keys = page_storage.page_keys([(2, " DE "), (1, "en"), (2, "de"), (1, None)])
+    assert keys == [(1, "en"), (2, "de")]
+    assert page_storage.rebuild_pages(None, []) == []
+    assert page_storage.invalidate_versions(None, []) == 0
+
+
+def test_rebuild_pages():
+    """Ein Statement für alle Länder-Sprachen; geänderte Keys einmal je Länder-Sprache, nur diese komprimiert"""
+    document = '{"slug": "deutschland", "version": "v2"}'
+    # BUILD_PAGES_SQL liefert je geschriebenem Slug eine Zeile (slug_en, slug_de, kanonisch)
+    cur = RecordingCursor([[(2, "de"), (2, "de")], [("deutschland", "de", document)]])
+    changed = page_storage.rebuild_pages(cur, [(2, " DE "), (1, "en"), (2, "de")], ["gzip"])
+    assert changed == [(2, "de")]
+    query, params = cur.executed[0]
+    assert query == " ".join(page_storage.BUILD_PAGES_SQL.split())
+    assert params == ([1, 2], ["en", "de"])
+    # nur die geänderte Seite wird komprimiert
+    assert cur.executed[1][1] == ([2], ["de"])
+    (slug, lang, gz, br), = cur.mogrified
+    assert (slug, lang, br) == ("deutschland", "de", None)
+    assert gzip.decompress(gz.adapted).decode("utf-8") == document
+
+    # unverändert: keine Keys, keine Kompression
+    cur = RecordingCursor([[]])
+    assert page_storage.rebuild_pages(cur, [(2, "de")], ["gzip"]) == []
+    assert len(cur.executed) == 1
+
+    cur = RecordingCursor([[(2,), (3,)]])
+    assert page_storage.invalidate_versions(cur, [(3, "EN"), (2, "de")]) == 2
+    assert cur.executed[0][1] == ([2, 3], ["de", "en"])
+
+
+if __name__ == "__main__":
+    test_page_keys()
+    test_rebuild_pages()
@@ -0,0 +1,48 @@
+"""
+Offline-Tests für die Sprachpartitionen und den Bulk-Load
+"""
+
+import content_storage
+import partition_storage
+from test_pages import RecordingCursor
+
+
+def test_language_load_targets():
+    """Bulk-Load: Ladetabellen-Namen wie in SQL, Abschnitte landen in der Ladetabelle der Sprache"""
+    assert partition_storage.load_table_name("zh-Hans") == "localized_contents_load_zh_hans"
+    assert partition_storage.parse_languages(" FR, it,fr,, ") == ["fr", "it"]
+
+    old = content_storage.stage_row(7, "fr", 3, "<p>ancien</p>")
+    new = content_storage.stage_row(7, "fr", 3, "<p>nouveau</p>")
+    refs = content_storage.stage_row(7, "fr", 4, "<ol>refs</ol>", cold=True)
+    cur = RecordingCursor([[], [], [(7, "fr", 3, 11, "insert"), (7, "fr", 4, 12, "update_unchanged")]])
+    results = content_storage.bulk_upsert_sections(cur, [old, new, refs],
+                                                   target=partition_storage.load_table_name("fr"))
+    assert results == [
+        {"country_id": 7, "language_code": "fr", "content_type_id": 3, "id": 11, "status": "insert"},
+        {"country_id": 7, "language_code": "fr", "content_type_id": 4, "id": 12, "status": "update_unchanged"},
+    ]
+    # doppelter Schlüssel: die letzte Zeile gewinnt, ein COPY für alle Zeilen
+    (_, payload), = cur.copied
+    assert payload == content_storage.copy_payload([new, refs]).getvalue()
+    apply_query = cur.executed[-1][0]
+    assert apply_query == " ".join(content_storage.apply_stage_sql("localized_contents_load_fr").split())
+    assert apply_query != " ".join(content_storage.APPLY_STAGE_SQL.split())
+
+    # ohne target: localized_contents
+    cur = RecordingCursor()
+    content_storage.bulk_upsert_sections(cur, [new])
+    assert cur.executed[-1][0] == " ".join(content_storage.APPLY_STAGE_SQL.split())
+
+    # unbekannte Zieltabelle: Fehler, bevor etwas geschrieben wird
+    cur = RecordingCursor()
+    try:
+        content_storage.bulk_upsert_sections(cur, [new], target="countries; DROP TABLE countries")
+        assert False, "ungültige Zieltabelle akzeptiert"
+    except ValueError:
+        pass
+    assert cur.executed == [] and cur.copied == []
+
+
+if __name__ == "__main__":
+    test_language_load_targets()
@@ -0,0 +1,109 @@
+"""
+Offline-Tests für die gestufte Pipeline und den Scheduler
+"""
+
+import threading
+import time
+from main import XNTOPImporter
+from pipeline import Pipeline, Scheduler, Stage, bottleneck
+
+
+def test_pipeline_stages():
+    """Pipeline: Items durchlaufen alle Stufen, Abbruch je Stufe, Fehler → on_error, Metriken"""
+    def fail(item):
+        if item["n"] == 3:
+            raise ValueError("kaputt")
+        item["path"].append("parse")
+        return True
+
+    errors = []
+    pipe = Pipeline([
+        Stage("resolve", lambda item: item["path"].append("resolve") or item["n"] != 2, workers=2, queue_size=1),
+        Stage("fetch", lambda item: item["path"].append("fetch") or True, workers=3, queue_size=1),
+        Stage("parse", fail, workers=1, queue_size=1),
+    ], on_error=lambda item, e: errors.append((item["n"], str(e))))
+    pipe.start()
+    futures = [pipe.submit({"n": n, "path": []}) for n in range(6)]
+    items = [f.result(timeout=5) for f in futures]
+    pipe.close()
+    assert items[0]["path"] == ["resolve", "fetch", "parse"]
+    assert items[2]["path"] == ["resolve"]
+    assert items[3]["path"] == ["resolve", "fetch"] and errors == [(3, "kaputt")]
+
+    metrics = pipe.get_metrics()
+    assert [metrics[s]["processed"] for s in ("resolve", "fetch", "parse")] == [6, 5, 5]
+    assert metrics["resolve"]["finished"] == 1 and metrics["parse"]["failed"] == 1
+    assert all(m["queue_depth"] == 0 and m["queue_depth_max"] <= 1 for m in metrics.values())
+    assert bottleneck({"fetch": {"utilization": 0.9}, "parse": {"utilization": 0.2}}) == "fetch"
+    assert bottleneck({}) is None
+
+    # Ohne Threads: dieselben Stufen im aufrufenden Thread
+    assert pipe.run_inline({"n": 1, "path": []}).result()["path"] == ["resolve", "fetch", "parse"]
+
+
+def test_global_scheduler():
+    """Scheduler: langsames Item blockiert andere Gruppen nicht, Obergrenze gilt, Gruppen asynchron fertig"""
+    release = threading.Event()
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        if item == ("A", "zh"):
+            release.wait(5)
+        with lock:
+            active[0] -= 1
+        return True
+
+    done_groups, done_items = [], []
+    pipe = Pipeline([Stage("fetch", work, workers=4, queue_size=2)])
+    sched = Scheduler(pipe, max_in_flight=3, on_done=done_items.append, on_group_done=done_groups.append)
+    pipe.start()
+    sched.submit_group("A", [("A", "de"), ("A", "zh")])
+    for group in "BCD":
+        sched.submit_group(group, [(group, "de"), (group, "en")])
+    # A/zh hängt noch – B, C und D sind trotzdem durch
+    assert not sched.wait(timeout=0.2)
+    assert sorted(done_groups) == ["B", "C", "D"]
+    release.set()
+    assert sched.wait(timeout=5)
+    pipe.close()
+    assert done_groups[-1] == "A" and len(done_items) == 8
+    metrics = sched.get_metrics()
+    assert metrics["in_flight_max"] <= 3 and peak[0] <= 3
+    assert metrics["submitted"] == metrics["completed"] == 8 and metrics["groups_open"] == 0
+
+    # Ohne laufende Pipeline: sofort im aufrufenden Thread
+    inline = Scheduler(Pipeline([Stage("x", lambda item: True)]), on_group_done=done_groups.append)
+    inline.submit_group("E", [1, 2])
+    assert done_groups[-1] == "E" and inline.get_metrics()["in_flight"] == 0
+
+
+def test_shared_rate_limit():
+    """resolve und fetch teilen sich den Mindestabstand zwischen Requests (auch parallel)"""
+    importer = XNTOPImporter()
+    importer.delay_between_requests = 0.02
+    stamps, lock = [], threading.Lock()
+
+    def requests():
+        for _ in range(3):
+            importer._rate_limited_request()
+            with lock:
+                stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=requests) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    # 12 Requests → 11 Abstände; ohne Lock teilen sich Threads dasselbe Zeitfenster
+    assert len(stamps) == 12
+    assert max(stamps) - min(stamps) >= 11 * 0.02 - 0.005
+
+
+if __name__ == "__main__":
+    test_pipeline_stages()
+    test_global_scheduler()
+    test_shared_rate_limit()
@@ -0,0 +1,41 @@
+"""
+Offline-Tests für die Versionshistorie der Abschnitte
+"""
+
+import revision_storage
+
+
+def test_section_revisions():
+    """Versionshistorie: Delta-Rundreise, Bestand als Vollstand, Keyframes, Wikipedia-Revision"""
+    base = "".join(f"<p>Absatz {i}</p>\n" for i in range(200))
+    new = base.replace("<p>Absatz 50</p>", "<p>Absatz 50 (neu)</p>") + "<p>Nachtrag</p>"
+    delta = revision_storage.pack("delta", new, base)
+    assert revision_storage.unpack("delta", delta, base) == new
+    assert len(delta) < len(revision_storage.pack("full", new)) // 3
+    assert revision_storage.unpack("full", revision_storage.pack("full", new)) == new
+    assert revision_storage.unpack("delete", None) is None
+
+    html = '<html about="https://de.wikipedia.org/wiki/Special:Redirect/revision/245123456"><body></body></html>'
+    assert revision_storage.wikipedia_revision(html) == 245123456
+    assert revision_storage.wikipedia_revision("<p>ohne</p>") is None
+
+    key = (1, "de", 3)
+    section = {"country_id": 1, "language_code": "de", "content_type_id": 3,
+               "content": new, "content_hash": "h2", "wiki_revision": 7}
+    # Bestand (h1) noch nicht in der Historie → erst Vollstand ohne Lauf, dann Delta im Lauf 9
+    rows = revision_storage.revision_rows([section], {key: revision_storage.Head("h1", base)}, 9)
+    assert [(r[3], r[4], r[5], r[6], r[7]) for r in rows] == [(1, "full", "h1", None, None), (2, "delta", "h2", 7, 9)]
+    # Historie aktuell → nur das Delta
+    head = revision_storage.Head("h1", base, seq=4, content_hash="h1", keyframe_seq=1)
+    assert [(r[3], r[4]) for r in revision_storage.revision_rows([section], {key: head}, 9)] == [(5, "delta")]
+    # Kette voll → Vollstand
+    head.keyframe_seq = 5 - revision_storage.KEYFRAME_INTERVAL
+    assert [r[4] for r in revision_storage.revision_rows([section], {key: head}, 9)] == ["full"]
+    # Neu angelegt → Vollstand; bereits erfasst → nichts
+    assert [r[4] for r in revision_storage.revision_rows([section], {}, 9)] == ["full"]
+    head.content_hash = "h2"
+    assert revision_storage.revision_rows([section], {key: head}, 9) == []
+
+
+if __name__ == "__main__":
+    test_section_revisions()
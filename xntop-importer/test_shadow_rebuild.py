@@ -0,0 +1,52 @@
+"""
+Offline-Tests für den Neuaufbau über Schattentabellen
+"""
+
+import media_storage
+import shadow_storage
+from test_pages import RecordingCursor
+
+
+def test_shadow_rebuild():
+    """Neuaufbau: Schattentabellen-Ziele und Zeilenprüfung vor dem Tausch"""
+    shadow = shadow_storage.shadow_table_name("media_assets")
+    assert shadow == "media_assets_shadow"
+    rows = [
+        (1, "de", "Flagge", "flag", "//upload.wikimedia.org/flag.svg", "Wikipedia", None),
+        (1, "de", "Flagge (doppelt)", "flag", "https://upload.wikimedia.org/flag.svg", "Wikipedia", None),
+        (1, "de", "Wappen", "coat_of_arms", "https://upload.wikimedia.org/coa.svg", "Wikipedia", None),
+        (1, "de", "leer", "scenic", "", None, None),
+    ]
+    cur = RecordingCursor([[(True,)]])
+    counts = media_storage.bulk_upsert_media(cur, rows, target=shadow)
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 1, "skipped": 2}
+    # ein Statement in die Schattentabelle, URLs normalisiert und dedupliziert
+    assert len(cur.executed) == 1
+    assert cur.executed[0][0].startswith("INSERT INTO media_assets_shadow AS m ")
+    assert [(r[3], r[4]) for r in cur.mogrified] == [
+        ("flag", "https://upload.wikimedia.org/flag.svg"), ("coat_of_arms", "https://upload.wikimedia.org/coa.svg")]
+
+    cur = RecordingCursor([[(False,)]])
+    assert media_storage.bulk_upsert_media(cur, rows[2:3])["updated"] == 1
+    assert cur.executed[0][0].startswith("INSERT INTO media_assets AS m ")
+    cur = RecordingCursor()
+    try:
+        media_storage.bulk_upsert_media(cur, rows, target="countries")
+        assert False, "ungültige Zieltabelle akzeptiert"
+    except ValueError:
+        pass
+    assert cur.executed == []
+
+    live = {"de": 1000, "en": 1000, "fr": 0, "media_assets": 500}
+    assert shadow_storage.check_counts({"de": 950, "en": 1200, "fr": 10, "media_assets": 450}, live) == []
+    problems = shadow_storage.check_counts({"de": 800, "en": 0, "media_assets": 450}, live)
+    assert [p.split(":")[0] for p in problems] == ["de", "en"]
+    # 0 = nur leere Tabellen verhindern den Tausch
+    assert [p.split(":")[0] for p in shadow_storage.check_counts({"de": 1, "en": 0}, live, 0.0)] == ["en"]
+    assert shadow_storage.parse_ratio("0.75") == 0.75
+    assert shadow_storage.parse_ratio("2") == 1.0
+    assert shadow_storage.parse_ratio("x") == shadow_storage.DEFAULT_MIN_RATIO
+
+
+if __name__ == "__main__":
+    test_shadow_rebuild()
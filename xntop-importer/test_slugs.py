@@ -0,0 +1,43 @@
+"""
+Offline-Tests für die mehrsprachigen Länder-Slugs
+"""
+
+import slug_storage
+
+
+def test_slugify():
+    """Slugs aus lokalisierten Titeln: Diakritika weg, fremde Schriften bleiben"""
+    assert slug_storage.slugify("Côte d'Ivoire") == "cote-d-ivoire"
+    assert slug_storage.slugify("Weißrussland") == "weissrussland"
+    assert slug_storage.slugify("Bosnia_and_Herzegovina") == "bosnia-and-herzegovina"
+    assert slug_storage.slugify("भारत") == "भारत"
+    assert slug_storage.slugify("德国") == "德国"
+    rows = slug_storage.slug_rows([(1, "DE", "Österreich"), (1, "de", "Österreich "), (2, "en", " ")])
+    assert rows == [{"country_id": 1, "language_code": "de", "slug": "osterreich"}]
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def mogrify(self, query, params):
+        return query.encode("utf-8")
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+
+def test_claim_slugs_sets_slug_de():
+    """Deutscher Titel → countries.slug_de; andere Sprachen lassen slug_de unverändert"""
+    cur = FakeCursor()
+    assert slug_storage.claim_slugs(cur, [(2, "de", "Österreich"), (1, "de", "Deutschland"), (3, "en", "France")]) == 3
+    assert cur.executed[-1] == (slug_storage.SYNC_SLUG_DE_SQL, ([1, 2],))
+
+    cur = FakeCursor()
+    slug_storage.claim_slugs(cur, [(3, "en", "France")])
+    assert all(query != slug_storage.SYNC_SLUG_DE_SQL for query, _ in cur.executed)
+
+
+if __name__ == "__main__":
+    test_slugify()
+    test_claim_slugs_sets_slug_de()
@@ -0,0 +1,25 @@
+"""
+Offline-Tests für sync_state und die Sync-Logs
+"""
+
+import sync_storage
+
+
+def test_sync_state_rows():
+    """sync_state: letzte Zeile je Länder-Sprache gewinnt, Fehler nur bei Misserfolg"""
+    rows = sync_storage.state_rows([
+        (1, "de", "wikipedia", "error", 1200, "timeout"),
+        (1, "de", "wikipedia", "success", 900.4, "stale"),
+        (2, "en", "wikipedia", "no_title"),
+        (None, "en", "wikipedia", "error"),
+    ])
+    assert rows == [
+        (1, "de", "wikipedia", "success", True, 900, None, True),
+        (2, "en", "wikipedia", "no_title", False, None, None, False),
+    ]
+    assert len(sync_storage.log_row(1, "de", "wikipedia", "error", error="x" * 5000)[-1]) == sync_storage.MAX_ERROR_LENGTH
+    assert sync_storage.record_syncs(None, []) == 0
+
+
+if __name__ == "__main__":
+    test_sync_state_rows()